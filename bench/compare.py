@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+
+# Measurements shorter than this are too noisy to compare
+MIN_SECONDS = 1e-3
+
+
+def load(path) -> dict:
+    with open(path, encoding="utf-8") as file:
+        report = json.load(file)
+    measurements = {}
+    for entry in report["results"]:
+        if "skipped" in entry:
+            continue
+        key = (
+            entry["case"],
+            entry["states"],
+            entry["symbols"],
+            entry.get("length"),
+            entry["operation"],
+        )
+        measurements[key] = entry
+    return measurements
+
+
+# Compare two benchmark reports by best time and peak memory
+# Return form: list of (key, time ratio, memory ratio) over `threshold`
+def regressions(baseline: dict, current: dict, threshold: float) -> list:
+    found = []
+    for key, entry in sorted(current.items(), key=lambda item: str(item[0])):
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        time_ratio = entry["best"] / max(before["best"], MIN_SECONDS)
+        memory_ratio = entry["peak_bytes"] / max(before["peak_bytes"], 1)
+        if entry["best"] < MIN_SECONDS:
+            time_ratio = 1.0
+        if time_ratio > threshold or memory_ratio > threshold:
+            found.append((key, time_ratio, memory_ratio))
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Flag benchmark measurements that got slower or bigger"
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    found = regressions(load(args.baseline), load(args.current), args.threshold)
+    for (case, states, symbols, length, operation), time_ratio, memory_ratio in found:
+        label = f"{case} |Q|={states} |Σ|={symbols}"
+        if length is not None:
+            label += f" length={length}"
+        print(
+            f"{label} {operation}: time x{time_ratio:.2f}, memory x{memory_ratio:.2f}"
+        )
+    if not found:
+        print("No regressions")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+from types import MappingProxyType
+
+import numpy as np
+
+from lib.dfa import DFA
+
+
+# First k printable, non-whitespace characters
+# Symbols must survive validate()'s strip(), so whitespace is never used
+def make_alphabet(num_symbols: int) -> tuple:
+    symbols = []
+    code_point = 0x21
+    while len(symbols) < num_symbols:
+        symbol = chr(code_point)
+        if symbol.isprintable() and not symbol.isspace():
+            symbols.append(symbol)
+        code_point += 1
+    return tuple(symbols)
+
+
+def make_states(num_states: int) -> tuple:
+    return tuple(f"q{i}" for i in range(num_states))
+
+
+# DFA from an integer table, -1 for a missing transition
+def table_dfa(table: np.ndarray, final_mask: np.ndarray, initial: int = 0) -> DFA:
+    num_states, num_symbols = table.shape
+    states = make_states(num_states)
+    alphabet = make_alphabet(num_symbols)
+    rules = {}
+    for state, row in zip(states, table.tolist()):
+        for symbol, next_state in zip(alphabet, row):
+            if next_state >= 0:
+                rules[(state, symbol)] = states[next_state]
+    return DFA(
+        alphabet=alphabet,
+        states=states,
+        initial_state=states[initial],
+        final_states=tuple(
+            state for state, final in zip(states, final_mask.tolist()) if final
+        ),
+        rules=MappingProxyType(rules),
+    )
+
+
+# Uniformly random DFA, the same for the same arguments
+# missing_ratio > 0 leaves that share of transitions out (partial DFA)
+def random_dfa(
+    num_states: int,
+    num_symbols: int,
+    seed: int,
+    final_ratio: float = 0.5,
+    missing_ratio: float = 0.0,
+) -> DFA:
+    rng = np.random.default_rng(seed)
+    table = rng.integers(num_states, size=(num_states, num_symbols))
+    if missing_ratio:
+        table[rng.random(table.shape) < missing_ratio] = -1
+    final_mask = rng.random(num_states) < final_ratio
+    return table_dfa(table, final_mask)
+
+
+# Worst case for table-filling: a chain q0 -> q1 -> ... on the first symbol,
+# only the last state final, every other symbol loops
+# All states are distinct, and pairs at distance d are only marked in the
+# d-th round, so marking takes n - 1 rounds and nothing is merged
+def chain_dfa(num_states: int, num_symbols: int) -> DFA:
+    table = np.repeat(np.arange(num_states)[:, None], num_symbols, axis=1)
+    table[:, 0] = np.minimum(np.arange(num_states) + 1, num_states - 1)
+    final_mask = np.zeros(num_states, dtype=bool)
+    final_mask[-1] = True
+    return table_dfa(table, final_mask)
+
+
+# Many equivalent states: `num_classes` random classes, each copied until
+# there are `num_states` states; every transition goes to a random copy of
+# the right class, so minimization has to merge num_states / num_classes
+# states per class
+def duplicated_dfa(
+    num_states: int, num_symbols: int, num_classes: int, seed: int
+) -> DFA:
+    rng = np.random.default_rng(seed)
+    num_classes = max(1, min(num_classes, num_states))
+    base = rng.integers(num_classes, size=(num_classes, num_symbols))
+    base_finals = rng.random(num_classes) < 0.5
+
+    classes = np.arange(num_states) % num_classes
+    copies = -(-num_states // num_classes)
+    table = base[classes] + num_classes * rng.integers(
+        copies, size=(num_states, num_symbols)
+    )
+    # Copies past the last state fall back to the class' first copy
+    table = np.where(table < num_states, table, table % num_classes)
+    return table_dfa(table, base_finals[classes])
+
+
+# Random input over an alphabet, built from code points without a Python loop
+def random_input(alphabet: tuple, length: int, seed: int) -> str:
+    rng = np.random.default_rng(seed)
+    code_points = np.array([ord(symbol) for symbol in alphabet], dtype=np.uint32)
+    chosen = code_points[rng.integers(len(alphabet), size=length)]
+    if code_points.max() < 256:
+        return chosen.astype(np.uint8).tobytes().decode("latin-1")
+    return chosen.tobytes().decode("utf-32-le")
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from bench.generate import random_dfa, random_input
+from lib.server import serve
+
+# Load test of lib.server on one machine: starts the service in-process on a
+# seeded random DFA and drives it with keep-alive clients
+
+
+async def client(port: int, bodies: list, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(
+                b"POST /dfas/bench/validate HTTP/1.1\r\nHost: localhost\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(body) + body
+            )
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(args) -> dict:
+    dfa = random_dfa(args.states, args.symbols, args.seed)
+    text = random_input(dfa.alphabet, args.requests * args.batch * args.length, 0)
+    size = args.batch * args.length
+    bodies = [
+        json.dumps(
+            {
+                "inputs": [
+                    text[start + i : start + i + args.length]
+                    for i in range(0, size, args.length)
+                ]
+            }
+        ).encode("utf-8")
+        for start in range(0, len(text), size)
+    ]
+
+    server = asyncio.create_task(
+        serve({"bench": dfa}, port=args.port, window=args.window_ms / 1000)
+    )
+    await asyncio.sleep(0.2)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(args.port, bodies[i :: args.clients], latencies)
+            for i in range(args.clients)
+        )
+    )
+    seconds = time.perf_counter() - start
+    server.cancel()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "latency_ms": {
+            "p50": statistics.median(latencies) * 1000,
+            "p99": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+            "max": latencies[-1] * 1000,
+        },
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the validation service")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=1, help="Strings per request")
+    parser.add_argument("--length", type=int, default=32, help="Symbols per string")
+    parser.add_argument("--states", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
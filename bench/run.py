@@ -0,0 +1,306 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench.generate import chain_dfa, duplicated_dfa, random_dfa, random_input
+
+# Scale tiers: |Q|, |Σ| and input lengths swept by each
+TIERS = {
+    "smoke": {
+        "states": [10, 100],
+        "symbols": [2, 16],
+        "lengths": [10**3, 10**5],
+    },
+    "default": {
+        "states": [10, 100, 1000, 10**4],
+        "symbols": [2, 16, 256],
+        "lengths": [10**3, 10**5, 10**6],
+    },
+    "full": {
+        "states": [10, 100, 1000, 10**4, 10**5],
+        "symbols": [2, 16, 64, 256],
+        "lengths": [10**3, 10**5, 10**6, 10**7, 10**8],
+    },
+}
+
+# Per-operation limits, bigger cases are recorded as skipped
+# mark() allocates |Q|² / 2 cells, create_dfa() draws every transition
+TABLE_LIMIT = 5000
+GRAPH_LIMIT = 200_000
+# Rules dicts beyond this many transitions don't fit comfortably in memory
+TRANSITION_LIMIT = 3_000_000
+# Inputs at least this long are timed once
+LONG_INPUT = 10**7
+
+# States of the automaton validated in the input-length sweep
+VALIDATE_STATES = 100
+
+# Lines of the corpus validated by the cold-start run
+COLD_START_LINES = 1000
+# Modules a validation-only process should never import
+HEAVY_MODULES = ("pandas", "graphviz", "streamlit")
+
+# Same run as `python -m lib.cli validate-corpus`, reporting the traced peak
+# and which heavy modules ended up imported
+COLD_START_SCRIPT = """
+import json, sys, tracemalloc
+from lib.cli import main
+main(sys.argv[1:])
+_, peak = tracemalloc.get_traced_memory()
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"peak_bytes": peak, "imported": heavy}}), file=sys.stderr)
+"""
+
+
+# Time `operation` `repeat` times, then run it once more under tracemalloc
+# `setup` runs before every call and is not timed
+# Return form: {"seconds": [...], "best": ..., "median": ..., "peak_bytes": ...}
+def measure(operation, setup=None, repeat: int = 3) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        seconds.append(time.perf_counter() - start)
+
+    # tracemalloc slows allocation-heavy code down, so it gets its own run
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "best": min(seconds),
+        "median": statistics.median(seconds),
+        "peak_bytes": peak,
+    }
+
+
+# Reduction pipeline operations on one automaton
+# Every operation starts from a cold object: caches are reset in `setup`
+def structure_operations(dfa, repeat: int) -> dict:
+    from lib import render
+
+    num_states = len(dfa.states)
+    results = {}
+
+    results["remove_inaccessible_states"] = measure(
+        dfa.remove_inaccessible_states, repeat=repeat
+    )
+    results["minimize"] = measure(dfa.minimize, repeat=repeat)
+
+    # One edit of the second state's last transition, then the minimal DFA
+    # again; calls alternate between two targets so each one is a real edit
+    minimizer = dfa.minimizer()
+    edited = dfa.states[min(1, num_states - 1)]
+    symbol = dfa.alphabet[-1]
+    targets = itertools.cycle((dfa.initial_state, dfa.rules.get((edited, symbol))))
+
+    def minimizer_update():
+        minimizer.set_transition(edited, symbol, next(targets))
+        minimizer.minimized()
+
+    results["minimizer_update"] = measure(minimizer_update, repeat=repeat)
+
+    if num_states <= TABLE_LIMIT:
+        results["mark"] = measure(dfa.mark, repeat=repeat)
+        dfa.mark()
+        results["reduce"] = measure(dfa.reduce, repeat=repeat)
+    else:
+        skipped = {"skipped": f"|Q| > {TABLE_LIMIT}"}
+        results["mark"] = results["reduce"] = skipped
+
+    if num_states * len(dfa.alphabet) <= GRAPH_LIMIT:
+
+        def cold_graph():
+            render.__templates__.clear()
+            dfa.__key__ = None
+
+        results["create_dfa"] = measure(dfa.create_dfa, cold_graph, repeat)
+    else:
+        results["create_dfa"] = {"skipped": f"|Q|·|Σ| > {GRAPH_LIMIT}"}
+    return results
+
+
+def record(results: list, case: str, num_states: int, num_symbols: int, **extra):
+    def add(operation: str, measurement: dict):
+        entry = {
+            "case": case,
+            "states": num_states,
+            "symbols": num_symbols,
+            "operation": operation,
+        }
+        entry.update(extra)
+        entry.update(measurement)
+        results.append(entry)
+        if "skipped" in measurement:
+            detail = f"skipped ({measurement['skipped']})"
+        else:
+            detail = f"{measurement['best']:.4f}s, peak {measurement['peak_bytes']} B"
+        label = " ".join(f"{key}={value}" for key, value in extra.items())
+        print(
+            f"{case:>10} |Q|={num_states} |Σ|={num_symbols} {label} {operation}: {detail}"
+        )
+
+    return add
+
+
+def run(tier: str, seed: int, repeat: int) -> list:
+    settings = TIERS[tier]
+    results = []
+
+    for num_states in settings["states"]:
+        for num_symbols in settings["symbols"]:
+            add = record(results, "random", num_states, num_symbols)
+            if num_states * num_symbols > TRANSITION_LIMIT:
+                add("all", {"skipped": f"|Q|·|Σ| > {TRANSITION_LIMIT}"})
+                continue
+            dfa = random_dfa(num_states, num_symbols, seed)
+            for operation, measurement in structure_operations(dfa, repeat).items():
+                add(operation, measurement)
+
+    # Adversarial automata, smallest alphabet only
+    num_symbols = settings["symbols"][0]
+    for num_states in settings["states"]:
+        cases = (
+            ("chain", chain_dfa(num_states, num_symbols)),
+            (
+                "duplicated",
+                duplicated_dfa(num_states, num_symbols, max(1, num_states // 10), seed),
+            ),
+        )
+        for case, dfa in cases:
+            add = record(results, case, num_states, num_symbols)
+            for operation, measurement in structure_operations(dfa, repeat).items():
+                add(operation, measurement)
+
+    # validate() over growing inputs
+    for num_symbols in (settings["symbols"][0], settings["symbols"][-1]):
+        dfa = random_dfa(VALIDATE_STATES, num_symbols, seed)
+        dfa.compile()
+        for length in settings["lengths"]:
+            text = random_input(dfa.alphabet, length, seed)
+            runs = 1 if length >= LONG_INPUT else repeat
+            add = record(results, "random", VALIDATE_STATES, num_symbols, length=length)
+            add("validate", measure(lambda: dfa.validate(text), repeat=runs))
+            add("accepts", measure(lambda: dfa.accepts(text), repeat=runs))
+            del text
+
+    add = record(results, "cold_start", VALIDATE_STATES, 2)
+    add("validate_corpus", cold_start(seed, repeat))
+    return results
+
+
+# Wall time of a validation-only batch job in a fresh interpreter, imports
+# included, see lib.cli
+def cold_start(seed: int, repeat: int) -> dict:
+    num_symbols = 2
+    dfa = random_dfa(VALIDATE_STATES, num_symbols, seed)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dfa_path = os.path.join(directory, "dfa.fadfa")
+        corpus_path = os.path.join(directory, "corpus.txt")
+        dfa.save(dfa_path)
+        text = random_input(dfa.alphabet, COLD_START_LINES * 10, seed)
+        with open(corpus_path, "w", encoding="utf-8") as file:
+            for start in range(0, len(text), 10):
+                file.write(text[start : start + 10] + "\n")
+        arguments = ["validate-corpus", dfa_path, corpus_path, "--workers", "1"]
+
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "lib.cli", *arguments],
+                env=env,
+                capture_output=True,
+            )
+            seconds.append(time.perf_counter() - start)
+
+        # tracemalloc from interpreter start, in a run of its own
+        traced = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "tracemalloc",
+                "-c",
+                COLD_START_SCRIPT.format(heavy=HEAVY_MODULES),
+                *arguments,
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(traced.stderr.strip().splitlines()[-1])
+
+    return {
+        "seconds": seconds,
+        "best": min(seconds),
+        "median": statistics.median(seconds),
+        **report,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Time the DFA pipeline across scale tiers and write JSON"
+    )
+    parser.add_argument("--tier", choices=sorted(TIERS), default="smoke")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    results = run(args.tier, args.seed, args.repeat)
+    report = {
+        "meta": {
+            "tier": args.tier,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(results)} measurements to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
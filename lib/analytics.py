@@ -0,0 +1,266 @@
+from collections import deque
+
+import numpy as np
+
+# Quantitative queries on the language of a DFA, on its compiled table
+# Strings are sequences of alphabet symbols, returned joined into one str
+# Orders are length-lexicographic over the sorted alphabet
+
+# Moduli up to this size are multiplied in int64, see __matmul_mod__()
+SPLIT_MODULUS = 1 << 31
+SPLIT_BITS = 15
+SPLIT_MASK = (1 << SPLIT_BITS) - 1
+# More states than this could overflow the int64 sums of __matmul_mod__()
+SPLIT_STATES = 1 << 16
+
+
+# Transition table over the alphabet columns only, including the dead row
+# Columns are reordered by symbol, so BFS in column order is lexicographic
+# Return form: (table, accepting, initial, symbols)
+def symbol_table(dfa) -> tuple:
+    compiled = dfa.compile()
+    order = sorted(range(len(compiled.alphabet)), key=lambda i: compiled.alphabet[i])
+    table = compiled.delta[:, order]
+    symbols = tuple(compiled.alphabet[i] for i in order)
+    return table, compiled.accepting, compiled.initial, symbols
+
+
+# States that lie on some path from the initial state to an accepting one
+# Return form: boolean mask over the rows of `table`
+def useful_mask(table: np.ndarray, accepting: np.ndarray, initial: int) -> np.ndarray:
+    from lib.minimize import reachable_mask
+
+    reachable = reachable_mask(table, initial)
+
+    # Backwards from the accepting states over the reversed edges
+    sources = np.repeat(np.arange(len(table)), table.shape[1])
+    targets = table.ravel()
+    order = np.argsort(targets, kind="stable")
+    predecessors = sources[order]
+    starts = np.searchsorted(targets[order], np.arange(len(table) + 1))
+
+    coreachable = accepting.copy()
+    queue = deque(np.flatnonzero(accepting).tolist())
+    while queue:
+        state = queue.popleft()
+        for previous in predecessors[starts[state] : starts[state + 1]].tolist():
+            if not coreachable[previous]:
+                coreachable[previous] = True
+                queue.append(previous)
+    return reachable & coreachable
+
+
+# A·B mod m without overflow: B is split into 15-bit halves, so every
+# product stays below 2^46 and every row sum below 2^62
+def __matmul_mod__(a: np.ndarray, b: np.ndarray, modulus: int) -> np.ndarray:
+    high = (a @ (b >> SPLIT_BITS)) % modulus
+    low = (a @ (b & SPLIT_MASK)) % modulus
+    return ((high << SPLIT_BITS) + low) % modulus
+
+
+# e_initial · matrixⁿ · final by binary powering, the vector absorbs the
+# powers whose bit is set
+def __power_count__(matrix, vector, final, length: int, multiply) -> int:
+    while length:
+        if length & 1:
+            vector = multiply(vector[None, :], matrix)[0]
+        length >>= 1
+        if length:
+            matrix = multiply(matrix, matrix)
+    return int(multiply(vector[None, :], final[:, None])[0, 0])
+
+
+def __count_split__(matrix, vector, final, length: int, modulus: int) -> int:
+    def multiply(a, b):
+        return __matmul_mod__(a, b, modulus)
+
+    return __power_count__(matrix % modulus, vector, final, length, multiply)
+
+
+# Number of strings of exactly `length` symbols accepted by the DFA
+# Exact by default; with `modulus`, the count mod `modulus`
+# Counts are e_initial · Aⁿ · f over the useful states, Aⁿ by repeated
+# squaring, so O(m³·log n) matrix products for m useful states
+# Moduli below 2^31 run in int64; exact counts grow to n·log₂|Σ| bits and
+# need Python integers, so pass a modulus for large m and n
+def count_accepted(dfa, length: int, modulus: int = None) -> int:
+    if length < 0:
+        raise ValueError(f"Length must be non-negative: {length}")
+    if modulus is not None and modulus < 1:
+        raise ValueError(f"Modulus must be positive: {modulus}")
+
+    table, accepting, initial, _ = symbol_table(dfa)
+    useful = useful_mask(table, accepting, initial)
+    if not useful[initial]:
+        return 0
+
+    # Adjacency counts among the useful states
+    ids = np.full(len(table), -1, dtype=np.int64)
+    kept = np.flatnonzero(useful)
+    ids[kept] = np.arange(len(kept))
+    rows = np.repeat(ids[kept], table.shape[1])
+    cols = ids[table[kept].ravel()]
+    inside = cols >= 0
+    matrix = np.zeros((len(kept), len(kept)), dtype=np.int64)
+    np.add.at(matrix, (rows[inside], cols[inside]), 1)
+
+    vector = np.zeros(len(kept), dtype=np.int64)
+    vector[ids[initial]] = 1
+    final = accepting[kept].astype(np.int64)
+
+    splittable = len(kept) <= SPLIT_STATES
+    if modulus is not None and modulus <= SPLIT_MODULUS and splittable:
+        return __count_split__(matrix, vector, final, length, modulus) % modulus
+
+    # Python integers, exact or reduced after every product
+    def multiply(a, b):
+        result = a @ b
+        return result % modulus if modulus is not None else result
+
+    count = __power_count__(
+        matrix.astype(object),
+        vector.astype(object),
+        final.astype(object),
+        length,
+        multiply,
+    )
+    return count % modulus if modulus is not None else count
+
+
+# Number of strings of exactly `length` symbols rejected, out of |Σ|ⁿ
+def count_rejected(dfa, length: int, modulus: int = None) -> int:
+    if modulus is None:
+        return len(dfa.alphabet) ** length - count_accepted(dfa, length)
+    total = pow(len(dfa.alphabet), length, modulus)
+    return (total - count_accepted(dfa, length, modulus)) % modulus
+
+
+# Accepted strings in length-lexicographic order, generated lazily
+# Lengths are explored in turn; within one length, a depth-first walk only
+# enters states that can still reach an accepting state in the remaining
+# number of steps, so every string costs O(n·|Σ|) and nothing is wasted
+# on dead branches
+# Stops after the longest string of a finite language, never otherwise
+def accepted_strings(dfa, limit: int = None):
+    table, accepting, initial, symbols = symbol_table(dfa)
+    if limit is not None and limit <= 0:
+        return
+    if not useful_mask(table, accepting, initial)[initial]:
+        return
+    # A finite language has no string longer than its number of states
+    max_length = len(table) if is_finite(dfa) else None
+    rows = table.tolist()
+    num_symbols = len(symbols)
+
+    # alive[r][q]: some accepted string of exactly r symbols leaves q
+    alive_mask = accepting
+    alive = [alive_mask.tolist()]
+    emitted = 0
+    length = 0
+    while max_length is None or length <= max_length:
+        while len(alive) <= length:
+            alive_mask = alive_mask[table].any(axis=1)
+            alive.append(alive_mask.tolist())
+
+        if alive[length][initial]:
+            # One [state, next column to try] frame per symbol of `path`
+            frames = [[initial, 0]]
+            path = []
+            while frames:
+                frame = frames[-1]
+                depth = len(frames) - 1
+                if depth == length:
+                    # Only alive states are entered, so this one accepts
+                    yield "".join(path)
+                    emitted += 1
+                    if limit is not None and emitted >= limit:
+                        return
+                    frames.pop()
+                    if path:
+                        path.pop()
+                    continue
+
+                state, col = frame
+                next_alive = alive[length - depth - 1]
+                while col < num_symbols and not next_alive[rows[state][col]]:
+                    col += 1
+                if col == num_symbols:
+                    frames.pop()
+                    if path:
+                        path.pop()
+                    continue
+                frame[1] = col + 1
+                path.append(symbols[col])
+                frames.append([rows[state][col], 0])
+        length += 1
+
+
+# Shortest, then lexicographically smallest, string leading from the initial
+# state to a state of `targets`, BFS with parent pointers
+# Return form: the string, None if no target state is reachable
+def shortest_to(table: np.ndarray, initial: int, targets: np.ndarray, symbols: tuple):
+    targets = targets.tolist()
+    rows = table.tolist()
+    parents = {initial: None}
+    queue = deque([initial])
+
+    while queue:
+        state = queue.popleft()
+        if targets[state]:
+            path = []
+            while parents[state] is not None:
+                state, col = parents[state]
+                path.append(symbols[col])
+            return "".join(reversed(path))
+        for col, next_state in enumerate(rows[state]):
+            if next_state not in parents:
+                parents[next_state] = (state, col)
+                queue.append(next_state)
+    return None
+
+
+# Return form: the string, None if the language is empty
+def shortest_accepted(dfa):
+    table, accepting, initial, symbols = symbol_table(dfa)
+    return shortest_to(table, initial, accepting, symbols)
+
+
+# Missing transitions lead to the dead state, so these count as rejected too
+# Return form: the string, None if every string is accepted
+def shortest_rejected(dfa):
+    table, accepting, initial, symbols = symbol_table(dfa)
+    return shortest_to(table, initial, ~accepting, symbols)
+
+
+def is_empty(dfa) -> bool:
+    table, accepting, initial, _ = symbol_table(dfa)
+    return not useful_mask(table, accepting, initial)[initial]
+
+
+# Finite iff no cycle runs through the useful states
+# Kahn's algorithm on the useful part: a cycle leaves states unremoved
+def is_finite(dfa) -> bool:
+    table, accepting, initial, _ = symbol_table(dfa)
+    useful = useful_mask(table, accepting, initial)
+    kept = np.flatnonzero(useful)
+    if not len(kept):
+        return True
+
+    edges = table[kept]
+    edge_mask = useful[edges]
+    indegree = np.bincount(edges[edge_mask], minlength=len(table))
+    rows = table.tolist()
+    useful_list = useful.tolist()
+    indegree = indegree.tolist()
+
+    queue = deque(state for state in kept.tolist() if indegree[state] == 0)
+    removed = 0
+    while queue:
+        state = queue.popleft()
+        removed += 1
+        for next_state in rows[state]:
+            if useful_list[next_state]:
+                indegree[next_state] -= 1
+                if indegree[next_state] == 0:
+                    queue.append(next_state)
+    return removed == len(kept)
@@ -0,0 +1,242 @@
+import argparse
+import json
+import sys
+
+# Command-line entry point for batch jobs, without Streamlit
+#   python -m lib.cli minimize dfa.json -o minimal.fadfa
+#   python -m lib.cli validate-corpus dfa.fadfa corpus.txt --workers 4
+#   python -m lib.cli scan dfa.fadfa corpus.txt --overlapping
+#   python -m lib.cli render dfa.json -o dfa.svg
+#   python -m lib.cli convert dfa.json dfa.fadfa
+#   python -m lib.cli serve parity=dfa.fadfa --port 8080
+# DFA files are either the JSON interchange form or the binary format of
+# lib.serialize, told apart by their first bytes
+# Only lib.serialize (and NumPy) is imported up front: pandas is never
+# needed here and graphviz is only loaded by `render`
+
+# Output paths ending in this are written as JSON, anything else as binary
+JSON_SUFFIX = ".json"
+
+
+# Load a DFA from either file format
+# Raise ValueError for files that are neither
+def read_dfa(path) -> "DFA":
+    from lib.serialize import MAGIC, dfa_from_json, load_dfa
+
+    with open(path, "rb") as file:
+        head = file.read(len(MAGIC))
+        if head == MAGIC:
+            return load_dfa(path)
+        text = head + file.read()
+    try:
+        return dfa_from_json(text.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f"{path} is neither a DFA file nor JSON") from None
+
+
+# Write a DFA in the format chosen by `path`, "-" writes JSON to stdout
+def write_dfa(dfa, path) -> None:
+    if path == "-":
+        sys.stdout.write(dfa.to_json(indent=2) + "\n")
+    elif str(path).endswith(JSON_SUFFIX):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(dfa.to_json(indent=2))
+    else:
+        dfa.save(path)
+
+
+def run_minimize(args) -> int:
+    dfa = read_dfa(args.dfa)
+    if args.stats:
+        stats = dfa.enable_stats()
+    minimal = dfa.minimize()
+    write_dfa(minimal, args.output)
+    print(
+        f"{len(dfa.states)} -> {len(minimal.states)} states",
+        file=sys.stderr,
+    )
+    if args.stats:
+        print(stats, file=sys.stderr)
+    return 0
+
+
+# Exit status 1 when any line is rejected, like grep's "no match"
+def run_validate_corpus(args) -> int:
+    dfa = read_dfa(args.dfa)
+    result = dfa.validate_corpus(
+        args.corpus, workers=args.workers, collect_rejected=args.rejected
+    )
+    print(f"accepted {result.accepted}")
+    print(f"rejected {result.rejected}")
+    if args.rejected:
+        for offset in result.rejected_offsets.tolist():
+            print(offset)
+    return 1 if result.rejected else 0
+
+
+# One "start end" line per accepted span, byte offsets into the file
+# Exit status 1 when nothing matches, like grep
+def run_scan(args) -> int:
+    from lib.scan import scan_stream
+
+    dfa = read_dfa(args.dfa)
+    found = 0
+    for starts, ends in scan_stream(dfa, args.file, overlapping=args.overlapping):
+        found += len(starts)
+        if not args.count:
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                print(start, end)
+    if args.count:
+        print(found)
+    return 0 if found else 1
+
+
+def run_render(args) -> int:
+    dfa = read_dfa(args.dfa)
+    if args.source:
+        output = dfa.create_dfa().source
+    elif args.engine is not None:
+        output = dfa.render_svg(engine=args.engine)
+    else:
+        output, description = dfa.render_bounded(time_budget=args.budget)
+        if output is None:
+            print(f"Layout did not finish: {description}", file=sys.stderr)
+            return 1
+        print(description, file=sys.stderr)
+
+    if args.output == "-":
+        sys.stdout.write(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    return 0
+
+
+def run_convert(args) -> int:
+    write_dfa(read_dfa(args.dfa), args.output)
+    return 0
+
+
+# Every DFA is loaded and compiled before the server starts listening
+def run_serve(args) -> int:
+    import asyncio
+
+    from lib.server import serve
+
+    dfas = {}
+    for spec in args.dfas:
+        dfa_id, separator, path = spec.partition("=")
+        if not separator or not dfa_id:
+            raise ValueError(f"Expected ID=PATH, got {spec!r}")
+        dfas[dfa_id] = read_dfa(path)
+        dfas[dfa_id].compile()
+
+    address = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving {', '.join(dfas)} on {address}", file=sys.stderr)
+    try:
+        asyncio.run(
+            serve(
+                dfas,
+                host=args.host,
+                port=args.port,
+                unix=args.unix,
+                window=args.window_ms / 1000,
+                max_batch=args.max_batch,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m lib.cli", description="Work with DFA files in batch"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    minimize = commands.add_parser("minimize", help="Write the minimal DFA")
+    minimize.add_argument("dfa")
+    minimize.add_argument("-o", "--output", default="-")
+    minimize.add_argument(
+        "--stats", action="store_true", help="Print phase timings to stderr"
+    )
+    minimize.set_defaults(run=run_minimize)
+
+    validate = commands.add_parser(
+        "validate-corpus", help="Count accepted and rejected lines of a file"
+    )
+    validate.add_argument("dfa")
+    validate.add_argument("corpus")
+    validate.add_argument("--workers", type=int, default=None)
+    validate.add_argument(
+        "--rejected",
+        action="store_true",
+        help="Also print the byte offset of every rejected line",
+    )
+    validate.set_defaults(run=run_validate_corpus)
+
+    scan = commands.add_parser("scan", help="Find the accepted substrings of a file")
+    scan.add_argument("dfa")
+    scan.add_argument("file")
+    scan.add_argument(
+        "--overlapping",
+        action="store_true",
+        help="Every accepted span instead of leftmost-longest ones",
+    )
+    scan.add_argument("--count", action="store_true", help="Only print the count")
+    scan.set_defaults(run=run_scan)
+
+    render = commands.add_parser("render", help="Draw the DFA as SVG")
+    render.add_argument("dfa")
+    render.add_argument("-o", "--output", default="-")
+    render.add_argument(
+        "--budget",
+        type=float,
+        default=5.0,
+        help="Seconds for layout, large DFAs are drawn with less detail",
+    )
+    render.add_argument(
+        "--engine", default=None, help="Full layout with this Graphviz engine"
+    )
+    render.add_argument(
+        "--source", action="store_true", help="Write DOT source, no layout"
+    )
+    render.set_defaults(run=run_render)
+
+    convert = commands.add_parser(
+        "convert", help="Convert between JSON and the binary format"
+    )
+    convert.add_argument("dfa")
+    convert.add_argument("output")
+    convert.set_defaults(run=run_convert)
+
+    serve = commands.add_parser(
+        "serve", help="Answer validation requests over HTTP, see lib.server"
+    )
+    serve.add_argument("dfas", nargs="+", metavar="ID=PATH")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--unix", default=None, help="Listen on this Unix socket")
+    serve.add_argument(
+        "--window-ms",
+        type=float,
+        default=2.0,
+        help="How long a batch waits for more requests",
+    )
+    serve.add_argument("--max-batch", type=int, default=1 << 14)
+    serve.set_defaults(run=run_serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+from itertools import islice
+
+import numpy as np
+
+# Characters str.strip() removes, restricted to single bytes (latin-1)
+# Bytes input is walked one byte per symbol, i.e. as latin-1 code points
+WHITESPACE_BYTES = bytes(c for c in range(256) if chr(c).isspace())
+
+# Number of strings packed into one buffer by accepts_many()
+BATCH_SIZE = 1 << 16
+
+
+# Integer form of a DFA for hot paths
+# States are interned to rows 0..n-1, row n is an explicit dead state
+# Alphabet symbols are interned to columns 0..k-1, column k catches every
+# symbol outside the alphabet and always leads to the dead state
+class CompiledDFA:
+    def __init__(
+        self,
+        states: tuple,
+        alphabet: tuple,
+        delta: np.ndarray,
+        initial: int,
+        accepting: np.ndarray,
+    ):
+        self.states: tuple = states
+        self.alphabet: tuple = alphabet
+        self.delta: np.ndarray = np.ascontiguousarray(delta, dtype=np.int32)
+        self.initial: int = initial
+        self.accepting: np.ndarray = np.asarray(accepting, dtype=bool)
+        self.dead: int = len(self.delta) - 1
+        self.other: int = self.delta.shape[1] - 1
+
+        # Symbol -> column lookups
+        # Only single characters can ever be matched by DFA.validate()
+        self.symbol_columns: dict = {
+            symbol: col
+            for col, symbol in enumerate(alphabet)
+            if isinstance(symbol, str) and len(symbol) == 1
+        }
+        size = max([256] + [ord(symbol) + 1 for symbol in self.symbol_columns])
+        self.symbol_lut: np.ndarray = np.full(size + 1, self.other, dtype=np.int32)
+        for symbol, col in self.symbol_columns.items():
+            self.symbol_lut[ord(symbol)] = col
+
+        # Plain lists are faster than NumPy scalars for one-symbol-at-a-time walks
+        # Built on first use, large tables are often only walked in lockstep
+        self.__rows__: list = None
+        self.__byte_columns__: list = self.symbol_lut[:256].tolist()
+
+    def __row_lists__(self) -> list:
+        if self.__rows__ is None:
+            self.__rows__ = self.delta.tolist()
+        return self.__rows__
+
+    # Already compiled, so this can stand in for a DFA where only the
+    # compiled form is used (StreamValidator, worker processes)
+    def compile(self) -> "CompiledDFA":
+        return self
+
+    # Map a str (code points) or bytes-like object (bytes) to column indices
+    def columns(self, data) -> np.ndarray:
+        if isinstance(data, str):
+            code_points = np.frombuffer(data.encode("utf-32-le"), dtype=np.uint32)
+            code_points = np.minimum(code_points, len(self.symbol_lut) - 1)
+        else:
+            code_points = np.frombuffer(data, dtype=np.uint8)
+        return self.symbol_lut[code_points]
+
+    # Advance `state` over a sequence of column indices
+    def walk(self, state: int, columns) -> int:
+        rows = self.__row_lists__()
+        dead = self.dead
+        for col in columns:
+            state = rows[state][col]
+            if state == dead:
+                break
+        return state
+
+    # Same verdict as DFA.validate(), without tracing
+    # Bytes are treated as latin-1 text
+    def accepts(self, raw_input) -> bool:
+        rows = self.__row_lists__()
+        dead = self.dead
+        state = self.initial
+        if isinstance(raw_input, str):
+            lookup = self.symbol_columns.get
+            other = self.other
+            for symbol in raw_input.strip():
+                state = rows[state][lookup(symbol, other)]
+                if state == dead:
+                    return False
+        else:
+            byte_columns = self.__byte_columns__
+            for byte in bytes(raw_input).strip(WHITESPACE_BYTES):
+                state = rows[state][byte_columns[byte]]
+                if state == dead:
+                    return False
+        return bool(self.accepting[state])
+
+    # Same verdicts as DFA.validate() for many strings at once
+    # Strings are packed into one offset-indexed buffer and advanced in lockstep:
+    # one fancy-indexed lookup into delta per input position
+    # Return form: boolean array, one verdict per string
+    def accepts_many(self, strings) -> np.ndarray:
+        verdicts = []
+        strings = iter(strings)
+        while True:
+            batch = [raw_input.strip() for raw_input in islice(strings, BATCH_SIZE)]
+            if not batch:
+                break
+            verdicts.append(self.__accepts_batch__(batch))
+        if not verdicts:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate(verdicts)
+
+    # Lockstep walk over one batch of already stripped strings
+    def __accepts_batch__(self, batch: list) -> np.ndarray:
+        lengths = np.fromiter(map(len, batch), dtype=np.int64, count=len(batch))
+        offsets = np.cumsum(lengths) - lengths
+        states = self.walk_many(self.columns("".join(batch)), offsets, lengths)
+        return self.accepting[states]
+
+    # Advance many spans of one column buffer in lockstep from the initial state
+    # Span i covers columns[offsets[i] : offsets[i] + lengths[i]]
+    # Return form: array of final states, one per span
+    def walk_many(
+        self, columns: np.ndarray, offsets: np.ndarray, lengths: np.ndarray
+    ) -> np.ndarray:
+        # Longest spans first, so the unfinished ones are always a prefix
+        order = np.argsort(-lengths, kind="stable")
+        sorted_lengths = lengths[order]
+        positions = offsets[order]
+        max_length = int(sorted_lengths[0]) if len(lengths) else 0
+        active_counts = np.searchsorted(
+            -sorted_lengths, -np.arange(max_length), side="left"
+        ).tolist()
+
+        states = np.full(len(lengths), self.initial, dtype=np.int32)
+        for step, count in enumerate(active_counts):
+            active = states[:count]
+            states[:count] = self.delta[active, columns[positions[:count] + step]]
+
+        final_states = np.empty(len(lengths), dtype=np.int32)
+        final_states[order] = states
+        return final_states
+
+
+# Build the integer form of a DFA
+# Missing transitions and unknown symbols lead to the dead state
+def compile_dfa(dfa) -> CompiledDFA:
+    from lib.serialize import MISSING, StateNames, integer_table
+
+    # Lazy state names from load_dfa() are kept as they are
+    states = dfa.states if isinstance(dfa.states, StateNames) else tuple(dfa.states)
+    alphabet = tuple(dfa.alphabet)
+    table, final_mask = integer_table(dfa.states, alphabet, dfa.final_states, dfa.rules)
+    num_states = len(table)
+    dead = num_states
+
+    delta = np.full((num_states + 1, len(alphabet) + 1), dead, dtype=np.int32)
+    delta[:num_states, : len(alphabet)] = np.where(table == MISSING, dead, table)
+
+    accepting = np.zeros(num_states + 1, dtype=bool)
+    accepting[:num_states] = final_mask
+
+    return CompiledDFA(
+        states=states,
+        alphabet=alphabet,
+        delta=delta,
+        initial=states.index(dfa.initial_state),
+        accepting=accepting,
+    )
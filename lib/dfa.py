@@ -1,153 +1,220 @@
-import pandas as pd
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+from contextlib import nullcontext
+from types import MappingProxyType
+
 import numpy as np
-from graphviz import Digraph
 
+# pandas and graphviz are imported where tables and graphs are built, so
+# that validation-only users (lib.cli, batch jobs) don't pay for them
+
+
+# Path of the last validate() call, shown by create_dfa(validation_trace=True)
+class Trace:
+    __slots__ = ("input_str", "states", "rules")
+
+    def __init__(self, input_str: str, initial_state: str):
+        self.input_str: str = input_str
+        # Visited states in order of first visit, and the transitions taken
+        self.states: list = [initial_state]
+        self.rules: dict = {}
+
+
+# Components of the DFA left by trim(), remove_inaccessible_states() or
+# reduce(), turned into a DFA by get_reduced_dfa()
+class Reduction:
+    __slots__ = ("states", "initial_state", "final_states", "rules")
 
-# Encompass properties and interactions with a DFA
-class DFA:
     def __init__(
-        self,
-        alphabet: tuple,
-        states: tuple,
-        initial_state: str,
-        final_states: tuple,
-        rules: dict,
+        self, states: tuple, initial_state: str, final_states: tuple, rules: dict
     ):
-        self.alphabet: tuple = alphabet
         self.states: tuple = states
         self.initial_state: str = initial_state
         self.final_states: tuple = final_states
-        self.rules: dict = rules
-
-        # Internal attributes
-        self.__reduced_states__: list = list()
-        self.__reduced_initial_state__: str = str()
-        self.__reduced_final_states__: list = list()
-        self.__reduced_rules__: dict = dict()
-
-        self.__traced_states__: list = []
-        self.__traced_rules__: dict = {}
-        self.__input_str__: str = ""
-        self.__reduction_df__: pd.DataFrame = pd.DataFrame()
-
-        # Graphviz elements' style attributes
-        # Stylistic choices mimic what's shown on lecturer's slides
-        self.default_state_attrs = {
-            "shape": "circle",
-            "fontname": "Times-Roman",
-            "fontsize": "12",
-            "style": "filled",
-            "fillcolor": "white",
-            "fontcolor": "red",
-            "color": "black",
-        }
-        self.traced_default_state_attrs = {
+        # Handed to every reduced DFA as is, see DFA.__init__()
+        self.rules: Mapping = MappingProxyType(rules)
+
+
+# Encompass properties and interactions with a DFA
+# The five components are fixed at construction, everything else is derived
+# lazily into separate objects: the trace of the last validation, the
+# reduction table and components, the compiled table and the graph template
+# (cached per structure by lib.render)
+class DFA:
+    __slots__ = (
+        "alphabet",
+        "states",
+        "initial_state",
+        "final_states",
+        "rules",
+        "__trace__",
+        "__reduction__",
+        "__reduction_table__",
+        "__compiled__",
+        "__key__",
+        "__stats__",
+    )
+
+    # Components that can't be reassigned once set, see __setattr__()
+    # Cached derived objects (compiled table, structure key) rely on it
+    FROZEN = frozenset(("alphabet", "states", "initial_state", "final_states", "rules"))
+
+    # Graphviz elements' style attributes, shared by every DFA and read-only
+    # Stylistic choices mimic what's shown on lecturer's slides
+    default_state_attrs = MappingProxyType(
+        {
             "shape": "circle",
             "fontname": "Times-Roman",
             "fontsize": "12",
             "style": "filled",
             "fillcolor": "white",
             "fontcolor": "red",
-            "color": "red",
-        }
-        self.final_state_attrs = {
-            "shape": "doublecircle",
-            "fontname": "Times-Roman",
-            "fontsize": "10",
-            "style": "filled",
-            "fillcolor": "white",
-            "fontcolor": "red",
             "color": "black",
         }
-        self.traced_final_state_attrs = {
-            "shape": "doublecircle",
-            "fontname": "Times-Roman",
-            "fontsize": "10",
-            "style": "filled",
-            "fillcolor": "white",
-            "fontcolor": "red",
-            "color": "red",
-        }
-        self.edge_attrs = {
+    )
+    traced_default_state_attrs = MappingProxyType(
+        dict(default_state_attrs, color="red")
+    )
+    final_state_attrs = MappingProxyType(
+        dict(default_state_attrs, shape="doublecircle", fontsize="10")
+    )
+    traced_final_state_attrs = MappingProxyType(dict(final_state_attrs, color="red"))
+    edge_attrs = MappingProxyType(
+        {
             "fontname": "Times-Roman",
             "fontsize": "16",
             "fontcolor": "blue",
             "color": "black",
             "penwidth": "1.0",
         }
-        self.traced_edge_attrs = {
-            "fontname": "Times-Roman",
-            "fontsize": "16",
-            "fontcolor": "blue",
-            "color": "red",
-            "penwidth": "1.0",
-        }
+    )
+    traced_edge_attrs = MappingProxyType(dict(edge_attrs, color="red"))
+
+    def __init__(
+        self,
+        alphabet: tuple,
+        states: tuple,
+        initial_state: str,
+        final_states: tuple,
+        rules: dict,
+    ):
+        self.alphabet: tuple = alphabet
+        self.states: tuple = states
+        self.initial_state: str = initial_state
+        self.final_states: tuple = final_states
+        # Mutable rules are copied behind a read-only view, so the caller's
+        # dict can't change a frozen DFA either
+        # Read-only mappings (MappingProxyType, TableRules) are kept as they
+        # are: builders in lib hand over a view of a dict nobody else holds
+        if isinstance(rules, MutableMapping):
+            rules = MappingProxyType(dict(rules))
+        self.rules: Mapping = rules
+
+        # Derived objects, built on first use
+        self.__trace__: Trace = None
+        self.__reduction__: Reduction = None
+        # Packed triangle of distinguishable pairs, filled by mark()
+        self.__reduction_table__: np.ndarray = None
+        self.__compiled__ = None
+        self.__key__ = None
+        # PipelineStats while instrumentation is enabled, see enable_stats()
+        self.__stats__ = None
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in DFA.FROZEN and hasattr(self, name):
+            raise AttributeError(f"DFA.{name} can't be changed, build a new DFA")
+        object.__setattr__(self, name, value)
+
+    # Shallow copy sharing the components and derived objects
+    # validate() replaces the trace, so copies can be validated on their own
+    def __copy__(self) -> "DFA":
+        clone = object.__new__(type(self))
+        for name in DFA.__slots__:
+            object.__setattr__(clone, name, getattr(self, name))
+        return clone
+
+    # Read-only views can't be pickled, their rules travel as a plain dict
+    def __getstate__(self) -> dict:
+        state = {name: getattr(self, name) for name in DFA.__slots__}
+        if isinstance(self.rules, MappingProxyType):
+            state["rules"] = dict(self.rules)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        if isinstance(state["rules"], MutableMapping):
+            state["rules"] = MappingProxyType(state["rules"])
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    # Visited states and taken transitions of the last validate() call
+    @property
+    def __traced_states__(self) -> list:
+        return self.__trace__.states if self.__trace__ is not None else []
+
+    @property
+    def __traced_rules__(self) -> dict:
+        return self.__trace__.rules if self.__trace__ is not None else {}
 
     # Create a graph object render-able by st.graphviz()
-    def create_dfa(self, validation_trace=False) -> Digraph:
-        dfa = Digraph("DFA")
-        dfa.attr(rankdir="LR", size="8.5")
-
-        # Start node (invisible) to create an initial state's input edge
-        dfa.attr("node", shape="none", height="0", width="0")
-        dfa.node("", label="")
-
-        # Add states
-        for state in self.states:
-            # Unpack attribute dict
-            # Choose color based on mode (normal/tracing)
-            if state in self.final_states:
-                if validation_trace and state in self.__traced_states__:
-                    dfa.attr("node", **self.traced_final_state_attrs)
-                else:
-                    dfa.attr("node", **self.final_state_attrs)
-            else:
-                if validation_trace and state in self.__traced_states__:
-                    dfa.attr("node", **self.traced_default_state_attrs)
-                else:
-                    dfa.attr("node", **self.default_state_attrs)
-            dfa.node(str(state))
-
-        # Apply color based on mode (normal/tracing)
-        if validation_trace:
-            dfa.attr("edge", **self.traced_edge_attrs)
-        else:
-            dfa.attr("edge", **self.edge_attrs)
-        # Add start arrow
-        dfa.edge("", str(self.initial_state), arrowsize="1")
-
-        # Group transitions
-        grouped_transitions = {}
-        for (state, symbol), next_state in self.rules.items():
-            key = (state, next_state)
-            if key not in grouped_transitions:
-                grouped_transitions[key] = []
-            grouped_transitions[key].append(symbol)
-
-        # Add edges
-        dfa.attr("edge", **self.edge_attrs)
-        for (src, dst), symbols in grouped_transitions.items():
-            # Sort and join symbols
-            if len(symbols) == 1:
-                label = symbols[0]
-            else:
-                label = ", ".join(sorted(symbols))
+    # The DOT statements are cached per DFA structure, tracing only swaps
+    # the statements of the traced nodes and edges
+    def create_dfa(self, validation_trace=False) -> "Digraph":
+        from lib.render import get_template
+
+        with self.__phase__("create_dfa"):
+            template = get_template(self)
+            if validation_trace:
+                return template.graph(self.__traced_states__, self.__traced_rules__)
+            return template.graph()
+
+    # Laid-out SVG, layout runs once per structure and engine
+    # Tracing only recolours the cached SVG
+    def render_svg(self, validation_trace=False, engine: str = "dot") -> str:
+        from lib.render import render_svg
+
+        return render_svg(self, validation_trace=validation_trace, engine=engine)
+
+    # SVG within a time budget, with less detail for large DFAs
+    # Return form: (svg, description of what is shown), svg is None on timeout
+    def render_bounded(self, validation_trace=False, time_budget: float = 5.0) -> tuple:
+        from lib.render import render_bounded
+
+        return render_bounded(
+            self, validation_trace=validation_trace, time_budget=time_budget
+        )
 
-            # Apply color based on mode (normal/tracing)
-            if validation_trace and any(
-                (src, symbol) in self.__traced_rules__ for symbol in symbols
-            ):
-                dfa.attr("edge", **self.traced_edge_attrs)
-            else:
-                dfa.attr("edge", **self.edge_attrs)
+    # Structural hash used as cache key, computed once per object
+    # Rules are not expected to change after construction
+    def __structure_key__(self) -> str:
+        if self.__key__ is None:
+            from lib.render import structure_key
 
-            # Style self-loops differently
-            if src == dst:
-                dfa.edge(str(src), str(dst), label=label, constraint="false")
-            else:
-                dfa.edge(str(src), str(dst), label=label)
+            self.__key__ = structure_key(self)
+        return self.__key__
+
+    # Record per-phase timings and counters of this DFA and the DFAs derived
+    # from it; pass `stats` to keep recording into an existing object
+    # Disabled by default, a disabled DFA only pays for one `is None` check
+    def enable_stats(self, stats=None, trace_memory: bool = False) -> "PipelineStats":
+        if stats is None:
+            from lib.stats import PipelineStats
+
+            stats = PipelineStats(trace_memory=trace_memory)
+        self.__stats__ = stats
+        return stats
+
+    def disable_stats(self) -> None:
+        self.__stats__ = None
 
-        return dfa
+    # Return form: PipelineStats, None while instrumentation is disabled
+    def get_stats(self) -> "PipelineStats":
+        return self.__stats__
+
+    # Context timing one phase of the pipeline, a no-op while disabled
+    def __phase__(self, name: str):
+        if self.__stats__ is None:
+            return nullcontext()
+        return self.__stats__.phase(name)
 
     # Check if input string is syntactically correct
     # Does not check whether string is accepted / rejected
@@ -160,12 +227,9 @@ class DFA:
 
     # Validate string against DFA
     def validate(self, input: str) -> bool:
-        # Reset internal attrs
-        self.__traced_states__ = [
-            self.initial_state,
-        ]
-        self.__traced_rules__ = {}
-        self.__input_str__ = input
+        # A new trace per call, copies of this DFA keep their own
+        trace = Trace(input, self.initial_state)
+        self.__trace__ = trace
 
         # Check syntax
         if not self.check_syntax(input):
@@ -173,129 +237,302 @@ class DFA:
 
         # Process input
         current_state = self.initial_state
-        input_str = input.strip()
-
-        if input_str:
-            for symbol in input_str:
-                # Update on valid transition
-                if (current_state, symbol) in self.rules:
-
-                    # Add states and rules to traced collections
-                    if current_state not in self.__traced_states__:
-                        self.__traced_states__.append(current_state)
-                    if (
-                        self.rules[(current_state, symbol)]
-                        not in self.__traced_states__
-                    ):
-                        self.__traced_states__.append(
-                            self.rules[(current_state, symbol)]
-                        )
-                    if (current_state, symbol) not in self.__traced_rules__:
-                        self.__traced_rules__[(current_state, symbol)] = self.rules[
-                            (current_state, symbol)
-                        ]
-
-                    current_state = self.rules[(current_state, symbol)]
-
-                # Reject otherwise
-                else:
-                    return False
+        traced_states = {self.initial_state}
+
+        symbols = input.strip()
+        if self.__stats__ is not None:
+            self.__stats__.count("validations")
+            symbols = self.__stats__.counted(symbols, "transitions_walked")
+
+        for symbol in symbols:
+            # Reject on missing transition
+            next_state = self.rules.get((current_state, symbol))
+            if next_state is None:
+                return False
+
+            # Add states and rules to traced collections
+            if next_state not in traced_states:
+                traced_states.add(next_state)
+                trace.states.append(next_state)
+            if (current_state, symbol) not in trace.rules:
+                trace.rules[(current_state, symbol)] = next_state
+
+            current_state = next_state
 
         # Check if the resulting state is one of the final states
         return current_state in self.final_states
 
+    # Integer transition table for hot paths, built once per object
+    # Rules are not expected to change after construction
+    def compile(self) -> "CompiledDFA":
+        if self.__compiled__ is None:
+            from lib.compiled import compile_dfa
+
+            self.__compiled__ = compile_dfa(self)
+        return self.__compiled__
+
+    # Same verdict as validate(), without tracing or a separate syntax check
+    def accepts(self, input: str) -> bool:
+        return self.compile().accepts(input)
+
+    # Validate many strings at once, same verdicts as validate()
+    # Return form: NumPy boolean array, one verdict per string
+    def validate_many(self, strings) -> np.ndarray:
+        return self.compile().accepts_many(strings)
+
+    # Chunked validator keeping the current state across feed() calls
+    # lines=True gives one verdict per "\n"-terminated line
+    def stream(self, lines: bool = False) -> "StreamValidator":
+        from lib.stream import StreamValidator
+
+        return StreamValidator(self, lines=lines)
+
+    # Accepted substrings of a text / buffer, in one pass
+    # overlapping=False: leftmost-longest, non-overlapping spans
+    # overlapping=True: every accepted span
+    # Return form: (starts, ends) int64 arrays, text[start:end] is accepted
+    def scan(self, data, overlapping: bool = False) -> tuple:
+        from lib.scan import scan
+
+        return scan(self, data, overlapping=overlapping)
+
+    # Chunked scanner with the same spans as scan(), see lib.scan.Scanner
+    def scanner(self, overlapping: bool = False) -> "Scanner":
+        from lib.scan import Scanner
+
+        return Scanner(self, overlapping=overlapping)
+
+    # Validate every line of a file across worker processes
+    # Same counts as calling validate() on each line in order
+    def validate_corpus(
+        self, path, workers: int = None, collect_rejected: bool = False
+    ) -> "CorpusResult":
+        from lib.parallel import validate_corpus
+
+        return validate_corpus(
+            self, path, workers=workers, collect_rejected=collect_rejected
+        )
+
+    # Product automata, built over the state pairs reachable from both
+    # initial states; the alphabet is the union of both alphabets
+    # lazy=True gives a LazyProduct that only expands pairs during validate()
+    def intersection(self, other: "DFA", lazy: bool = False) -> "DFA":
+        return self.__product__(other, "intersection", lazy)
+
+    def union(self, other: "DFA", lazy: bool = False) -> "DFA":
+        return self.__product__(other, "union", lazy)
+
+    def difference(self, other: "DFA", lazy: bool = False) -> "DFA":
+        return self.__product__(other, "difference", lazy)
+
+    def symmetric_difference(self, other: "DFA", lazy: bool = False) -> "DFA":
+        return self.__product__(other, "symmetric_difference", lazy)
+
+    def __product__(self, other: "DFA", operation: str, lazy: bool):
+        from lib.product import LazyProduct, product
+
+        if lazy:
+            return LazyProduct(self, other, operation)
+        return product(self, other, operation)
+
+    # Same language as `other`, without minimizing either automaton
+    # Return form: LanguageCheck, truthy if equivalent, with a shortest
+    # counterexample otherwise
+    def equivalent(self, other: "DFA") -> "LanguageCheck":
+        from lib.equivalence import equivalent
+
+        return equivalent(self, other)
+
+    # Every string accepted by `other` is accepted by this DFA
+    # Return form: LanguageCheck, the counterexample is accepted by `other` only
+    def includes(self, other: "DFA") -> "LanguageCheck":
+        from lib.equivalence import includes
+
+        return includes(self, other)
+
+    # Number of strings of exactly `length` symbols accepted, see lib.analytics
+    # Exact by default, or modulo `modulus`
+    def count_accepted(self, length: int, modulus: int = None) -> int:
+        from lib.analytics import count_accepted
+
+        return count_accepted(self, length, modulus)
+
+    def count_rejected(self, length: int, modulus: int = None) -> int:
+        from lib.analytics import count_rejected
+
+        return count_rejected(self, length, modulus)
+
+    # Lazy generator of accepted strings in length-lexicographic order
+    # `limit` stops it after that many strings
+    def accepted_strings(self, limit: int = None):
+        from lib.analytics import accepted_strings
+
+        return accepted_strings(self, limit)
+
+    # Return form: shortest (then smallest) accepted string, None if none
+    def shortest_accepted(self):
+        from lib.analytics import shortest_accepted
+
+        return shortest_accepted(self)
+
+    # Return form: shortest (then smallest) rejected string, None if none
+    def shortest_rejected(self):
+        from lib.analytics import shortest_rejected
+
+        return shortest_rejected(self)
+
+    def is_empty(self) -> bool:
+        from lib.analytics import is_empty
+
+        return is_empty(self)
+
+    def is_finite(self) -> bool:
+        from lib.analytics import is_finite
+
+        return is_finite(self)
+
+    # Write to the compact binary format of lib.serialize
+    # lib.serialize.load_dfa() maps it back without rebuilding the rules dict
+    def save(self, path) -> None:
+        from lib.serialize import save_dfa
+
+        save_dfa(self, path)
+
+    # JSON interchange form, read back with lib.serialize.dfa_from_json()
+    def to_json(self, indent: int = None) -> str:
+        from lib.serialize import dfa_to_json
+
+        return dfa_to_json(self, indent=indent)
+
+    # Packed triangle filled by mark(), empty before the first call
+    def __marked_pairs__(self) -> np.ndarray:
+        if self.__reduction_table__ is None:
+            return np.zeros(0, dtype=bool)
+        return self.__reduction_table__
+
     # Get all unmarked cells
     # Return form: [(row_0, col_0), (row_1, label_1), ...]
     def __fetch_zero_cells__(self) -> list:
-        # Get row and column labels of all unmarked cells
-        zero_positions = np.where(self.__reduction_df__ == 0)
-        row_indices = zero_positions[0]
-        col_indices = zero_positions[1]
-        row_labels = [self.__reduction_df__.index[i] for i in row_indices]
-        col_labels = [self.__reduction_df__.columns[i] for i in col_indices]
+        from lib.minimize import pair_labels
+
+        # Pairs of real states come first in the triangle, the sink (if any) last
+        num_states = len(self.states)
+        num_pairs = num_states * (num_states - 1) // 2
+        zero_positions = np.flatnonzero(~self.__marked_pairs__()[:num_pairs])
+        row_indices, col_indices = pair_labels(zero_positions, num_states)
+        row_labels = [self.states[i] for i in row_indices.tolist()]
+        col_labels = [self.states[i] for i in col_indices.tolist()]
         zero_cells = list(zip(row_labels, col_labels))
         return zero_cells
 
-    # Set up all (p,q) pairs before mark()
-    def __construct_df__(self) -> None:
-        self.__reduction_df__ = pd.DataFrame(
-            pd.NA, index=self.states, columns=self.states
-        )
+    # Distinguishability table as a DataFrame, only built for display
+    # Lower half holds 1 (marked) / 0 (unmarked), the rest is pd.NA
+    def get_reduction_df(self) -> "pd.DataFrame":
+        import pandas as pd
 
-        # Set up half-matrix for Myhill-Nerode algorithm / mark()
-        for i, col in enumerate(self.__reduction_df__.columns):
-            self.__reduction_df__.iloc[i, :i] = 0
+        num_states = len(self.states)
+        num_pairs = num_states * (num_states - 1) // 2
+        marked = self.__marked_pairs__()
+        if len(marked) < num_pairs:
+            return pd.DataFrame()
 
-        # Set up initial marked cells from F and !F sets
-        zero_cells = self.__fetch_zero_cells__()
-
-        for cell in zero_cells:
-            # Both labels should return different statuses
-            if (cell[0] in self.final_states) != (cell[1] in self.final_states):
-                if self.__reduction_df__.loc[cell[0], cell[1]] == None:
-                    self.__reduction_df__.loc[cell[1], cell[0]] = 1
-                else:
-                    self.__reduction_df__.loc[cell[0], cell[1]] = 1
-        return self.__reduction_df__
+        cells = np.full((num_states, num_states), pd.NA, dtype=object)
+        rows, cols = np.tril_indices(num_states, -1)
+        cells[rows, cols] = marked[:num_pairs].astype(int)
+        return pd.DataFrame(cells, index=self.states, columns=self.states)
 
     # Myhill-Nerode algorithm, first part
+    # Marks are propagated backwards from each newly marked pair only
     def mark(self) -> None:
-        self.__construct_df__()
-
-        changed = True
-        while changed:
-            changed = False
-            zero_cells = self.__fetch_zero_cells__()
-
-            for cell in zero_cells:
-                for symbol in self.alphabet:
-                    move_0 = self.rules[(cell[0], symbol)]
-                    move_1 = self.rules[(cell[1], symbol)]
-
-                    # Get the value for the destination pair
-                    dest_value = None
-                    if not pd.isna(self.__reduction_df__.loc[move_0, move_1]):
-                        dest_value = self.__reduction_df__.loc[move_0, move_1]
-                    elif not pd.isna(self.__reduction_df__.loc[move_1, move_0]):
-                        dest_value = self.__reduction_df__.loc[move_1, move_0]
-
-                    # If destination pair is distinguishable, mark current pair
-                    if dest_value == 1:
-                        self.__reduction_df__.loc[cell[0], cell[1]] = 1
-                        changed = True
-                        break  # No need to check other symbols
+        from lib.minimize import index_table, fill_table
+
+        with self.__phase__("index_table"):
+            _, table, final_mask = index_table(
+                self.states,
+                self.alphabet,
+                self.initial_state,
+                self.final_states,
+                self.rules,
+            )
+        with self.__phase__("fill_table"):
+            self.__reduction_table__, iterations = fill_table(
+                table, final_mask, stats=self.__stats__
+            )
+
+        if self.__stats__ is not None:
+            self.__stats__.count("mark_iterations", iterations)
+            self.__stats__.count("cells_marked", int(self.__reduction_table__.sum()))
 
     # Myhill-Nerode algorithm, second part
     # Consecutive and explicit calls to mark() and reduce() are required
     # This is to comply with the expectation of the exercise
     def reduce(self) -> None:
-        zero_cells = self.__fetch_zero_cells__()
-
-        equi_classes = {state: {state} for state in self.states}
-
-        # Merge classes based on unmarked pairs
-        for s1, s2 in zero_cells:
-            # Find the representatives of each class
-            rep1 = None
-            rep2 = None
-            for rep, cls in equi_classes.items():
-                if s1 in cls:
-                    rep1 = rep
-                if s2 in cls:
-                    rep2 = rep
-                if rep1 and rep2:
-                    break
-
-            # If states are in different classes, merge them
-            if rep1 != rep2:
-                equi_classes[rep1].update(equi_classes[rep2])
-                del equi_classes[rep2]
+        from lib.minimize import DisjointSet, pair_labels
+
+        with self.__phase__("union_classes"):
+            num_states = len(self.states)
+            num_pairs = num_states * (num_states - 1) // 2
+            zero_positions = np.flatnonzero(~self.__marked_pairs__()[:num_pairs])
+            rows, cols = pair_labels(zero_positions, num_states)
+
+            # Unmarked pairs form an equivalence, so each row only needs to be
+            # joined with its first unmarked column
+            rows, first_cells = np.unique(rows, return_index=True)
+            cols = cols[first_cells]
+
+            # Merge classes based on unmarked pairs
+            equi_classes = DisjointSet(num_states)
+            for s1, s2 in zip(rows.tolist(), cols.tolist()):
+                equi_classes.union(s1, s2)
+
+            # Collect class members in state order
+            members = {}
+            for i, state in enumerate(self.states):
+                members.setdefault(equi_classes.find(i), []).append(state)
+
+        with self.__phase__("merge_states"):
+            self.__reduction__ = Reduction(
+                *self.__merge_states__(list(members.values()))
+            )
+
+    # Name merged states and map F and δ onto them, in one linear pass
+    # Return form: (states, initial_state, final_states, rules)
+    def __merge_states__(self, classes: list) -> tuple:
+        new_states, state_mapping = self.__merged_names__(classes)
 
+        # Generate reduced transition rules
+        new_rules = {}
+        for (state, symbol), next_state in self.rules.items():
+            # Only add one transition per new state-symbol pair
+            if state in state_mapping and next_state in state_mapping:
+                new_key = (state_mapping[state], symbol)
+                if new_key not in new_rules:
+                    new_rules[new_key] = state_mapping[next_state]
+
+        return (
+            new_states,
+            state_mapping[self.initial_state],
+            self.__merged_final_states__(state_mapping),
+            new_rules,
+        )
+
+    # `classes` lists the members of each class in state order,
+    # classes are kept in the order of their last member
+    # Return form: (states, {old state: new state})
+    def __merged_names__(self, classes: list) -> tuple:
         state_mapping = {}
         new_states = []
 
-        for rep, states_set in equi_classes.items():
-            states_list = sorted(list(states_set))
+        # Bucket classes by their last member's position, no sorting needed
+        positions = {state: i for i, state in enumerate(self.states)}
+        ordered_classes = [None] * len(self.states)
+        for states_list in classes:
+            ordered_classes[positions[states_list[-1]]] = states_list
+
+        for states_list in ordered_classes:
+            if states_list is None:
+                continue
+            states_list = sorted(states_list)
             if len(states_list) > 1:
                 new_state_name = ", ".join(states_list)
             else:
@@ -303,78 +540,241 @@ class DFA:
             new_states.append(new_state_name)
             for old_state in states_list:
                 state_mapping[old_state] = new_state_name
-
-        # Generate reduced DFA components
-        self.__reduced_states__ = new_states
-        self.__reduced_initial_state__ = state_mapping[self.initial_state]
-        self.__reduced_final_states__ = []
-
-        # Map final states to their new names
-        for final_state in self.final_states:
-            if state_mapping[final_state] not in self.__reduced_final_states__:
-                self.__reduced_final_states__.append(state_mapping[final_state])
-
-        # Generate reduced transition rules
-        self.__reduced_rules__ = {}
-        for (state, symbol), next_state in self.rules.items():
-            # Only add one transition per new state-symbol pair
-            new_key = (state_mapping[state], symbol)
-            if new_key not in self.__reduced_rules__:
-                self.__reduced_rules__[new_key] = state_mapping[next_state]
+        return tuple(new_states), state_mapping
+
+    # Map final states to their new names, in order of first appearance
+    def __merged_final_states__(self, state_mapping: dict) -> tuple:
+        return tuple(
+            dict.fromkeys(
+                state_mapping[final_state]
+                for final_state in self.final_states
+                if final_state in state_mapping
+            )
+        )
 
     # Get a new object updated with new params
+    # The alphabet and the reduced components are shared, not copied
+    # Raise ValueError if nothing has been reduced yet
     def get_reduced_dfa(self) -> "DFA":
+        reduction = self.__reduction__
+        if reduction is None:
+            raise ValueError(
+                "Nothing to build yet, call trim(), "
+                "remove_inaccessible_states() or reduce() first"
+            )
         reduced_dfa = DFA(
             alphabet=self.alphabet,
-            states=tuple(self.__reduced_states__),
-            initial_state=self.__reduced_initial_state__,
-            final_states=tuple(self.__reduced_final_states__),
-            rules=self.__reduced_rules__,
+            states=reduction.states,
+            initial_state=reduction.initial_state,
+            final_states=reduction.final_states,
+            rules=reduction.rules,
         )
+        # Derived objects keep recording into the same stats
+        reduced_dfa.__stats__ = self.__stats__
         return reduced_dfa
 
-    def remove_inaccessible_states(self) -> None:
-        # Find accessible states with BFS
-        accessible = set()
-        queue = [self.initial_state]
+    # Find states reachable from the initial state with BFS, O(|Q|·|Σ|)
+    def __accessible_states__(self) -> set:
+        accessible = {self.initial_state}
+        queue = deque([self.initial_state])
 
         while queue:
-            current = queue.pop(0)
-            if current not in accessible:
-                accessible.add(current)
-                # Add all states reachable from current state
-                for symbol in self.alphabet:
-                    if (current, symbol) in self.rules:
-                        next_state = self.rules[(current, symbol)]
-                        if next_state not in accessible:
-                            queue.append(next_state)
-
-        # Identify inaccessible states
-        inaccessible = set()
-        for state in self.states:
-            if state not in accessible:
-                inaccessible.add(state)
-
-        if not inaccessible:
-            return
-
-        # Create new components without inaccessible states
-        self.__reduced_states__ = list(accessible)
-        self.__reduced_initial_state__ = self.initial_state
-        self.__reduced_final_states__ = []
-        for state in self.final_states:
-            if state in accessible:
-                self.__reduced_final_states__.append(state)
-
-        # Keep only transitions between accessible states
-        self.__reduced_rules__ = {}
-        for key, next_state in self.rules.items():
-            state, symbol = key
-            if state in accessible and next_state in accessible:
-                self.__reduced_rules__[(state, symbol)] = next_state
+            current = queue.popleft()
+            # Add all states reachable from current state
+            for symbol in self.alphabet:
+                next_state = self.rules.get((current, symbol))
+                if next_state is not None and next_state not in accessible:
+                    accessible.add(next_state)
+                    queue.append(next_state)
+        return accessible
+
+    # Find states that can reach a final state with a backwards BFS, O(|Q|·|Σ|)
+    def __coaccessible_states__(self) -> set:
+        predecessors = {}
+        for (state, symbol), next_state in self.rules.items():
+            if symbol in self.alphabet:
+                predecessors.setdefault(next_state, []).append(state)
+
+        coaccessible = set(self.final_states)
+        queue = deque(self.final_states)
+
+        while queue:
+            current = queue.popleft()
+            for prev_state in predecessors.get(current, ()):
+                if prev_state not in coaccessible:
+                    coaccessible.add(prev_state)
+                    queue.append(prev_state)
+        return coaccessible
+
+    # Always leaves a consistent DFA in the reduced components,
+    # even when nothing is removed
+    def remove_inaccessible_states(self) -> None:
+        with self.__phase__("remove_inaccessible_states"):
+            accessible = self.__accessible_states__()
+
+            # Create new components without inaccessible states
+            # Keep the original state order so reduce() names states deterministically
+            new_states = tuple(state for state in self.states if state in accessible)
+            new_final_states = tuple(
+                state for state in self.final_states if state in accessible
+            )
+
+            # Keep only transitions between accessible states
+            new_rules = {}
+            for key, next_state in self.rules.items():
+                state, symbol = key
+                if state in accessible and next_state in accessible:
+                    new_rules[(state, symbol)] = next_state
+
+            self.__reduction__ = Reduction(
+                new_states, self.initial_state, new_final_states, new_rules
+            )
+
+    # Remove inaccessible states and merge all dead states (accessible, but
+    # unable to reach a final state) into a single sink
+    # The sink is named and placed the way reduce() would name and place the
+    # class of dead states, so minimizing afterwards gives the same DFA
+    def trim(self) -> None:
+        with self.__phase__("trim"):
+            accessible = self.__accessible_states__()
+            coaccessible = self.__coaccessible_states__()
+
+            dead = [
+                state
+                for state in self.states
+                if state in accessible and state not in coaccessible
+            ]
+            if dead:
+                sink = ", ".join(sorted(dead)) if len(dead) > 1 else dead[0]
+
+            # Keep the original state order, the sink takes the last dead state's spot
+            state_mapping = {}
+            new_states = []
+            for state in self.states:
+                if state not in accessible:
+                    continue
+                if state in coaccessible:
+                    state_mapping[state] = state
+                    new_states.append(state)
+                else:
+                    state_mapping[state] = sink
+                    if state == dead[-1]:
+                        new_states.append(sink)
+
+            new_final_states = tuple(
+                state for state in self.final_states if state in accessible
+            )
+
+            # Keep one transition per (state, symbol), redirected to the sink
+            new_rules = {}
+            for (state, symbol), next_state in self.rules.items():
+                if state in state_mapping and next_state in state_mapping:
+                    new_key = (state_mapping[state], symbol)
+                    if new_key not in new_rules:
+                        new_rules[new_key] = state_mapping[next_state]
+
+            self.__reduction__ = Reduction(
+                tuple(new_states),
+                state_mapping[self.initial_state],
+                new_final_states,
+                new_rules,
+            )
+
+    # Minimize in one call, without going through the reduction table
+    # "hopcroft": partition refinement over an integer transition table
+    # "table": remove_inaccessible_states() -> mark() -> reduce()
+    # Both engines name merged states the same way reduce() does
+    def minimize(self, engine: str = "hopcroft") -> "DFA":
+        if engine == "table":
+            self.remove_inaccessible_states()
+            accessible_dfa = self.get_reduced_dfa()
+            accessible_dfa.mark()
+            accessible_dfa.reduce()
+            return accessible_dfa.get_reduced_dfa()
+        if engine != "hopcroft":
+            raise ValueError(f"Unknown minimization engine: {engine}")
+
+        from lib.minimize import index_table, reachable_mask, hopcroft
+
+        with self.__phase__("index_table"):
+            state_ids, table, final_mask = index_table(
+                self.states,
+                self.alphabet,
+                self.initial_state,
+                self.final_states,
+                self.rules,
+            )
+
+        with self.__phase__("hopcroft"):
+            # Only accessible states take part in the refinement
+            kept = np.flatnonzero(reachable_mask(table, state_ids[self.initial_state]))
+            renumber = np.full(len(table), -1, dtype=np.int32)
+            renumber[kept] = np.arange(len(kept), dtype=np.int32)
+            blocks = hopcroft(renumber[table[kept]], final_mask[kept])
+
+        return self.__quotient__(table, kept, blocks)
+
+    # Minimal DFA from the Nerode blocks of the accessible states
+    # `table` is laid out as by lib.minimize.index_table(), rows past the
+    # last state are sinks; blocks[i] is the block of row kept[i]
+    def __quotient__(self, table: np.ndarray, kept: np.ndarray, blocks) -> "DFA":
+        from lib.serialize import MISSING, TableRules
+
+        num_states = len(self.states)
+        with self.__phase__("merge_states"):
+            # Collect class members in state order, ignoring the implicit sink
+            members = {}
+            for state_id, block in zip(kept.tolist(), blocks.tolist()):
+                if state_id < num_states:
+                    members.setdefault(block, []).append(self.states[state_id])
+            new_states, state_mapping = self.__merged_names__(list(members.values()))
+
+            # δ of the merged states as an integer table, no rules dict
+            # Members of a class only differ in missing transitions (the
+            # implicit sink), so the largest target per cell is the real one
+            new_index = {state: i for i, state in enumerate(new_states)}
+            block_rows = np.full(blocks.max() + 1, MISSING, dtype=np.int32)
+            for block, states_list in members.items():
+                block_rows[block] = new_index[state_mapping[states_list[0]]]
+            new_rows = np.full(len(table), MISSING, dtype=np.int32)
+            new_rows[kept] = block_rows[blocks]
+            new_rows[num_states:] = MISSING
+
+            real = kept[kept < num_states]
+            new_table = np.full(
+                (len(new_states), len(self.alphabet)), MISSING, dtype=np.int32
+            )
+            np.maximum.at(new_table, new_rows[real], new_rows[table[real]])
+
+        minimized_dfa = DFA(
+            alphabet=self.alphabet,
+            states=new_states,
+            initial_state=state_mapping[self.initial_state],
+            final_states=self.__merged_final_states__(state_mapping),
+            rules=TableRules(new_states, self.alphabet, new_table),
+        )
+        minimized_dfa.__stats__ = self.__stats__
+        return minimized_dfa
+
+    # Minimizer following edits of this DFA (transitions, final states, new
+    # states), re-refining only the states an edit can affect
+    # Its minimized() is the same DFA as minimize() on the edited DFA
+    def minimizer(self) -> "IncrementalMinimizer":
+        from lib.incremental import IncrementalMinimizer
+
+        return IncrementalMinimizer(self)
+
 
 # Minor testing
 if __name__ == "__main__":
+    # Run as a script (python lib/dfa.py): the lazy `lib.` imports need the
+    # repository root on the path, as with python -m lib.dfa
+    if not __package__:
+        import os
+        import sys
+
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
     test_obj = DFA(
         alphabet=("a", "b"),
         states=tuple([f"q{x}" for x in range(8)]),
@@ -400,8 +800,11 @@ if __name__ == "__main__":
         },
     )
     # Procedure for reduction of number of states
-    test_obj.remove_inaccessible_states()
+    test_obj.trim()
     test_obj = test_obj.get_reduced_dfa()
     test_obj.mark()
     test_obj.reduce()
     reduced_test_obj = test_obj.get_reduced_dfa()
+
+    # Same result in one call
+    minimized_test_obj = test_obj.minimize()
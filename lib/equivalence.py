@@ -0,0 +1,81 @@
+from collections import deque
+
+from lib.minimize import DisjointSet
+from lib.product import ProductTables
+
+
+# Outcome of a language comparison, truthy when the property holds
+class LanguageCheck:
+    def __init__(self, holds: bool, counterexample: str = None):
+        self.holds: bool = holds
+        # Shortest string on which the automata disagree, None if `holds`
+        self.counterexample: str = counterexample
+
+    def __bool__(self) -> bool:
+        return self.holds
+
+    def __repr__(self) -> str:
+        if self.holds:
+            return "LanguageCheck(holds=True)"
+        return f"LanguageCheck(holds=False, counterexample={self.counterexample!r})"
+
+
+# Shortest string leading to an accepting pair of a product, BFS over pairs
+# Return form: the string, None if the product accepts nothing
+def shortest_accepted(tables: ProductTables):
+    parents = {tables.initial: None}
+    queue = deque([tables.initial])
+
+    while queue:
+        pair = queue.popleft()
+        next_pairs, accepting = tables.expand(pair)
+        if accepting:
+            # Walk the BFS tree back to the initial pair
+            symbols = []
+            while parents[pair] is not None:
+                pair, col = parents[pair]
+                symbols.append(tables.alphabet[col])
+            return "".join(reversed(symbols))
+        for col, next_pair in enumerate(next_pairs):
+            if next_pair is not None and next_pair not in parents:
+                parents[next_pair] = (pair, col)
+                queue.append(next_pair)
+    return None
+
+
+# Hopcroft-Karp: merge the classes of (q0, p0) and of every pair of
+# successors, and fail as soon as a class mixes final and non-final states
+# At most n1 + n2 merges, so O((n1 + n2)·k·α(n)) without building the product
+def equivalent(first, second) -> LanguageCheck:
+    tables = ProductTables(first, second, "symmetric_difference")
+    rows_1, rows_2 = tables.rows_1, tables.rows_2
+    accepting_1 = tables.first.accepting.tolist()
+    accepting_2 = tables.second.accepting.tolist()
+
+    # States of both automata in one forest, the second one's shifted by `offset`
+    offset = len(rows_1)
+    classes = DisjointSet(offset + len(rows_2))
+    classes.union(tables.first.initial, offset + tables.second.initial)
+    queue = deque([(tables.first.initial, tables.second.initial)])
+
+    while queue:
+        state_1, state_2 = queue.popleft()
+        if accepting_1[state_1] != accepting_2[state_2]:
+            # Not equivalent, look for the shortest witness in the product
+            return LanguageCheck(False, shortest_accepted(tables))
+        for next_1, next_2 in zip(rows_1[state_1], rows_2[state_2]):
+            root_1 = classes.find(next_1)
+            root_2 = classes.find(offset + next_2)
+            if root_1 != root_2:
+                classes.union(root_1, root_2)
+                queue.append((next_1, next_2))
+
+    return LanguageCheck(True)
+
+
+# L(second) ⊆ L(first), i.e. the product second \ first accepts nothing
+# Pairs are explored in BFS order, so the first accepting pair found gives
+# a shortest string accepted by `second` but not by `first`
+def includes(first, second) -> LanguageCheck:
+    counterexample = shortest_accepted(ProductTables(second, first, "difference"))
+    return LanguageCheck(counterexample is None, counterexample)
@@ -0,0 +1,395 @@
+from collections import deque
+
+import numpy as np
+
+from lib.minimize import hopcroft, reachable_mask
+
+# Minimization that follows edits of a DFA instead of starting over
+# The Nerode partition is kept over every state, accessible or not, plus an
+# explicit sink standing for missing transitions
+# An edit only changes the language of the states that can reach the edited
+# state, the affected set A; every other state keeps its block, and those
+# blocks stay pairwise distinct. The states of A leave their blocks, are
+# matched against the unchanged blocks (a greatest fixed point over candidate
+# blocks, seeded from A's transitions into the unchanged part), and only the
+# states that match none are split again, by Hopcroft on A alone
+# minimized() is the same DFA as DFA.minimize() on the edited DFA
+
+# Affected sets larger than this share of all states are refined from scratch
+FULL_REFINE_SHARE = 0.5
+
+
+class IncrementalMinimizer:
+    def __init__(self, dfa):
+        from lib.serialize import MISSING, integer_table
+
+        self.alphabet: tuple = tuple(dfa.alphabet)
+        self.symbol_columns: dict = {
+            symbol: i for i, symbol in enumerate(self.alphabet)
+        }
+        self.names: list = list(dfa.states)
+        self.ids: dict = {state: i for i, state in enumerate(self.names)}
+        self.initial: int = self.ids[dfa.initial_state]
+        # Final states in the order they were given, new ones last
+        self.final_states: dict = dict.fromkeys(dfa.final_states)
+
+        # Rows 0..n-1 are the states, row n the sink
+        table, final_mask = integer_table(
+            dfa.states, self.alphabet, dfa.final_states, dfa.rules
+        )
+        sink = len(self.names)
+        self.table: np.ndarray = np.vstack(
+            (
+                np.where(table == MISSING, sink, table),
+                np.full((1, len(self.alphabet)), sink),
+            )
+        ).astype(np.int32)
+        self.final_mask: np.ndarray = np.append(final_mask, False)
+
+        # predecessors[row]: {source row: number of transitions into row}
+        self.predecessors: list = [{} for _ in range(len(self.table))]
+        for source, row in enumerate(self.table.tolist()):
+            for next_state in row:
+                counts = self.predecessors[next_state]
+                counts[source] = counts.get(source, 0) + 1
+
+        self.__refine_all__()
+        # Accessible rows, None until needed again after an edit
+        self.__reachable__: np.ndarray = None
+        self.__result__ = None
+
+    @property
+    def sink(self) -> int:
+        return len(self.names)
+
+    # Point `state` to `next_state` on `symbol`, None removes the transition
+    def set_transition(self, state: str, symbol: str, next_state: str = None) -> None:
+        row = self.__row__(state)
+        col = self.symbol_columns.get(symbol)
+        if col is None:
+            raise ValueError(f"Unknown symbol: {symbol}")
+        target = self.sink if next_state is None else self.__row__(next_state)
+        if int(self.table[row, col]) != target:
+            self.__set_cell__(row, col, target)
+            self.__refine__([row])
+
+    def set_final(self, state: str, final: bool = True) -> None:
+        row = self.__row__(state)
+        if bool(self.final_mask[row]) == final:
+            return
+        self.final_mask[row] = final
+        if final:
+            self.final_states[state] = None
+        else:
+            del self.final_states[state]
+        self.__refine__([row])
+
+    # Apply the edits turning the current DFA into `dfa` as one update
+    # `dfa` may only add states, at the end of the state order
+    # Raise ValueError for any other change of the states or the alphabet
+    def update_to(self, dfa) -> None:
+        from lib.serialize import MISSING, integer_table
+
+        if tuple(dfa.alphabet) != self.alphabet:
+            raise ValueError("The alphabet changed")
+        if list(dfa.states[: len(self.names)]) != self.names:
+            raise ValueError("States were removed, renamed or reordered")
+        for state in dfa.states[len(self.names) :]:
+            self.add_state(state)
+
+        sink = self.sink
+        table, final_mask = integer_table(
+            dfa.states, self.alphabet, dfa.final_states, dfa.rules
+        )
+        table = np.where(table == MISSING, sink, table)
+        rows, cols = np.nonzero(table != self.table[:sink])
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            self.__set_cell__(row, col, int(table[row, col]))
+        finals = np.flatnonzero(final_mask != self.final_mask[:sink])
+        self.final_mask[finals] = final_mask[finals]
+        self.final_states = dict.fromkeys(dfa.final_states)
+        self.set_initial(dfa.initial_state)
+
+        edited = np.union1d(rows, finals).tolist()
+        if edited:
+            self.__refine__(edited)
+
+    # Only accessibility depends on the initial state, not the partition
+    def set_initial(self, state: str) -> None:
+        self.initial = self.__row__(state)
+        self.__reachable__ = None
+        self.__result__ = None
+
+    # New state at the end of the state order, without transitions
+    # Raise ValueError if the name is taken
+    def add_state(self, state: str, final: bool = False) -> None:
+        if state in self.ids:
+            raise ValueError(f"State already exists: {state}")
+
+        # The new state takes the sink's row, its transitions all lead to
+        # the sink, now one row further
+        sink = self.sink
+        self.table = np.vstack(
+            (
+                np.where(self.table == sink, sink + 1, self.table),
+                np.full((1, len(self.alphabet)), sink + 1, dtype=np.int32),
+            )
+        )
+        self.final_mask = np.append(self.final_mask, False)
+        self.predecessors.append(self.predecessors[sink])
+        self.predecessors[sink] = {}
+        self.predecessors[sink + 1][sink + 1] = len(self.alphabet)
+        if self.__reachable__ is not None:
+            self.__reachable__ = np.append(self.__reachable__, self.__reachable__[sink])
+            self.__reachable__[sink] = False
+
+        # Without transitions and not final, it has the sink's (empty) language
+        block = self.block_of[sink]
+        self.block_of.append(block)
+        self.block_size[block] += 1
+        self.names.append(state)
+        self.ids[state] = sink
+        self.__result__ = None
+        if final:
+            self.set_final(state, True)
+
+    # The edited DFA
+    def to_dfa(self) -> "DFA":
+        from lib.dfa import DFA
+        from lib.serialize import MISSING, TableRules
+
+        states = tuple(self.names)
+        table = self.table[: self.sink]
+        return DFA(
+            alphabet=self.alphabet,
+            states=states,
+            initial_state=self.names[self.initial],
+            final_states=tuple(self.final_states),
+            rules=TableRules(
+                states, self.alphabet, np.where(table == self.sink, MISSING, table)
+            ),
+        )
+
+    # Same DFA as to_dfa().minimize(), built once per edit
+    def minimized(self) -> "DFA":
+        if self.__result__ is None:
+            if self.__reachable__ is None:
+                self.__reachable__ = reachable_mask(self.table, self.initial)
+            kept = np.flatnonzero(self.__reachable__)
+            blocks = np.array(self.block_of, dtype=np.int32)[kept]
+            self.__result__ = self.to_dfa().__quotient__(self.table, kept, blocks)
+        return self.__result__
+
+    def __set_cell__(self, row: int, col: int, target: int) -> None:
+        previous = int(self.table[row, col])
+        self.table[row, col] = target
+        counts = self.predecessors[previous]
+        counts[row] -= 1
+        if not counts[row]:
+            del counts[row]
+        counts = self.predecessors[target]
+        counts[row] = counts.get(row, 0) + 1
+        if self.__reachable__ is not None and self.__reachable__[row]:
+            self.__reachable__ = None
+
+    def __row__(self, state: str) -> int:
+        row = self.ids.get(state)
+        if row is None:
+            raise ValueError(f"Unknown state: {state}")
+        return row
+
+    # Partition of every row by Hopcroft, and the block-level transitions
+    def __refine_all__(self) -> None:
+        block_of = hopcroft(self.table, self.final_mask)
+        self.block_of: list = block_of.tolist()
+        self.block_size: list = np.bincount(block_of).tolist()
+        # block_rows[block]: target block per symbol, None once emptied
+        self.block_rows: list = [None] * len(self.block_size)
+        self.block_final: list = [False] * len(self.block_size)
+        # block_predecessors[symbol][block]: blocks leading to block on symbol
+        self.block_predecessors: list = [{} for _ in self.alphabet]
+        self.free_blocks: list = []
+
+        representatives = np.unique(block_of, return_index=True)[1]
+        targets = block_of[self.table[representatives]].tolist()
+        finals = self.final_mask[representatives].tolist()
+        for block, (row, final) in enumerate(zip(targets, finals)):
+            self.__add_block__(block, row, final)
+        self.__result__ = None
+
+    def __add_block__(self, block: int, row: list, final: bool) -> None:
+        self.block_rows[block] = row
+        self.block_final[block] = final
+        for col, target in enumerate(row):
+            self.block_predecessors[col].setdefault(target, set()).add(block)
+
+    def __new_block__(self) -> int:
+        if self.free_blocks:
+            return self.free_blocks.pop()
+        self.block_rows.append(None)
+        self.block_final.append(False)
+        self.block_size.append(0)
+        return len(self.block_rows) - 1
+
+    # Take a row out of its block, dropping the block once empty
+    def __leave__(self, row: int) -> None:
+        block = self.block_of[row]
+        self.block_of[row] = -1
+        self.block_size[block] -= 1
+        if self.block_size[block]:
+            return
+        for col, target in enumerate(self.block_rows[block]):
+            sources = self.block_predecessors[col].get(target)
+            if sources is not None:
+                sources.discard(block)
+                if not sources:
+                    del self.block_predecessors[col][target]
+        self.block_rows[block] = None
+        self.free_blocks.append(block)
+
+    # Rows that can reach an edited row, backward BFS
+    # Return form: list of rows, None once more than `limit` are found
+    def __affected__(self, edited: list, limit: float) -> list:
+        affected = set(edited)
+        queue = deque(edited)
+        while queue:
+            current = queue.popleft()
+            for source in self.predecessors[current]:
+                if source not in affected:
+                    affected.add(source)
+                    queue.append(source)
+            if len(affected) > limit:
+                return None
+        return list(affected)
+
+    def __refine__(self, edited: list) -> None:
+        self.__result__ = None
+        affected = self.__affected__(edited, FULL_REFINE_SHARE * len(self.table))
+        if affected is None:
+            self.__refine_all__()
+            return
+
+        rows = {row: self.table[row].tolist() for row in affected}
+        for row in affected:
+            self.__leave__(row)
+        matches = self.__match__(rows)
+        if matches is None:
+            self.__refine_all__()
+            return
+
+        for row, block in matches.items():
+            self.block_of[row] = block
+            self.block_size[block] += 1
+        unmatched = [row for row in affected if row not in matches]
+        if unmatched:
+            self.__split__(unmatched, rows)
+
+    # Unchanged block with the same language as each affected row
+    # A row can only match a block that agrees on finality, leads to the
+    # same unchanged blocks on the same symbols, and whose other targets
+    # match the row's affected targets
+    # Return form: {row: block} for the rows that match one, None if some
+    # rows never reach an unchanged block (no candidates to start from)
+    def __match__(self, rows: dict) -> dict:
+        candidates = {}
+        for row, targets in rows.items():
+            found = None
+            for col, target in enumerate(targets):
+                if target in rows:
+                    continue
+                sources = self.block_predecessors[col].get(self.block_of[target], set())
+                found = set(sources) if found is None else found & sources
+                if not found:
+                    break
+            if found is not None:
+                final = bool(self.final_mask[row])
+                candidates[row] = {
+                    block for block in found if self.block_final[block] == final
+                }
+
+        # Rows leading only into A inherit candidates from their targets
+        queue = deque(candidates)
+        while queue:
+            target = queue.popleft()
+            for row in self.predecessors[target]:
+                if row not in rows or row in candidates:
+                    continue
+                col = rows[row].index(target)
+                final = bool(self.final_mask[row])
+                found = set()
+                for block in candidates[target]:
+                    found |= self.block_predecessors[col].get(block, set())
+                candidates[row] = {
+                    block for block in found if self.block_final[block] == final
+                }
+                queue.append(row)
+        if len(candidates) < len(rows):
+            return None
+
+        # Greatest fixed point: drop candidates whose targets stopped matching
+        queue = deque(rows)
+        queued = set(rows)
+        while queue:
+            row = queue.popleft()
+            queued.discard(row)
+            kept = {
+                block
+                for block in candidates[row]
+                if all(
+                    self.block_rows[block][col] in candidates[target]
+                    for col, target in enumerate(rows[row])
+                    if target in rows
+                )
+            }
+            if len(kept) < len(candidates[row]):
+                candidates[row] = kept
+                for source in self.predecessors[row]:
+                    if source in rows and source not in queued:
+                        queue.append(source)
+                        queued.add(source)
+
+        # Unchanged blocks are pairwise distinct, so at most one is left
+        return {row: min(found) for row, found in candidates.items() if found}
+
+    # New blocks for affected rows that match no unchanged block
+    # Hopcroft on these rows alone; every block they lead to is a fixed row
+    # of its own, in an initial class of its own
+    def __split__(self, unmatched: list, rows: dict) -> None:
+        local = {row: i for i, row in enumerate(unmatched)}
+        outside = {}
+        table = []
+        for row in unmatched:
+            local_row = []
+            for target in rows[row]:
+                if target in local:
+                    local_row.append(local[target])
+                else:
+                    block = self.block_of[target]
+                    local_row.append(
+                        outside.setdefault(block, len(unmatched) + len(outside))
+                    )
+            table.append(local_row)
+        for i in range(len(outside)):
+            table.append([len(unmatched) + i] * len(self.alphabet))
+
+        final_mask = self.final_mask[unmatched]
+        labels = np.concatenate(
+            (final_mask.astype(np.int64), 2 + np.arange(len(outside)))
+        )
+        local_blocks = hopcroft(np.array(table, dtype=np.int32), final_mask, labels)
+
+        new_blocks = {}
+        for row, local_block in zip(unmatched, local_blocks.tolist()):
+            block = new_blocks.get(local_block)
+            if block is None:
+                block = new_blocks[local_block] = self.__new_block__()
+            self.block_of[row] = block
+            self.block_size[block] += 1
+        for row in unmatched:
+            block = self.block_of[row]
+            if self.block_rows[block] is None:
+                self.__add_block__(
+                    block,
+                    [self.block_of[target] for target in rows[row]],
+                    bool(self.final_mask[row]),
+                )
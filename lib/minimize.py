@@ -0,0 +1,240 @@
+from collections import deque
+
+import numpy as np
+
+# Number of marked pairs expanded at once by fill_table()
+FRONTIER_SLICE = 1 << 15
+
+
+# Intern a DFA's states to integer IDs and lay δ out as an integer table
+# Missing transitions point to an extra, non-final sink row (ID == len(states))
+# Return form: (state_ids, table, final_mask), the sink only exists if needed
+def index_table(states, alphabet, initial_state, final_states, rules) -> tuple:
+    from lib.serialize import MISSING, StateNames, integer_table
+
+    table, final_mask = integer_table(states, alphabet, final_states, rules)
+    if isinstance(states, StateNames):
+        state_ids = states.ids()
+    else:
+        state_ids = {state: i for i, state in enumerate(states)}
+
+    # Add the sink row only if something points to it
+    missing = table == MISSING
+    if missing.any():
+        sink = len(table)
+        table = np.vstack(
+            (np.where(missing, sink, table), np.full((1, table.shape[1]), sink))
+        ).astype(np.int32)
+        final_mask = np.append(final_mask, False)
+    else:
+        table = np.array(table, dtype=np.int32)
+        final_mask = np.array(final_mask, dtype=bool)
+
+    return state_ids, table, final_mask
+
+
+# Forward reachability over an integer table
+# Return form: boolean mask of states reachable from `initial`
+def reachable_mask(table: np.ndarray, initial: int) -> np.ndarray:
+    rows = table.tolist()
+    seen = np.zeros(len(rows), dtype=bool)
+    seen[initial] = True
+    queue = deque([initial])
+    while queue:
+        current = queue.popleft()
+        for next_state in rows[current]:
+            if not seen[next_state]:
+                seen[next_state] = True
+                queue.append(next_state)
+    return seen
+
+
+# Hopcroft's partition refinement, O(k·n·log n)
+# `table` must be total, i.e. every entry is a valid row index
+# `labels` sets a finer initial partition than F / Q \ F: states start in
+# the same block iff their labels are equal
+# Return form: array mapping each state to its block ID
+def hopcroft(table: np.ndarray, final_mask: np.ndarray, labels=None) -> np.ndarray:
+    num_states, num_symbols = table.shape
+
+    # Inverse transitions per symbol: inverse[symbol][state] -> predecessors
+    inverse = [[[] for _ in range(num_states)] for _ in range(num_symbols)]
+    for state, row in enumerate(table.tolist()):
+        for symbol, next_state in enumerate(row):
+            inverse[symbol][next_state].append(state)
+
+    # Initial partition F / Q \ F, ignoring empty blocks
+    if labels is None:
+        finals = set(np.flatnonzero(final_mask).tolist())
+        non_finals = set(range(num_states)) - finals
+        blocks = [block for block in (finals, non_finals) if block]
+    else:
+        label_ids = np.unique(labels, return_inverse=True)[1].ravel()
+        order = np.argsort(label_ids, kind="stable")
+        bounds = np.searchsorted(label_ids[order], np.arange(label_ids.max() + 2))
+        blocks = [
+            set(order[start:end].tolist())
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+        ]
+    block_of = [0] * num_states
+    for block_id, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = block_id
+
+    # Only the smaller half of a split has to be used as a splitter,
+    # and every initial block but the largest
+    worklist = deque()
+    pending = set()
+    if len(blocks) > 1:
+        largest = max(range(len(blocks)), key=lambda block_id: len(blocks[block_id]))
+        for block_id in range(len(blocks)):
+            if block_id == largest:
+                continue
+            for symbol in range(num_symbols):
+                worklist.append((block_id, symbol))
+                pending.add((block_id, symbol))
+
+    while worklist:
+        splitter_id, symbol = worklist.popleft()
+        pending.discard((splitter_id, symbol))
+
+        # Group predecessors of the splitter by the block they live in
+        predecessors = inverse[symbol]
+        touched = {}
+        for state in blocks[splitter_id]:
+            for prev_state in predecessors[state]:
+                touched.setdefault(block_of[prev_state], []).append(prev_state)
+
+        for block_id, members in touched.items():
+            block = blocks[block_id]
+            if len(members) == len(block):
+                continue
+
+            # Split off the predecessors into a new block
+            new_id = len(blocks)
+            new_block = set(members)
+            block -= new_block
+            blocks.append(new_block)
+            for state in members:
+                block_of[state] = new_id
+
+            for a in range(num_symbols):
+                if (block_id, a) in pending:
+                    worklist.append((new_id, a))
+                    pending.add((new_id, a))
+                else:
+                    chosen = block_id if len(block) <= len(new_block) else new_id
+                    worklist.append((chosen, a))
+                    pending.add((chosen, a))
+
+    return np.array(block_of, dtype=np.int32)
+
+
+# Pairs (i, j) with i > j are packed row by row into a flat triangle
+# Pair (i, j) lives at index i·(i - 1) / 2 + j
+def pair_index(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    i = i.astype(np.int64)
+    j = j.astype(np.int64)
+    high = np.maximum(i, j)
+    low = np.minimum(i, j)
+    return high * (high - 1) // 2 + low
+
+
+# Inverse of pair_index()
+# Return form: (rows, cols) with rows > cols
+def pair_labels(index: np.ndarray, num_states: int) -> tuple:
+    row_starts = np.arange(num_states + 1, dtype=np.int64)
+    row_starts = row_starts * (row_starts - 1) // 2
+    rows = np.searchsorted(row_starts, index, side="right") - 1
+    cols = index - row_starts[rows]
+    return rows, cols
+
+
+# Table-filling (Myhill-Nerode) over a packed triangle of booleans
+# Newly marked pairs only propagate to their predecessor pairs, O(k·n²) total
+# `table` must be total, i.e. every entry is a valid row index
+# Return form: (marked, iterations), marked[pair_index(i, j)] is True
+# when i and j are distinguishable
+# `stats` (PipelineStats) receives the number of predecessor pairs examined
+def fill_table(table: np.ndarray, final_mask: np.ndarray, stats=None) -> tuple:
+    num_states, num_symbols = table.shape
+    marked = np.zeros(num_states * (num_states - 1) // 2, dtype=bool)
+
+    # Base case: final vs. non-final, one row of the triangle at a time
+    for i in range(1, num_states):
+        start = i * (i - 1) // 2
+        marked[start : start + i] = final_mask[i] != final_mask[:i]
+
+    # Inverse transitions per symbol, CSR style
+    inverse = []
+    for symbol in range(num_symbols):
+        targets = table[:, symbol]
+        order = np.argsort(targets, kind="stable").astype(np.int64)
+        pointers = np.zeros(num_states + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=num_states), out=pointers[1:])
+        inverse.append((order, pointers))
+
+    iterations = 0
+    frontier = np.flatnonzero(marked)
+    while frontier.size:
+        iterations += 1
+        newly_marked = []
+        # Slice the frontier so the expanded predecessor pairs stay bounded
+        for begin in range(0, frontier.size, FRONTIER_SLICE):
+            rows, cols = pair_labels(
+                frontier[begin : begin + FRONTIER_SLICE], num_states
+            )
+            for order, pointers in inverse:
+                # Every (predecessor of row, predecessor of col) combination
+                row_counts = pointers[rows + 1] - pointers[rows]
+                col_counts = pointers[cols + 1] - pointers[cols]
+                counts = row_counts * col_counts
+                total = int(counts.sum())
+                if not total:
+                    continue
+                if stats is not None:
+                    stats.count("cells_examined", total)
+                owner = np.repeat(np.arange(len(counts)), counts)
+                offsets = np.arange(total) - np.repeat(
+                    np.cumsum(counts) - counts, counts
+                )
+                prev_rows = order[pointers[rows[owner]] + offsets // col_counts[owner]]
+                prev_cols = order[pointers[cols[owner]] + offsets % col_counts[owner]]
+
+                distinct = prev_rows != prev_cols
+                candidates = pair_index(prev_rows[distinct], prev_cols[distinct])
+                candidates = np.unique(candidates[~marked[candidates]])
+                marked[candidates] = True
+                newly_marked.append(candidates)
+
+        frontier = np.concatenate(newly_marked) if newly_marked else frontier[:0]
+
+    return marked, iterations
+
+
+# Disjoint-set forest over integer IDs 0..n-1
+# Path compression and union by rank
+class DisjointSet:
+    def __init__(self, size: int):
+        self.parent: list = list(range(size))
+        self.rank: list = [0] * size
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Point everything on the path straight at the root
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
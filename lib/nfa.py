@@ -0,0 +1,164 @@
+from collections import deque
+from types import MappingProxyType
+
+# Symbol of ε-transitions in NFA rules
+EPSILON = ""
+
+# Default cap on the number of DFA states built by NFA.to_dfa()
+MAX_STATES = 1 << 16
+
+
+# Indices of the bits set in a bitset, lowest first
+def iter_bits(bits: int):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# States reachable over ε-transitions only, BFS over single states
+def epsilon_closure(bits: int, epsilon_moves: list) -> int:
+    closure = bits
+    queue = deque(iter_bits(bits))
+    while queue:
+        new_bits = epsilon_moves[queue.popleft()] & ~closure
+        closure |= new_bits
+        queue.extend(iter_bits(new_bits))
+    return closure
+
+
+# Encompass properties and interactions with an NFA / ε-NFA
+# Rules map (state, symbol) to an iterable of next states,
+# ε-transitions use EPSILON as their symbol
+# Sets of states are Python ints, bit i standing for states[i]
+class NFA:
+    def __init__(
+        self,
+        alphabet: tuple,
+        states: tuple,
+        initial_state: str,
+        final_states: tuple,
+        rules: dict,
+    ):
+        self.alphabet: tuple = tuple(symbol for symbol in alphabet if symbol != EPSILON)
+        self.states: tuple = states
+        self.initial_state: str = initial_state
+        self.final_states: tuple = final_states
+        self.rules: dict = rules
+
+        state_ids = {state: i for i, state in enumerate(states)}
+        symbol_columns = {symbol: col for col, symbol in enumerate(self.alphabet)}
+
+        # Direct successors per symbol column, and over ε
+        moves = [[0] * len(states) for _ in self.alphabet]
+        epsilon_moves = [0] * len(states)
+        for (state, symbol), next_states in rules.items():
+            if isinstance(next_states, str):
+                next_states = (next_states,)
+            bits = 0
+            for next_state in next_states:
+                bits |= 1 << state_ids[next_state]
+            if symbol == EPSILON:
+                epsilon_moves[state_ids[state]] |= bits
+            elif symbol in symbol_columns:
+                moves[symbol_columns[symbol]][state_ids[state]] |= bits
+
+        # ε-closure of every single state, computed once
+        self.__closures__: list = [
+            epsilon_closure(1 << i, epsilon_moves) for i in range(len(states))
+        ]
+        # One step then closure, per symbol column and state
+        self.__steps__: list = [
+            [self.closure(bits) for bits in column] for column in moves
+        ]
+        self.__symbol_columns__: dict = symbol_columns
+        self.__initial_bits__: int = self.__closures__[state_ids[initial_state]]
+        self.__final_bits__: int = 0
+        for state in final_states:
+            self.__final_bits__ |= 1 << state_ids[state]
+
+    # ε-closure of a set of states
+    def closure(self, bits: int) -> int:
+        closures = self.__closures__
+        closed = 0
+        for i in iter_bits(bits):
+            closed |= closures[i]
+        return closed
+
+    # ε-closed successors of a set of states on one symbol column
+    def step(self, bits: int, col: int) -> int:
+        steps = self.__steps__[col]
+        next_bits = 0
+        for i in iter_bits(bits):
+            next_bits |= steps[i]
+        return next_bits
+
+    # Names of the states in a set, in state order
+    def state_names(self, bits: int) -> list:
+        return [self.states[i] for i in iter_bits(bits)]
+
+    # Check if input string is syntactically correct
+    # Does not check whether string is accepted / rejected
+    def check_syntax(self, raw_input: str) -> bool:
+        input_str = raw_input.strip()
+        for symbol in input_str:
+            if symbol not in self.__symbol_columns__:
+                return False
+        return True
+
+    # Simulate the NFA directly on a frontier of states, no determinization
+    # Same verdict as validate() on the result of to_dfa()
+    def validate(self, input: str) -> bool:
+        if not self.check_syntax(input):
+            return False
+
+        frontier = self.__initial_bits__
+        symbol_columns = self.__symbol_columns__
+        for symbol in input.strip():
+            frontier = self.step(frontier, symbol_columns[symbol])
+            if not frontier:
+                return False
+        return bool(frontier & self.__final_bits__)
+
+    # Subset construction over the subsets reachable from the initial closure
+    # The empty subset is left out, its transitions are simply missing
+    # Raise ValueError when more than `max_states` subsets show up
+    def to_dfa(self, max_states: int = MAX_STATES) -> "DFA":
+        from lib.dfa import DFA
+
+        subset_ids = {self.__initial_bits__: 0}
+        subsets = [self.__initial_bits__]
+        rules = {}
+
+        # `subsets` doubles as the worklist, every subset is expanded once
+        for subset in subsets:
+            for col, symbol in enumerate(self.alphabet):
+                next_subset = self.step(subset, col)
+                if not next_subset:
+                    continue
+                if next_subset not in subset_ids:
+                    if len(subsets) >= max_states:
+                        raise ValueError(
+                            f"Subset construction exceeds {max_states} states"
+                        )
+                    subset_ids[next_subset] = len(subsets)
+                    subsets.append(next_subset)
+                rules[(subset_ids[subset], symbol)] = subset_ids[next_subset]
+
+        names = ["{" + ", ".join(self.state_names(subset)) + "}" for subset in subsets]
+        return DFA(
+            alphabet=self.alphabet,
+            states=tuple(names),
+            initial_state=names[0],
+            final_states=tuple(
+                name
+                for name, subset in zip(names, subsets)
+                if subset & self.__final_bits__
+            ),
+            rules=MappingProxyType(
+                {
+                    (names[subset_id], symbol): names[next_id]
+                    for (subset_id, symbol), next_id in rules.items()
+                }
+            ),
+        )
@@ -0,0 +1,186 @@
+import mmap
+import os
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from lib.compiled import CompiledDFA
+from lib.stream import NEWLINE, WINDOW_SIZE, StreamValidator
+
+# Shards per worker, more shards even out lines of uneven length
+SHARDS_PER_WORKER = 4
+
+# Compiled DFA of the current worker process, attached in __init_worker__()
+__worker_dfa__ = None
+__worker_memory__ = None
+
+
+# Outcome of a corpus run, identical for any number of workers
+class CorpusResult:
+    def __init__(self, accepted: int, rejected: int, rejected_offsets: np.ndarray):
+        self.accepted: int = accepted
+        self.rejected: int = rejected
+        # Byte offsets of rejected lines in file order, None if not collected
+        self.rejected_offsets: np.ndarray = rejected_offsets
+
+    def __repr__(self) -> str:
+        return f"CorpusResult(accepted={self.accepted}, rejected={self.rejected})"
+
+
+# Split a file into byte ranges that start right after a "\n"
+# A "\n" byte is never part of a multi-byte UTF-8 character, so every range
+# starts and ends on a character boundary
+# Return form: [(start_0, end_0), (start_1, end_1), ...]
+def shard_ranges(path, num_shards: int) -> list:
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    boundaries = [0]
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for shard in range(1, num_shards):
+                newline = mapped.find(
+                    b"\n", max(size * shard // num_shards, boundaries[-1])
+                )
+                if newline == -1:
+                    break
+                if newline + 1 > boundaries[-1] and newline + 1 < size:
+                    boundaries.append(newline + 1)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+# Validate the lines of one shard
+# Return form: (accepted, rejected, rejected_offsets or None)
+def validate_shard(
+    compiled: CompiledDFA, path, start: int, end: int, collect_rejected: bool
+) -> tuple:
+    validator = StreamValidator(compiled, lines=True)
+    accepted = 0
+    rejected = 0
+    rejected_offsets = []
+    line_start = start
+
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Every view has to be released before the map can be closed
+            with memoryview(mapped) as view:
+                for chunk_start in range(start, end, WINDOW_SIZE):
+                    chunk_end = min(chunk_start + WINDOW_SIZE, end)
+                    with view[chunk_start:chunk_end] as chunk:
+                        verdicts = validator.feed(chunk)
+                        num_accepted = int(verdicts.sum())
+                        accepted += num_accepted
+                        rejected += len(verdicts) - num_accepted
+
+                        if collect_rejected and len(verdicts):
+                            # Line starts of the lines completed in this chunk
+                            data = np.frombuffer(chunk, dtype=np.uint8)
+                            newlines = np.flatnonzero(data == NEWLINE) + chunk_start
+                            del data
+                            line_starts = np.concatenate(
+                                ([line_start], newlines[:-1] + 1)
+                            )
+                            rejected_offsets.append(line_starts[~verdicts])
+                            line_start = int(newlines[-1]) + 1
+
+    # A last line without "\n"
+    last_verdict = validator.result()
+    if last_verdict is not None:
+        if last_verdict:
+            accepted += 1
+        else:
+            rejected += 1
+            if collect_rejected:
+                rejected_offsets.append(np.array([line_start], dtype=np.int64))
+
+    if not collect_rejected:
+        return accepted, rejected, None
+    if not rejected_offsets:
+        return accepted, rejected, np.zeros(0, dtype=np.int64)
+    return accepted, rejected, np.concatenate(rejected_offsets).astype(np.int64)
+
+
+# Attach to the shared transition table, once per worker process
+def __init_worker__(
+    memory_name: str,
+    states: tuple,
+    alphabet: tuple,
+    delta_shape: tuple,
+    initial: int,
+) -> None:
+    global __worker_dfa__, __worker_memory__
+    # Workers share the parent's resource tracker, the parent unlinks the block
+    __worker_memory__ = shared_memory.SharedMemory(name=memory_name)
+
+    delta_size = int(np.prod(delta_shape)) * np.dtype(np.int32).itemsize
+    delta = np.ndarray(delta_shape, dtype=np.int32, buffer=__worker_memory__.buf)
+    accepting = np.ndarray(
+        (delta_shape[0],), dtype=bool, buffer=__worker_memory__.buf, offset=delta_size
+    )
+    __worker_dfa__ = CompiledDFA(
+        states=states,
+        alphabet=alphabet,
+        delta=delta,
+        initial=initial,
+        accepting=accepting,
+    )
+
+
+# Pool task: one shard with the worker's attached DFA
+def __run_shard__(task: tuple) -> tuple:
+    path, start, end, collect_rejected = task
+    return validate_shard(__worker_dfa__, path, start, end, collect_rejected)
+
+
+# Validate every line of a UTF-8 file across worker processes
+# The transition table is compiled once and shared through shared memory
+# Shards are merged in file order, so the result does not depend on `workers`
+def validate_corpus(
+    dfa, path, workers: int = None, collect_rejected: bool = False
+) -> CorpusResult:
+    compiled = dfa.compile()
+    workers = workers or os.cpu_count() or 1
+    shards = shard_ranges(path, workers * SHARDS_PER_WORKER if workers > 1 else 1)
+    tasks = [(path, start, end, collect_rejected) for start, end in shards]
+
+    if workers == 1 or len(tasks) <= 1:
+        results = [
+            validate_shard(compiled, path, start, end, collect_rejected)
+            for start, end in shards
+        ]
+    else:
+        delta_size = compiled.delta.nbytes
+        memory = shared_memory.SharedMemory(
+            create=True, size=delta_size + compiled.accepting.nbytes
+        )
+        try:
+            memory.buf[:delta_size] = compiled.delta.tobytes()
+            memory.buf[delta_size : delta_size + compiled.accepting.nbytes] = (
+                compiled.accepting.tobytes()
+            )
+            with get_context().Pool(
+                processes=min(workers, len(tasks)),
+                initializer=__init_worker__,
+                initargs=(
+                    memory.name,
+                    compiled.states,
+                    compiled.alphabet,
+                    compiled.delta.shape,
+                    compiled.initial,
+                ),
+            ) as pool:
+                results = pool.map(__run_shard__, tasks, chunksize=1)
+        finally:
+            memory.close()
+            memory.unlink()
+
+    accepted = sum(result[0] for result in results)
+    rejected = sum(result[1] for result in results)
+    rejected_offsets = None
+    if collect_rejected:
+        rejected_offsets = np.concatenate(
+            [np.zeros(0, dtype=np.int64)] + [result[2] for result in results]
+        )
+    return CorpusResult(accepted, rejected, rejected_offsets)
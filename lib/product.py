@@ -0,0 +1,185 @@
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Product states kept by LazyProduct before the least recently used is dropped
+CACHE_SIZE = 1 << 16
+
+# Name of a component's dead state inside product state names
+DEAD_NAME = "∅"
+# Characters escaped with a backslash in component names, so names such as
+# "q1, q2" left by reduce() can't make two pairs look alike
+ESCAPED = str.maketrans({char: f"\\{char}" for char in "\\(),∅"})
+
+# operation -> (accepting(final_1, final_2), dead(dead_1, dead_2))
+# A pair is dead when no continuation can make it accepting again,
+# transitions into dead pairs are left out of the product
+OPERATIONS = {
+    "intersection": (lambda f1, f2: f1 and f2, lambda d1, d2: d1 or d2),
+    "union": (lambda f1, f2: f1 or f2, lambda d1, d2: d1 and d2),
+    "difference": (lambda f1, f2: f1 and not f2, lambda d1, d2: d1),
+    "symmetric_difference": (lambda f1, f2: f1 != f2, lambda d1, d2: d1 and d2),
+}
+
+
+# Shared setup of the eager and lazy product
+# Both automata are compiled, every product symbol is mapped to a column of
+# each compiled table (the "other" column if a side doesn't know the symbol)
+class ProductTables:
+    def __init__(self, first, second, operation: str):
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown product operation: {operation}")
+        self.operation: str = operation
+        self.is_accepting, self.is_dead = OPERATIONS[operation]
+
+        self.first = first.compile()
+        self.second = second.compile()
+        self.alphabet: tuple = tuple(first.alphabet) + tuple(
+            symbol for symbol in second.alphabet if symbol not in first.alphabet
+        )
+        self.rows_1: list = self.__product_rows__(self.first)
+        self.rows_2: list = self.__product_rows__(self.second)
+
+        # Pair (i, j) is encoded as the integer i·width + j
+        self.width: int = self.second.dead + 1
+        self.initial: int = self.first.initial * self.width + self.second.initial
+
+    # Rows of a compiled table restricted to the product alphabet's columns
+    def __product_rows__(self, compiled) -> list:
+        columns = {symbol: col for col, symbol in enumerate(compiled.alphabet)}
+        product_columns = [
+            columns.get(symbol, compiled.other) for symbol in self.alphabet
+        ]
+        return compiled.delta[:, product_columns].tolist()
+
+    # Successors of one pair, None for a dead pair
+    # Return form: ([next_pair or None per symbol], accepting)
+    def expand(self, pair: int) -> tuple:
+        i, j = divmod(pair, self.width)
+        dead_1 = self.first.dead
+        dead_2 = self.second.dead
+        next_pairs = [
+            None if self.is_dead(i2 == dead_1, j2 == dead_2) else i2 * self.width + j2
+            for i2, j2 in zip(self.rows_1[i], self.rows_2[j])
+        ]
+        accepting = self.is_accepting(
+            bool(self.first.accepting[i]), bool(self.second.accepting[j])
+        )
+        return next_pairs, accepting
+
+    # "(state_1, state_2)", DEAD_NAME for a component in its dead state
+    # Distinct pairs always get distinct names, see ESCAPED
+    def name(self, pair: int) -> str:
+        i, j = divmod(pair, self.width)
+        name_1 = (
+            DEAD_NAME
+            if i == self.first.dead
+            else str(self.first.states[i]).translate(ESCAPED)
+        )
+        name_2 = (
+            DEAD_NAME
+            if j == self.second.dead
+            else str(self.second.states[j]).translate(ESCAPED)
+        )
+        return f"({name_1}, {name_2})"
+
+
+# Product DFA over the pairs reachable from (q0, p0), in BFS order
+# Only pairs that are reached are ever expanded
+def product(first, second, operation: str) -> "DFA":
+    from lib.dfa import DFA
+
+    tables = ProductTables(first, second, operation)
+
+    pair_ids = {tables.initial: 0}
+    pairs = [tables.initial]
+    names = []
+    final_states = []
+    rules = {}
+
+    # `pairs` doubles as the worklist, every pair is expanded exactly once
+    for pair in pairs:
+        next_pairs, accepting = tables.expand(pair)
+        name = tables.name(pair)
+        names.append(name)
+        if accepting:
+            final_states.append(name)
+        for symbol, next_pair in zip(tables.alphabet, next_pairs):
+            if next_pair is None:
+                continue
+            if next_pair not in pair_ids:
+                pair_ids[next_pair] = len(pairs)
+                pairs.append(next_pair)
+            rules[(name, symbol)] = pair_ids[next_pair]
+
+    # Targets were recorded as IDs while their names didn't exist yet
+    rules = {key: names[next_id] for key, next_id in rules.items()}
+
+    return DFA(
+        alphabet=tables.alphabet,
+        states=tuple(names),
+        initial_state=names[0],
+        final_states=tuple(final_states),
+        rules=MappingProxyType(rules),
+    )
+
+
+# Product that is never built up front
+# Pairs are expanded on demand while validating and kept in an LRU cache of
+# at most `cache_size` pairs, so memory stays bounded however large the
+# product would be
+class LazyProduct:
+    def __init__(self, first, second, operation: str, cache_size: int = CACHE_SIZE):
+        self.tables: ProductTables = ProductTables(first, second, operation)
+        self.alphabet: tuple = self.tables.alphabet
+        self.cache_size: int = cache_size
+        self.__expanded__: OrderedDict = OrderedDict()
+        self.__symbol_columns__: dict = {
+            symbol: col for col, symbol in enumerate(self.alphabet)
+        }
+
+        self.__traced_states__: list = []
+
+    # Expanded pair from the cache, expanding it if needed
+    def __expand__(self, pair: int) -> tuple:
+        expanded = self.__expanded__
+        if pair in expanded:
+            expanded.move_to_end(pair)
+            return expanded[pair]
+        value = self.tables.expand(pair)
+        expanded[pair] = value
+        if len(expanded) > self.cache_size:
+            expanded.popitem(last=False)
+        return value
+
+    # Number of pairs currently expanded
+    def cached_states(self) -> int:
+        return len(self.__expanded__)
+
+    # Same verdict as validate() on the eager product()
+    # The names of the visited product states are kept in __traced_states__
+    def validate(self, input: str) -> bool:
+        pair = self.tables.initial
+        self.__traced_states__ = [self.tables.name(pair)]
+        traced_pairs = {pair}
+
+        columns = []
+        for symbol in input.strip():
+            col = self.__symbol_columns__.get(symbol)
+            if col is None:
+                return False
+            columns.append(col)
+
+        for col in columns:
+            next_pairs, _ = self.__expand__(pair)
+            pair = next_pairs[col]
+            if pair is None:
+                return False
+            if pair not in traced_pairs:
+                traced_pairs.add(pair)
+                self.__traced_states__.append(self.tables.name(pair))
+
+        return self.__expand__(pair)[1]
+
+    # Build the whole reachable product as a DFA
+    def materialize(self) -> "DFA":
+        return product(self.tables.first, self.tables.second, self.tables.operation)
@@ -0,0 +1,377 @@
+import copy
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Number of compiled patterns kept by compile_regex()
+CACHE_SIZE = 128
+
+# Default cap on the number of DFA states explored by derivative_dfa()
+MAX_STATES = 1 << 14
+# Largest m and n of a bounded repetition {m,n}
+MAX_REPEAT = 1000
+# Largest expression, in nodes, once repetitions are expanded
+# Every derivative is hashed whole, so compile time grows with its square
+MAX_SIZE = 1 << 12
+
+# Characters with a meaning of their own, escape them with "\" to match them
+SPECIAL = set("|*+?()[].{}\\")
+
+__compiled__: OrderedDict = OrderedDict()
+
+# Regular expressions are nested tuples, always built through the smart
+# constructors below so that equal languages tend to get equal tuples:
+#   EMPTY                     matches nothing
+#   EPSILON                   matches the empty string
+#   ("set", frozenset)        one symbol out of a set
+#   ("cat", head, tail)       concatenation, nested to the right
+#   ("alt", frozenset)        union of two or more expressions
+#   ("star", expression)      Kleene star
+EMPTY = ("empty",)
+EPSILON = ("epsilon",)
+
+
+def symbols(members) -> tuple:
+    members = frozenset(members)
+    return ("set", members) if members else EMPTY
+
+
+# The factors of `head` are put in front of `tail` one by one, from the last
+def cat(head: tuple, tail: tuple) -> tuple:
+    if head == EMPTY or tail == EMPTY:
+        return EMPTY
+    factors = []
+    while head[0] == "cat":
+        factors.append(head[1])
+        head = head[2]
+    if head != EPSILON:
+        factors.append(head)
+    for factor in reversed(factors):
+        tail = factor if tail == EPSILON else ("cat", factor, tail)
+    return tail
+
+
+# Union up to associativity, commutativity and idempotence
+# Single-symbol alternatives are folded into one set
+def alt(*expressions) -> tuple:
+    members = set()
+    merged_symbols = set()
+    for expression in expressions:
+        parts = expression[1] if expression[0] == "alt" else (expression,)
+        for part in parts:
+            if part[0] == "set":
+                merged_symbols |= part[1]
+            elif part != EMPTY:
+                members.add(part)
+    if merged_symbols:
+        members.add(symbols(merged_symbols))
+    if not members:
+        return EMPTY
+    if len(members) == 1:
+        return members.pop()
+    return ("alt", frozenset(members))
+
+
+def star(expression: tuple) -> tuple:
+    if expression in (EMPTY, EPSILON):
+        return EPSILON
+    if expression[0] == "star":
+        return expression
+    return ("star", expression)
+
+
+# Number of nodes of an expression, counting stops above `limit`
+def size(expression: tuple, limit: int = MAX_SIZE) -> int:
+    count = 0
+    stack = [expression]
+    while stack and count <= limit:
+        current = stack.pop()
+        count += 1
+        if current[0] == "cat":
+            stack.extend(current[1:])
+        elif current[0] == "alt":
+            stack.extend(current[1])
+        elif current[0] == "star":
+            stack.append(current[1])
+    return count
+
+
+def nullable(expression: tuple) -> bool:
+    kind = expression[0]
+    if kind in ("epsilon", "star"):
+        return True
+    if kind == "cat":
+        return nullable(expression[1]) and nullable(expression[2])
+    if kind == "alt":
+        return any(nullable(member) for member in expression[1])
+    return False
+
+
+# Brzozowski derivative: the expression matching w wherever `expression`
+# matches symbol + w
+def derivative(expression: tuple, symbol: str) -> tuple:
+    kind = expression[0]
+    if kind == "set":
+        return EPSILON if symbol in expression[1] else EMPTY
+    if kind == "cat":
+        head, tail = expression[1], expression[2]
+        result = cat(derivative(head, symbol), tail)
+        if nullable(head):
+            result = alt(result, derivative(tail, symbol))
+        return result
+    if kind == "alt":
+        return alt(*(derivative(member, symbol) for member in expression[1]))
+    if kind == "star":
+        return cat(derivative(expression[1], symbol), expression)
+    return EMPTY
+
+
+# Recursive descent parser
+#   alternation := concatenation ("|" concatenation)*
+#   concatenation := repetition*
+#   repetition := atom ("*" | "+" | "?" | "{m}" | "{m,}" | "{m,n}")*
+#   atom := symbol | "\" symbol | "." | "[" class "]" | "(" alternation ")"
+# "." and negated classes "[^...]" range over the alphabet
+# Raise ValueError on malformed patterns
+class Parser:
+    def __init__(self, pattern: str, alphabet: tuple):
+        self.pattern: str = pattern
+        self.alphabet: tuple = alphabet
+        self.position: int = 0
+        # Symbols named in the pattern, in order of first appearance
+        self.named: dict = {}
+        # Symbols matched on their own, outside classes
+        self.literals: set = set()
+
+    def parse(self) -> tuple:
+        expression = self.alternation()
+        if self.position < len(self.pattern):
+            self.error(f"Unexpected {self.pattern[self.position]!r}")
+        if size(expression) > MAX_SIZE:
+            self.error(f"Pattern expands to more than {MAX_SIZE} nodes")
+        return expression
+
+    def error(self, message: str):
+        raise ValueError(f"{message} at position {self.position} of the pattern")
+
+    def peek(self) -> str:
+        if self.position < len(self.pattern):
+            return self.pattern[self.position]
+        return ""
+
+    def take(self) -> str:
+        char = self.peek()
+        if not char:
+            self.error("Unexpected end")
+        self.position += 1
+        return char
+
+    def alternation(self) -> tuple:
+        branches = [self.concatenation()]
+        while self.peek() == "|":
+            self.position += 1
+            branches.append(self.concatenation())
+        return alt(*branches)
+
+    def concatenation(self) -> tuple:
+        expression = EPSILON
+        factors = []
+        while self.peek() and self.peek() not in "|)":
+            factors.append(self.repetition())
+        for factor in reversed(factors):
+            expression = cat(factor, expression)
+        return expression
+
+    def repetition(self) -> tuple:
+        expression = self.atom()
+        while self.peek() and self.peek() in "*+?{":
+            operator = self.take()
+            if operator == "*":
+                expression = star(expression)
+            elif operator == "+":
+                expression = cat(expression, star(expression))
+            elif operator == "?":
+                expression = alt(expression, EPSILON)
+            else:
+                expression = self.bounded(expression)
+        return expression
+
+    # {m}, {m,} and {m,n}, expanded into concatenations
+    def bounded(self, expression: tuple) -> tuple:
+        closing = self.pattern.find("}", self.position)
+        if closing == -1:
+            self.error("Unterminated {")
+        bounds = self.pattern[self.position : closing].split(",")
+        if len(bounds) > 2 or not all(b.strip().isdigit() for b in bounds[:1]):
+            self.error("Malformed {m,n}")
+        low = int(bounds[0])
+        high = low
+        if len(bounds) == 2:
+            high = int(bounds[1]) if bounds[1].strip() else None
+            if bounds[1].strip() and not bounds[1].strip().isdigit():
+                self.error("Malformed {m,n}")
+        if high is not None and high < low:
+            self.error("Empty {m,n} range")
+        if max(low, high or 0) > MAX_REPEAT:
+            self.error(f"Repetitions are limited to {MAX_REPEAT}")
+        if max(low, high or 0) * size(expression) > MAX_SIZE:
+            self.error(f"Pattern expands to more than {MAX_SIZE} nodes")
+        self.position = closing + 1
+
+        # Built from the end, so each cat() only walks one copy
+        if high is None:
+            result = star(expression)
+        else:
+            result = EPSILON
+            for _ in range(high - low):
+                result = alt(EPSILON, cat(expression, result))
+        for _ in range(low):
+            result = cat(expression, result)
+        return result
+
+    def atom(self) -> tuple:
+        char = self.take()
+        if char == "(":
+            expression = self.alternation()
+            if self.peek() != ")":
+                self.error("Missing )")
+            self.position += 1
+            return expression
+        if char == "[":
+            return self.character_class()
+        if char == ".":
+            return symbols(self.alphabet)
+        if char == "\\":
+            char = self.take()
+        elif char in SPECIAL:
+            self.position -= 1
+            self.error(f"Unexpected {char!r}")
+        self.named.setdefault(char)
+        self.literals.add(char)
+        return symbols(char)
+
+    def character_class(self) -> tuple:
+        negated = self.peek() == "^"
+        if negated:
+            self.position += 1
+        members = set()
+        while self.peek() != "]":
+            char = self.take()
+            if char == "\\":
+                char = self.take()
+            # Range a-z, a trailing "-" is a literal
+            following = self.pattern[self.position + 1 : self.position + 2]
+            if self.peek() == "-" and following not in ("", "]"):
+                self.position += 1
+                end = self.take()
+                if end == "\\":
+                    end = self.take()
+                if ord(end) < ord(char):
+                    self.error(f"Empty range {char}-{end}")
+                members.update(chr(c) for c in range(ord(char), ord(end) + 1))
+            else:
+                members.add(char)
+        self.position += 1
+        for member in sorted(members):
+            self.named.setdefault(member)
+        # Ranges are cut down to the alphabet
+        if negated:
+            return symbols(set(self.alphabet) - members)
+        return symbols(members & set(self.alphabet))
+
+
+# Explore the derivatives of an expression, one DFA state per distinct one
+# The EMPTY derivative becomes a missing transition
+# Raise ValueError when more than `max_states` derivatives show up
+def derivative_dfa(
+    expression: tuple, alphabet: tuple, max_states: int = MAX_STATES
+) -> "DFA":
+    from lib.dfa import DFA
+
+    state_ids = {expression: 0}
+    expressions = [expression]
+    rules = {}
+
+    # `expressions` doubles as the worklist
+    for current in expressions:
+        for symbol in alphabet:
+            next_expression = derivative(current, symbol)
+            if next_expression == EMPTY:
+                continue
+            if next_expression not in state_ids:
+                if len(expressions) >= max_states:
+                    raise ValueError(f"Pattern needs more than {max_states} states")
+                state_ids[next_expression] = len(expressions)
+                expressions.append(next_expression)
+            rules[(f"q{state_ids[current]}", symbol)] = f"q{state_ids[next_expression]}"
+
+    states = tuple(f"q{i}" for i in range(len(expressions)))
+    return DFA(
+        alphabet=alphabet,
+        states=states,
+        initial_state="q0",
+        final_states=tuple(
+            state for state, current in zip(states, expressions) if nullable(current)
+        ),
+        rules=MappingProxyType(rules),
+    )
+
+
+# Give the states of a DFA the names q0, q1, ... in state order
+def renumbered(dfa) -> "DFA":
+    from lib.dfa import DFA
+
+    names = {state: f"q{i}" for i, state in enumerate(dfa.states)}
+    return DFA(
+        alphabet=dfa.alphabet,
+        states=tuple(names.values()),
+        initial_state=names[dfa.initial_state],
+        final_states=tuple(names[state] for state in dfa.final_states),
+        rules=MappingProxyType(
+            {
+                (names[state], symbol): names[next_state]
+                for (state, symbol), next_state in dfa.rules.items()
+            }
+        ),
+    )
+
+
+# Compile a regular expression to a minimized DFA over `alphabet`
+# (default: the symbols named in the pattern, classes with all their members)
+# Compiled DFAs are cached per (pattern, alphabet); every call gets its own
+# shallow copy, so validation traces are not shared between callers
+# Raise ValueError on malformed patterns, and on patterns too large or too
+# deeply nested to compile, see MAX_STATES / MAX_REPEAT
+def compile_regex(
+    pattern: str, alphabet: tuple = None, max_states: int = MAX_STATES
+) -> "DFA":
+    try:
+        return __compile__(pattern, alphabet, max_states)
+    except RecursionError:
+        raise ValueError("Pattern is nested too deeply") from None
+
+
+def __compile__(pattern: str, alphabet: tuple, max_states: int) -> "DFA":
+    if alphabet is None:
+        parser = Parser(pattern, ())
+        parser.parse()
+        alphabet = tuple(parser.named)
+    alphabet = tuple(alphabet)
+    for symbol in alphabet:
+        if not isinstance(symbol, str) or len(symbol) != 1:
+            raise ValueError(f"Alphabet symbols must be single characters: {symbol!r}")
+
+    key = (pattern, alphabet)
+    if key in __compiled__:
+        __compiled__.move_to_end(key)
+    else:
+        parser = Parser(pattern, alphabet)
+        expression = parser.parse()
+        # Literals have to be in the alphabet, classes are cut down to it
+        unknown = parser.literals - set(alphabet)
+        if unknown:
+            raise ValueError(f"Symbols outside the alphabet: {sorted(unknown)}")
+        dfa = renumbered(derivative_dfa(expression, alphabet, max_states).minimize())
+        __compiled__[key] = dfa
+        if len(__compiled__) > CACHE_SIZE:
+            __compiled__.popitem(last=False)
+    return copy.copy(__compiled__[key])
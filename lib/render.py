@@ -0,0 +1,456 @@
+import errno
+import hashlib
+import os
+import re
+import subprocess
+import time
+from collections import OrderedDict, deque
+
+from graphviz import Digraph, ExecutableNotFound
+
+# Number of DFA structures whose graph template / layout is kept around
+CACHE_SIZE = 64
+
+# render_bounded() settings
+DEFAULT_TIME_BUDGET = 5.0
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "finite-automata-toolkit", "svg"
+)
+# Bytes of SVG kept in the cache directory, least recently used files go first
+DISK_CACHE_BYTES = 64 << 20
+# Above this many states dot is skipped in favour of sfdp
+DOT_LIMIT = 300
+# States shown by the last-resort neighbourhood view
+NEIGHBOURHOOD_LIMIT = 60
+
+__templates__: OrderedDict = OrderedDict()
+__svg_layouts__: OrderedDict = OrderedDict()
+
+# <g id="..." class="node|edge"> ... </g> groups of a Graphviz SVG
+SVG_GROUP = re.compile(r'<g id="([^"]+)" class="(?:node|edge)">.*?</g>', re.DOTALL)
+
+
+# Hash of everything create_dfa() draws, style attributes included
+def structure_key(dfa) -> str:
+    structure = (
+        tuple(dfa.alphabet),
+        tuple(dfa.states),
+        dfa.initial_state,
+        tuple(dfa.final_states),
+        tuple(dfa.rules.items()),
+        tuple(
+            tuple(sorted(attrs.items()))
+            for attrs in (
+                dfa.default_state_attrs,
+                dfa.traced_default_state_attrs,
+                dfa.final_state_attrs,
+                dfa.traced_final_state_attrs,
+                dfa.edge_attrs,
+                dfa.traced_edge_attrs,
+            )
+        ),
+    )
+    return hashlib.blake2b(repr(structure).encode(), digest_size=16).hexdigest()
+
+
+# Small LRU on top of an OrderedDict
+def __cache_get__(cache: OrderedDict, key: str, build):
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = build()
+    cache[key] = value
+    if len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+# Pre-rendered DOT statements of a DFA, in a plain and a traced variant
+# Tracing a validation only swaps the statements of the affected nodes and
+# edges, nothing is rebuilt
+class GraphTemplate:
+    def __init__(self, dfa):
+        # Every statement is produced once by graphviz itself, for quoting
+        scratch = Digraph("DFA")
+        scratch.attr(rankdir="LR", size="8.5")
+
+        # Start node (invisible) to create an initial state's input edge
+        scratch.attr("node", shape="none", height="0", width="0")
+        scratch.node("", label="")
+        self.head: list = list(scratch.body)
+
+        def statement(add, *args, **attrs) -> str:
+            add(*args, **attrs)
+            return scratch.body.pop()
+
+        # Add states, each with its own id so SVG groups can be found again
+        self.node_ids: dict = {}
+        self.nodes: list = []
+        for i, state in enumerate(dict.fromkeys(dfa.states)):
+            node_id = f"state_{i}"
+            if state in dfa.final_states:
+                attrs, traced_attrs = (
+                    dfa.final_state_attrs,
+                    dfa.traced_final_state_attrs,
+                )
+            else:
+                attrs, traced_attrs = (
+                    dfa.default_state_attrs,
+                    dfa.traced_default_state_attrs,
+                )
+            self.node_ids[state] = node_id
+            self.nodes.append(
+                (
+                    state,
+                    statement(scratch.node, str(state), id=node_id, **attrs),
+                    statement(scratch.node, str(state), id=node_id, **traced_attrs),
+                )
+            )
+
+        # Add start arrow
+        self.initial_state = dfa.initial_state
+        self.start: tuple = (
+            statement(
+                scratch.edge,
+                "",
+                str(dfa.initial_state),
+                id="start",
+                arrowsize="1",
+                **dfa.edge_attrs,
+            ),
+            statement(
+                scratch.edge,
+                "",
+                str(dfa.initial_state),
+                id="start",
+                arrowsize="1",
+                **dfa.traced_edge_attrs,
+            ),
+        )
+
+        # Group transitions
+        grouped_transitions = {}
+        for (state, symbol), next_state in dfa.rules.items():
+            grouped_transitions.setdefault((state, next_state), []).append(symbol)
+
+        # Add edges
+        self.edge_ids: list = []
+        self.edges: list = []
+        for i, ((src, dst), symbols) in enumerate(grouped_transitions.items()):
+            # Sort and join symbols
+            if len(symbols) == 1:
+                label = symbols[0]
+            else:
+                label = ", ".join(sorted(symbols))
+
+            # Style self-loops differently
+            extra = {"constraint": "false"} if src == dst else {}
+            edge_id = f"edge_{i}"
+            self.edge_ids.append(edge_id)
+            self.edges.append(
+                (
+                    src,
+                    dst,
+                    symbols,
+                    statement(
+                        scratch.edge,
+                        str(src),
+                        str(dst),
+                        id=edge_id,
+                        label=label,
+                        **extra,
+                        **dfa.edge_attrs,
+                    ),
+                    statement(
+                        scratch.edge,
+                        str(src),
+                        str(dst),
+                        id=edge_id,
+                        label=label,
+                        **extra,
+                        **dfa.traced_edge_attrs,
+                    ),
+                )
+            )
+
+        self.plain_body: list = (
+            self.head
+            + [plain for _, plain, _ in self.nodes]
+            + [self.start[0]]
+            + [plain for _, _, _, plain, _ in self.edges]
+        )
+
+    # Which node / edge ids a validation trace touches
+    # Return form: (traced node ids, traced edge ids), including "start"
+    def traced_ids(self, traced_states, traced_rules: dict) -> tuple:
+        traced_states = set(traced_states)
+        node_ids = {
+            self.node_ids[state] for state in traced_states if state in self.node_ids
+        }
+        edge_ids = {"start"}
+        for edge_id, (src, _, symbols, _, _) in zip(self.edge_ids, self.edges):
+            if any((src, symbol) in traced_rules for symbol in symbols):
+                edge_ids.add(edge_id)
+        return node_ids, edge_ids
+
+    # Assemble a Digraph, optionally highlighting a validation trace
+    # `subset` restricts the graph to some states and the edges between them
+    def graph(
+        self, traced_states=None, traced_rules: dict = None, subset=None
+    ) -> Digraph:
+        dfa = Digraph("DFA")
+        if traced_states is None and subset is None:
+            dfa.body = list(self.plain_body)
+            return dfa
+
+        if traced_states is None:
+            node_ids, edge_ids = set(), set()
+        else:
+            node_ids, edge_ids = self.traced_ids(traced_states, traced_rules or {})
+        body = list(self.head)
+        for state, plain, traced in self.nodes:
+            if subset is None or state in subset:
+                body.append(traced if self.node_ids[state] in node_ids else plain)
+        if subset is None or self.initial_state in subset:
+            body.append(self.start[1] if "start" in edge_ids else self.start[0])
+        for edge_id, (src, dst, _, plain, traced) in zip(self.edge_ids, self.edges):
+            if subset is None or (src in subset and dst in subset):
+                body.append(traced if edge_id in edge_ids else plain)
+        dfa.body = body
+        return dfa
+
+
+# Cached GraphTemplate for a DFA's structure
+def get_template(dfa) -> GraphTemplate:
+    return __cache_get__(
+        __templates__, dfa.__structure_key__(), lambda: GraphTemplate(dfa)
+    )
+
+
+# Lay out DOT source as SVG within `timeout` seconds
+# Results are kept in memory and, if `cache_dir` is set, on disk
+# Return form: [text, (group id, group text), text, ...], split on node /
+# edge groups so they can be recoloured without another layout
+def __laid_out__(source: str, engine: str, timeout=None, cache_dir=None) -> list:
+    key = hashlib.blake2b(f"{engine}\n{source}".encode(), digest_size=16).hexdigest()
+
+    def build() -> list:
+        svg = None
+        cache_path = os.path.join(cache_dir, f"{key}.svg") if cache_dir else None
+        if cache_path:
+            try:
+                with open(cache_path, encoding="utf-8") as file:
+                    svg = file.read()
+                # The modification time orders the files for eviction
+                os.utime(cache_path)
+            except FileNotFoundError:
+                pass
+        if svg is None:
+            svg = __run_layout__(source, engine, timeout)
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                # Write then rename, so readers never see half a file
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as file:
+                    file.write(svg)
+                os.replace(temp_path, cache_path)
+                __evict_files__(cache_dir, DISK_CACHE_BYTES)
+
+        pieces = []
+        position = 0
+        for match in SVG_GROUP.finditer(svg):
+            pieces.append(svg[position : match.start()])
+            pieces.append((match.group(1), match.group(0)))
+            position = match.end()
+        pieces.append(svg[position:])
+        return pieces
+
+    return __cache_get__(__svg_layouts__, key, build)
+
+
+# Run a Graphviz layout engine on DOT source
+# Raise ExecutableNotFound without a Graphviz install,
+# subprocess.TimeoutExpired / CalledProcessError if the layout fails
+def __run_layout__(source: str, engine: str, timeout=None) -> str:
+    command = ["dot", f"-K{engine}", "-Tsvg"]
+    try:
+        process = subprocess.run(
+            command,
+            input=source.encode(),
+            capture_output=True,
+            timeout=timeout,
+            check=True,
+        )
+    except OSError as error:
+        if error.errno == errno.ENOENT:
+            raise ExecutableNotFound(command) from error
+        raise
+    return process.stdout.decode("utf-8")
+
+
+# Delete the least recently used SVG files of `cache_dir` until the rest
+# fits in `max_bytes`
+# Files may vanish under other processes' evictions, those are skipped
+def __evict_files__(cache_dir: str, max_bytes: int) -> None:
+    files = []
+    total = 0
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".svg"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    files.sort()
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# Join laid-out SVG pieces, recolouring traced node / edge groups
+def __recolour__(dfa, pieces: list, node_ids: set, edge_ids: set) -> str:
+    node_colors = (
+        f'stroke="{dfa.default_state_attrs["color"]}"',
+        f'stroke="{dfa.traced_default_state_attrs["color"]}"',
+    )
+    edge_colors = (dfa.edge_attrs["color"], dfa.traced_edge_attrs["color"])
+
+    svg = []
+    for piece in pieces:
+        if isinstance(piece, str):
+            svg.append(piece)
+            continue
+        group_id, text = piece
+        if group_id in node_ids:
+            text = text.replace(*node_colors)
+        elif group_id in edge_ids:
+            # Edge line and arrowhead
+            text = text.replace(
+                f'stroke="{edge_colors[0]}"', f'stroke="{edge_colors[1]}"'
+            ).replace(f'fill="{edge_colors[0]}"', f'fill="{edge_colors[1]}"')
+        svg.append(text)
+    return "".join(svg)
+
+
+# Node / edge ids to recolour for the DFA's current trace
+def __trace_ids__(dfa, template: GraphTemplate, validation_trace: bool) -> tuple:
+    if not validation_trace:
+        return set(), set()
+    return template.traced_ids(dfa.__traced_states__, dfa.__traced_rules__)
+
+
+# SVG of a DFA, laid out once per structure and engine
+# Tracing recolours the affected groups of the cached SVG, layout is not rerun
+def render_svg(dfa, validation_trace: bool = False, engine: str = "dot") -> str:
+    template = get_template(dfa)
+    pieces = __laid_out__(str(template.graph()), engine)
+    return __recolour__(dfa, pieces, *__trace_ids__(dfa, template, validation_trace))
+
+
+# States that cannot reach a final state
+def __dead_states__(dfa) -> set:
+    predecessors = {}
+    for (state, _), next_state in dfa.rules.items():
+        predecessors.setdefault(next_state, []).append(state)
+    alive = set(dfa.final_states)
+    queue = deque(alive)
+    while queue:
+        for prev_state in predecessors.get(queue.popleft(), ()):
+            if prev_state not in alive:
+                alive.add(prev_state)
+                queue.append(prev_state)
+    return {state for state in dfa.states if state not in alive}
+
+
+# At most `limit` states around the trace (or the initial state), BFS order
+def __neighbourhood__(dfa, validation_trace: bool, limit: int) -> set:
+    successors = {}
+    for (state, _), next_state in dfa.rules.items():
+        successors.setdefault(state, []).append(next_state)
+
+    if validation_trace and dfa.__traced_states__:
+        seeds = list(dict.fromkeys(dfa.__traced_states__))[:limit]
+    else:
+        seeds = [dfa.initial_state]
+    shown = set(seeds)
+    queue = deque(seeds)
+    while queue and len(shown) < limit:
+        for next_state in successors.get(queue.popleft(), ()):
+            if next_state not in shown and len(shown) < limit:
+                shown.add(next_state)
+                queue.append(next_state)
+    return shown
+
+
+# Render within a time budget, trading detail for speed on large DFAs
+# Levels, tried in order until one finishes in the remaining time:
+#   full graph with dot (small DFAs only), full graph with sfdp,
+#   without dead states, neighbourhood of the trace / initial state
+# Parallel transitions are always bundled into one edge per state pair
+# Return form: (svg, level), svg is None if no level finished in time
+def render_bounded(
+    dfa,
+    validation_trace: bool = False,
+    time_budget: float = DEFAULT_TIME_BUDGET,
+    cache_dir=DEFAULT_CACHE_DIR,
+) -> tuple:
+    template = get_template(dfa)
+    num_states = len(template.nodes)
+    deadline = time.monotonic() + time_budget
+
+    levels = []
+    if num_states <= DOT_LIMIT:
+        levels.append(("full graph", "dot", None))
+    levels.append(("full graph", "sfdp", None))
+    dead = __dead_states__(dfa)
+    if dead:
+        levels.append(
+            (
+                f"{len(dead)} dead state(s) hidden",
+                "sfdp",
+                {state for state in dfa.states if state not in dead},
+            )
+        )
+    neighbourhood = __neighbourhood__(dfa, validation_trace, NEIGHBOURHOOD_LIMIT)
+    levels.append(
+        (
+            f"{len(neighbourhood)} of {num_states} states around the "
+            + ("trace" if validation_trace else "initial state"),
+            "dot",
+            neighbourhood,
+        )
+    )
+
+    levels = [
+        (level, engine, subset)
+        for level, engine, subset in levels
+        if subset is None or len(subset) < num_states
+    ]
+    for i, (level, engine, subset) in enumerate(levels):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # Leave half of the remaining time to the cheaper levels
+        timeout = remaining if i == len(levels) - 1 else remaining / 2
+        try:
+            pieces = __laid_out__(
+                str(template.graph(subset=subset)),
+                engine,
+                timeout=timeout,
+                cache_dir=cache_dir,
+            )
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            continue
+        return (
+            __recolour__(dfa, pieces, *__trace_ids__(dfa, template, validation_trace)),
+            level,
+        )
+    return None, None
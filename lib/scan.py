@@ -0,0 +1,192 @@
+from collections import deque
+
+import numpy as np
+
+from lib.stream import WINDOW_SIZE, iter_chunks
+
+# Find the substrings of a text accepted by a DFA, as (start, end) spans
+# One forward pass simulates the Σ*-prefixed automaton Σ*·L: the states
+# active after position p are those reached from every start offset ≤ p,
+# each tagged with the start offsets that reach it, so the DFA is never
+# restarted from every offset
+# Spans are matched exactly: unlike validate(), nothing is stripped, and the
+# empty string is never reported
+# Offsets count code points for str input and bytes for bytes-like input
+
+
+# Streaming scanner, spans are reported as soon as they are final
+# leftmost-longest (default): non-overlapping spans, the leftmost start
+#   first, then its longest end, scanning on after that end
+# overlapping=True: every accepted span, ordered by end, then start
+class Scanner:
+    def __init__(self, dfa, overlapping: bool = False):
+        self.compiled = dfa.compile()
+        self.overlapping: bool = overlapping
+        self.reset()
+
+    def reset(self) -> None:
+        # Absolute offset of the next symbol to consume
+        self.__position__: int = 0
+        # Leftmost-longest: [(state, earliest start)] in start order
+        # Overlapping: {state: [starts]}
+        self.__active__ = {} if self.overlapping else []
+        # Leftmost-longest: tentative (start, end) matches, non-overlapping
+        # and in order, each waiting on the starts at or before it
+        self.__pending__: deque = deque()
+
+    # Scan the next chunk: str, bytes, bytearray, memoryview or mmap
+    # Return form: (starts, ends) int64 arrays of the spans made final
+    def feed(self, chunk) -> tuple:
+        columns = self.compiled.columns(chunk).tolist()
+        if self.overlapping:
+            return self.__feed_overlapping__(columns)
+        return self.__feed_leftmost__(columns)
+
+    # Spans still open at the end of the input
+    # Return form: (starts, ends) int64 arrays
+    def finish(self) -> tuple:
+        # Nothing alive can extend or replace a tentative match any more
+        pending = [] if self.overlapping else self.__pending__
+        spans = __spans__([start for start, _ in pending], [end for _, end in pending])
+        self.reset()
+        return spans
+
+    # Every symbol is consumed once: a start inside a tentative match is
+    # dropped when that match is found, and the search after it goes on
+    # from the starts made at or after its end while it is still tentative
+    # A later start in the same state as an earlier one is dropped: while
+    # the earlier one lives the later match is tentative, and the earlier
+    # one accepting replaces or extends a match before it
+    def __feed_leftmost__(self, columns: list) -> tuple:
+        rows = self.compiled.__row_lists__()
+        accepting = self.compiled.accepting.tolist()
+        dead = self.compiled.dead
+        initial = self.compiled.initial
+        starts_with = [state != dead for state in rows[initial]]
+        active = self.__active__
+        pending = self.__pending__
+        position = self.__position__
+        starts = []
+        ends = []
+
+        for col in columns:
+            if not active and not starts_with[col]:
+                # Nothing alive and no match starts with this symbol
+                position += 1
+                continue
+            # A match may start here, unless an earlier start already
+            # reached the initial state (same future, higher priority)
+            next_active = []
+            seen = set()
+            if initial not in [state for state, _ in active]:
+                active.append((initial, position))
+            for state, start in active:
+                next_state = rows[state][col]
+                if next_state != dead and next_state not in seen:
+                    seen.add(next_state)
+                    next_active.append((next_state, start))
+            active = next_active
+            position += 1
+
+            # Starts are in order, so the first accepting one is leftmost
+            for index, (state, start) in enumerate(active):
+                if accepting[state]:
+                    # It replaces the tentative matches starting at or after
+                    # it, and the later starts overlap its match
+                    while pending and pending[-1][0] >= start:
+                        pending.pop()
+                    pending.append((start, position))
+                    del active[index + 1 :]
+                    break
+
+            # Final once no earlier or equal start is still alive
+            while pending and (not active or active[0][1] > pending[0][0]):
+                start, end = pending.popleft()
+                starts.append(start)
+                ends.append(end)
+
+        self.__active__ = active
+        self.__position__ = position
+        return __spans__(starts, ends)
+
+    def __feed_overlapping__(self, columns: list) -> tuple:
+        rows = self.compiled.__row_lists__()
+        accepting = self.compiled.accepting.tolist()
+        dead = self.compiled.dead
+        initial = self.compiled.initial
+        starts_with = [state != dead for state in rows[initial]]
+        active = self.__active__
+        position = self.__position__
+        found_starts = []
+        found_ends = []
+
+        for col in columns:
+            if not active and not starts_with[col]:
+                position += 1
+                continue
+            # A match may start here
+            if initial in active:
+                active[initial].append(position)
+            else:
+                active[initial] = [position]
+
+            # Starts reaching the same state share their future: merge the
+            # smaller list into the bigger one
+            next_active = {}
+            for state, starts in active.items():
+                next_state = rows[state][col]
+                if next_state == dead:
+                    continue
+                merged = next_active.get(next_state)
+                if merged is None:
+                    next_active[next_state] = starts
+                elif len(merged) >= len(starts):
+                    merged.extend(starts)
+                else:
+                    starts.extend(merged)
+                    next_active[next_state] = starts
+            active = next_active
+            position += 1
+
+            for state, starts in active.items():
+                if accepting[state]:
+                    found_starts.append(np.sort(np.array(starts, dtype=np.int64)))
+                    found_ends.append(np.full(len(starts), position, dtype=np.int64))
+
+        self.__active__ = active
+        self.__position__ = position
+        if not found_starts:
+            return __spans__([], [])
+        starts = np.concatenate(found_starts)
+        ends = np.concatenate(found_ends)
+        # Several states may accept at the same end
+        order = np.lexsort((starts, ends))
+        return starts[order], ends[order]
+
+
+def __spans__(starts: list, ends: list) -> tuple:
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+# Every span of a whole text / buffer
+# Return form: (starts, ends) int64 arrays
+def scan(dfa, data, overlapping: bool = False) -> tuple:
+    scanner = Scanner(dfa, overlapping=overlapping)
+    found = [scanner.feed(data), scanner.finish()]
+    return (
+        np.concatenate([starts for starts, _ in found]),
+        np.concatenate([ends for _, ends in found]),
+    )
+
+
+# Spans of a file / buffer read in chunks, offsets are in bytes
+# Return form: one (starts, ends) pair of int64 arrays per chunk
+def scan_stream(dfa, source, overlapping: bool = False, chunk_size=WINDOW_SIZE):
+    scanner = Scanner(dfa, overlapping=overlapping)
+    for chunk in iter_chunks(source, chunk_size):
+        spans = scanner.feed(chunk)
+        if len(spans[0]):
+            yield spans
+    spans = scanner.finish()
+    if len(spans[0]):
+        yield spans
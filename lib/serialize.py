@@ -0,0 +1,389 @@
+import json
+import struct
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+
+import numpy as np
+
+# Binary layout, all integers little-endian, every section 8-byte aligned:
+#   header       MAGIC, version, metadata size, num_states, num_symbols, initial
+#   metadata     JSON: {"alphabet": [...]}
+#   delta        int32[num_states, num_symbols], -1 for a missing transition
+#   finals       uint8[num_states], 1 for a final state
+#   name_offsets int64[num_states + 1], into the name blob
+#   names        UTF-8 state names, back to back
+MAGIC = b"FADFA\x00\x00\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIqqq")
+ALIGNMENT = 8
+
+# Marker for a missing transition in the on-disk table
+MISSING = -1
+
+
+def __aligned__(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# Section offsets of a file with the given sizes
+# Return form: {section: (start, end)}
+def __layout__(num_states: int, num_symbols: int, metadata_size: int, names_size: int):
+    sizes = (
+        ("metadata", metadata_size),
+        ("delta", num_states * num_symbols * 4),
+        ("finals", num_states),
+        ("name_offsets", (num_states + 1) * 8),
+        ("names", names_size),
+    )
+    layout = {}
+    offset = HEADER.size
+    for section, size in sizes:
+        offset = __aligned__(offset)
+        layout[section] = (offset, offset + size)
+        offset += size
+    return layout
+
+
+# State names backed by a UTF-8 blob and an offset array
+# Names are decoded on access, nothing is built up front
+class StateNames(Sequence):
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob: np.ndarray = blob
+        self.offsets: np.ndarray = offsets
+        self.__ids__: dict = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("state index out of range")
+        start, end = self.offsets[index : index + 2].tolist()
+        return self.blob[start:end].tobytes().decode()
+
+    # One decode of the whole blob instead of one per name
+    def __iter__(self):
+        data = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            yield data[start:end].decode()
+
+    def __contains__(self, name) -> bool:
+        return name in self.ids()
+
+    def __repr__(self) -> str:
+        return f"StateNames({len(self)} states)"
+
+    # Name -> ID lookup, built on first use only
+    def ids(self) -> dict:
+        if self.__ids__ is None:
+            self.__ids__ = {name: i for i, name in enumerate(self)}
+        return self.__ids__
+
+    def index(self, name, start: int = 0, stop: int = None) -> int:
+        if self.__ids__ is None:
+            i = self.__find__(name)
+        else:
+            i = self.__ids__.get(name, -1)
+        if i == -1:
+            raise ValueError(f"{name!r} is not a state")
+        if i < start or (stop is not None and i >= stop):
+            raise ValueError(f"{name!r} is not in range")
+        return i
+
+    # Single lookup by scanning the blob, cheaper than building ids()
+    def __find__(self, name) -> int:
+        if not isinstance(name, str):
+            return -1
+        encoded = name.encode()
+        if not encoded:
+            empty = np.flatnonzero(np.diff(self.offsets) == 0)
+            return int(empty[0]) if len(empty) else -1
+
+        data = self.blob.tobytes()
+        position = data.find(encoded)
+        while position != -1:
+            # Only a match spanning exactly one name counts
+            i = int(np.searchsorted(self.offsets, position, side="right")) - 1
+            start, end = self.offsets[i : i + 2].tolist()
+            if start == position and end == position + len(encoded):
+                return i
+            position = data.find(encoded, position + 1)
+        return -1
+
+
+# Final states as a view of a per-state flag array
+# Membership is one lookup, the names are only listed when iterated
+class FinalStates(Sequence):
+    def __init__(self, states: StateNames, mask: np.ndarray):
+        self.states: StateNames = states
+        self.mask: np.ndarray = mask
+        self.__positions__: np.ndarray = None
+
+    def positions(self) -> np.ndarray:
+        if self.__positions__ is None:
+            self.__positions__ = np.flatnonzero(self.mask)
+        return self.__positions__
+
+    def __len__(self) -> int:
+        return len(self.positions())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.states[i] for i in self.positions()[index].tolist()]
+        return self.states[int(self.positions()[index])]
+
+    def __contains__(self, name) -> bool:
+        i = self.states.ids().get(name)
+        return i is not None and bool(self.mask[i])
+
+    def __repr__(self) -> str:
+        return f"FinalStates({len(self)} states)"
+
+
+# δ as a read-only (state, symbol) -> next_state mapping over an integer table
+# Used in place of the rules dict, so the table never has to be inflated
+# `states` is a StateNames or any sequence of names, e.g. a tuple
+class TableRules(Mapping):
+    def __init__(self, states, alphabet: tuple, table: np.ndarray):
+        self.states = states
+        self.alphabet: tuple = alphabet
+        # int32[num_states, num_symbols], MISSING for a missing transition
+        self.table: np.ndarray = table
+        self.symbol_columns: dict = {symbol: i for i, symbol in enumerate(alphabet)}
+        self.__size__: int = None
+        self.__ids__: dict = None
+
+    # Name -> row lookup, built on first use only
+    def state_ids(self) -> dict:
+        if self.__ids__ is None:
+            if isinstance(self.states, StateNames):
+                self.__ids__ = self.states.ids()
+            else:
+                self.__ids__ = {state: i for i, state in enumerate(self.states)}
+        return self.__ids__
+
+    def get(self, key, default=None):
+        state, symbol = key
+        i = self.state_ids().get(state)
+        col = self.symbol_columns.get(symbol)
+        if i is None or col is None:
+            return default
+        next_state = int(self.table[i, col])
+        if next_state == MISSING:
+            return default
+        return self.states[next_state]
+
+    def __getitem__(self, key):
+        next_state = self.get(key, MISSING)
+        if next_state == MISSING:
+            raise KeyError(key)
+        return next_state
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    # Keys in state order, then alphabet order
+    def __iter__(self):
+        rows = np.flatnonzero((self.table != MISSING).any(axis=1))
+        for i in rows.tolist():
+            state = self.states[i]
+            for col, next_state in enumerate(self.table[i].tolist()):
+                if next_state != MISSING:
+                    yield (state, self.alphabet[col])
+
+    # Row by row instead of one lookup per key
+    def items(self):
+        names = list(self.states)
+        for i, row in enumerate(self.table.tolist()):
+            for col, next_state in enumerate(row):
+                if next_state != MISSING:
+                    yield (names[i], self.alphabet[col]), names[next_state]
+
+    def __len__(self) -> int:
+        if self.__size__ is None:
+            self.__size__ = int((self.table != MISSING).sum())
+        return self.__size__
+
+    def __repr__(self) -> str:
+        return f"TableRules({len(self.states)} states, {len(self.alphabet)} symbols)"
+
+
+# Integer table of δ, MISSING for missing transitions
+# Lazy views from load_dfa() are used as they are, nothing is inflated
+# Return form: (table, final_mask)
+def integer_table(states, alphabet, final_states, rules) -> tuple:
+    state_ids = None
+    if isinstance(rules, TableRules) and rules.states is states:
+        table = rules.table
+    else:
+        state_ids = {state: i for i, state in enumerate(states)}
+        symbol_columns = {symbol: i for i, symbol in enumerate(alphabet)}
+        table = np.full((len(state_ids), len(symbol_columns)), MISSING, dtype=np.int32)
+        for (state, symbol), next_state in rules.items():
+            i = state_ids.get(state)
+            col = symbol_columns.get(symbol)
+            if i is not None and col is not None:
+                table[i, col] = state_ids[next_state]
+
+    if isinstance(final_states, FinalStates) and final_states.states is states:
+        final_mask = np.asarray(final_states.mask, dtype=bool)
+    else:
+        if state_ids is None:
+            state_ids = {state: i for i, state in enumerate(states)}
+        final_mask = np.zeros(len(states), dtype=bool)
+        for state in final_states:
+            final_mask[state_ids[state]] = True
+    return table, final_mask
+
+
+# Write a DFA in the binary layout described at the top of this module
+def save_dfa(dfa, path) -> None:
+    alphabet = tuple(dfa.alphabet)
+    table, final_mask = integer_table(dfa.states, alphabet, dfa.final_states, dfa.rules)
+    states = dfa.states
+
+    if isinstance(states, StateNames):
+        names = states.blob
+        name_offsets = states.offsets
+    else:
+        encoded = [state.encode() for state in states]
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+        names = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    metadata = json.dumps({"alphabet": list(alphabet)}).encode()
+    num_states, num_symbols = len(states), len(alphabet)
+    layout = __layout__(num_states, num_symbols, len(metadata), len(names))
+    sections = {
+        "metadata": metadata,
+        "delta": np.ascontiguousarray(table, dtype="<i4"),
+        "finals": np.asarray(final_mask, dtype=np.uint8),
+        "name_offsets": np.asarray(name_offsets, dtype="<i8"),
+        "names": np.asarray(names, dtype=np.uint8),
+    }
+
+    with open(path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                len(metadata),
+                num_states,
+                num_symbols,
+                dfa.states.index(dfa.initial_state),
+            )
+        )
+        for section, (start, end) in layout.items():
+            file.write(b"\x00" * (start - file.tell()))
+            data = sections[section]
+            file.write(data if isinstance(data, bytes) else data.tobytes())
+
+
+# Read a file written by save_dfa()
+# mmap=True maps the file read-only, so loading costs no copy of δ and stays
+# in the milliseconds for any size; the returned DFA uses lazy views for its
+# states, final states and rules
+def load_dfa(path, mmap: bool = True) -> "DFA":
+    from lib.dfa import DFA
+
+    if mmap:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        data = np.fromfile(path, dtype=np.uint8)
+
+    magic, version, metadata_size, num_states, num_symbols, initial = HEADER.unpack(
+        data[: HEADER.size].tobytes()
+    )
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a DFA file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported DFA file version: {version}")
+
+    layout = __layout__(num_states, num_symbols, metadata_size, 0)
+    metadata_start, metadata_end = layout["metadata"]
+    metadata = json.loads(data[metadata_start:metadata_end].tobytes())
+    alphabet = tuple(metadata["alphabet"])
+
+    offsets_start, offsets_end = layout["name_offsets"]
+    name_offsets = data[offsets_start:offsets_end].view("<i8")
+    names_start = layout["names"][0]
+    names = data[names_start : names_start + int(name_offsets[-1])]
+
+    delta_start, delta_end = layout["delta"]
+    table = data[delta_start:delta_end].view("<i4").reshape(num_states, num_symbols)
+    finals_start, finals_end = layout["finals"]
+    final_mask = data[finals_start:finals_end].view(bool)
+
+    states = StateNames(names, name_offsets)
+    return DFA(
+        alphabet=alphabet,
+        states=states,
+        initial_state=states[initial],
+        final_states=FinalStates(states, final_mask),
+        rules=TableRules(states, alphabet, table),
+    )
+
+
+# JSON interchange form, as exchanged with the Streamlit UI
+# {"alphabet": [...], "states": [...], "initial_state": ...,
+#  "final_states": [...], "transitions": {state: {symbol: next_state}}}
+def dfa_to_json(dfa, indent: int = None) -> str:
+    transitions = {}
+    for (state, symbol), next_state in dfa.rules.items():
+        transitions.setdefault(state, {})[symbol] = next_state
+    return json.dumps(
+        {
+            "alphabet": list(dfa.alphabet),
+            "states": list(dfa.states),
+            "initial_state": dfa.initial_state,
+            "final_states": list(dfa.final_states),
+            "transitions": transitions,
+        },
+        indent=indent,
+        ensure_ascii=False,
+    )
+
+
+# Inverse of dfa_to_json()
+# Raise ValueError for documents that don't describe a DFA
+def dfa_from_json(text) -> "DFA":
+    from lib.dfa import DFA
+
+    document = json.loads(text)
+    try:
+        alphabet = tuple(document["alphabet"])
+        states = tuple(document["states"])
+        initial_state = document["initial_state"]
+        final_states = tuple(document["final_states"])
+        transitions = document["transitions"]
+    except (KeyError, TypeError) as error:
+        raise ValueError(f"Missing DFA field: {error}") from None
+
+    known_states = set(states)
+    if initial_state not in known_states:
+        raise ValueError(f"Unknown initial state: {initial_state}")
+    for state in final_states:
+        if state not in known_states:
+            raise ValueError(f"Unknown final state: {state}")
+
+    rules = {}
+    for state, row in transitions.items():
+        for symbol, next_state in row.items():
+            if state not in known_states or next_state not in known_states:
+                raise ValueError(f"Unknown state in transition: {state}, {symbol}")
+            if symbol not in alphabet:
+                raise ValueError(f"Unknown symbol in transition: {symbol}")
+            rules[(state, symbol)] = next_state
+
+    return DFA(
+        alphabet=alphabet,
+        states=states,
+        initial_state=initial_state,
+        final_states=final_states,
+        rules=MappingProxyType(rules),
+    )
@@ -0,0 +1,363 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+# Validation service over HTTP/1.1, on TCP or a Unix socket
+#   GET  /dfas                 loaded DFA IDs with their sizes
+#   POST /dfas/<id>/validate   {"input": "..."} or {"inputs": [...]}
+#                              -> {"accepted": bool} or {"accepted": [...]}
+#   GET  /metrics              queue depth, batch sizes and latencies
+#   GET  /health
+# Requests for the same DFA that arrive within BATCH_WINDOW of each other are
+# answered from one DFA.validate_many() pass, which gives the same verdicts
+# as DFA.validate() on every string
+# Connections are kept alive (HTTP/1.1 default) until the client closes them,
+# sends "Connection: close" or stays idle for IDLE_TIMEOUT
+
+# Seconds a batch stays open for more requests after its first one
+BATCH_WINDOW = 0.002
+# A batch is closed early once it holds this many strings
+MAX_BATCH = 1 << 14
+# Seconds a kept-alive connection may wait for its next request
+IDLE_TIMEOUT = 30.0
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 24
+# Latencies kept for the percentiles of /metrics
+LATENCY_WINDOW = 10_000
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status: int = status
+
+
+# Counters and recent latencies of a running service
+class ServiceMetrics:
+    def __init__(self):
+        self.started: float = time.monotonic()
+        self.requests: int = 0
+        self.errors: int = 0
+        self.strings: int = 0
+        self.batches: int = 0
+        self.connections: int = 0
+        # Requests waiting for or inside a validation pass
+        self.queue_depth: int = 0
+        self.max_queue_depth: int = 0
+        # Seconds from a request's body being read to its response being ready
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def enqueued(self) -> None:
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def as_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(fraction * len(latencies)))
+            return round(latencies[index] * 1000, 3)
+
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "strings": self.strings,
+            "batches": self.batches,
+            "mean_batch_size": (
+                round(sum(self.batch_sizes) / len(self.batch_sizes), 2)
+                if self.batch_sizes
+                else None
+            ),
+            "connections": self.connections,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": percentile(1.0),
+            },
+        }
+
+
+# Collects the validation requests of one DFA into batches
+# The DFA is compiled once and stays resident
+class Batcher:
+    def __init__(
+        self,
+        dfa,
+        metrics: ServiceMetrics,
+        window: float = BATCH_WINDOW,
+        max_batch: int = MAX_BATCH,
+    ):
+        self.dfa = dfa
+        self.dfa.compile()
+        self.metrics: ServiceMetrics = metrics
+        self.window: float = window
+        self.max_batch: int = max_batch
+        # (strings, future) per waiting request
+        self.__pending__: asyncio.Queue = asyncio.Queue()
+        self.__task__: asyncio.Task = None
+
+    # Return form: list of verdicts, one per string
+    async def validate(self, strings: list) -> list:
+        if self.__task__ is None:
+            self.__task__ = asyncio.create_task(self.__run__())
+        future = asyncio.get_running_loop().create_future()
+        self.metrics.enqueued()
+        await self.__pending__.put((strings, future))
+        try:
+            return await future
+        finally:
+            self.metrics.queue_depth -= 1
+
+    async def __run__(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.__pending__.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.window
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.__pending__.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            strings = [string for item_strings, _ in batch for string in item_strings]
+            try:
+                # Off the event loop, so connections keep being served meanwhile
+                verdicts = await loop.run_in_executor(
+                    None, self.dfa.validate_many, strings
+                )
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            verdicts = verdicts.tolist()
+
+            self.metrics.batches += 1
+            self.metrics.batch_sizes.append(len(strings))
+            self.metrics.strings += len(strings)
+            start = 0
+            for item_strings, future in batch:
+                if not future.done():
+                    future.set_result(verdicts[start : start + len(item_strings)])
+                start += len(item_strings)
+
+    async def close(self) -> None:
+        if self.__task__ is not None:
+            self.__task__.cancel()
+            try:
+                await self.__task__
+            except asyncio.CancelledError:
+                pass
+            self.__task__ = None
+
+
+# Serves the DFAs of `dfas` ({id: DFA}) with one Batcher each
+class ValidationService:
+    def __init__(
+        self, dfas: dict, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH
+    ):
+        self.metrics: ServiceMetrics = ServiceMetrics()
+        self.dfas: dict = dict(dfas)
+        self.batchers: dict = {
+            dfa_id: Batcher(dfa, self.metrics, window, max_batch)
+            for dfa_id, dfa in self.dfas.items()
+        }
+
+    # Return form: (status, JSON-serializable body)
+    async def handle(self, method: str, path: str, body: bytes) -> tuple:
+        parts = [part for part in path.split("?", 1)[0].split("/") if part]
+        if parts == ["health"]:
+            return 200, {"status": "ok"}
+        if parts == ["metrics"]:
+            return 200, self.metrics.as_dict()
+        if parts == ["dfas"]:
+            return 200, {
+                dfa_id: {"states": len(dfa.states), "symbols": len(dfa.alphabet)}
+                for dfa_id, dfa in self.dfas.items()
+            }
+        if len(parts) == 3 and parts[0] == "dfas" and parts[2] == "validate":
+            if method != "POST":
+                raise RequestError(405, "Use POST")
+            return 200, await self.validate(parts[1], body)
+        raise RequestError(404, f"No such resource: {path}")
+
+    async def validate(self, dfa_id: str, body: bytes) -> dict:
+        batcher = self.batchers.get(dfa_id)
+        if batcher is None:
+            raise RequestError(404, f"Unknown DFA: {dfa_id}")
+        try:
+            document = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise RequestError(400, "Body must be JSON") from None
+
+        single = isinstance(document, dict) and "input" in document
+        if single:
+            strings = [document["input"]]
+        elif isinstance(document, dict) and isinstance(document.get("inputs"), list):
+            strings = document["inputs"]
+        else:
+            raise RequestError(400, 'Expected {"input": ...} or {"inputs": [...]}')
+        if not all(isinstance(string, str) for string in strings):
+            raise RequestError(400, "Inputs must be strings")
+
+        verdicts = await batcher.validate(strings)
+        return {"accepted": verdicts[0] if single else verdicts}
+
+    # One connection, any number of requests
+    async def serve_connection(self, reader, writer) -> None:
+        self.metrics.connections += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except RequestError as error:
+                    self.metrics.errors += 1
+                    await write_response(
+                        writer, error.status, {"error": str(error)}, False
+                    )
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+
+                start = time.perf_counter()
+                self.metrics.requests += 1
+                try:
+                    status, response = await self.handle(method, path, body)
+                except RequestError as error:
+                    status, response = error.status, {"error": str(error)}
+                except Exception as error:
+                    status, response = 500, {"error": str(error)}
+                if status != 200:
+                    self.metrics.errors += 1
+                self.metrics.latencies.append(time.perf_counter() - start)
+
+                await write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.metrics.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def close(self) -> None:
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+
+# Read one HTTP/1.x request
+# Return form: (method, path, keep_alive, body), None once the client is gone
+# Raise RequestError for requests that can't be answered
+async def read_request(reader) -> tuple:
+    request_line = await read_line(reader, 400, "Request line too long")
+    if not request_line:
+        return None
+    try:
+        method, path, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await read_line(reader, 431, "Header line too long")
+        if not line:
+            return None
+        if line in (b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        keep_alive = connection == "keep-alive"
+    else:
+        keep_alive = connection != "close"
+
+    if "transfer-encoding" in headers:
+        raise RequestError(411, "Send a Content-Length instead of chunks")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Malformed Content-Length") from None
+    if length < 0:
+        raise RequestError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise RequestError(413, f"Bodies are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, keep_alive, body
+
+
+# One line of the request head, b"" once the client is gone
+# Raise RequestError(status, message) for lines over the reader's limit
+async def read_line(reader, status: int, message: str) -> bytes:
+    try:
+        return await reader.readline()
+    except (asyncio.LimitOverrunError, ValueError):
+        raise RequestError(status, message) from None
+
+
+async def write_response(writer, status: int, body, keep_alive: bool) -> None:
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    writer.write(head.encode("latin-1") + payload)
+    await writer.drain()
+
+
+# Serve until cancelled, on TCP (host, port) or on a Unix socket if `unix` is
+# a path
+async def serve(
+    dfas: dict,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix: str = None,
+    window: float = BATCH_WINDOW,
+    max_batch: int = MAX_BATCH,
+) -> None:
+    service = ValidationService(dfas, window=window, max_batch=max_batch)
+    if unix is not None:
+        server = await asyncio.start_unix_server(service.serve_connection, path=unix)
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
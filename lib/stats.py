@@ -0,0 +1,104 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Phases tracing memory right now, across all PipelineStats of the process
+# tracemalloc is global: it is started by the first of them and stopped by
+# the last, unless something else had started it
+__tracing_lock__ = threading.Lock()
+__tracing_phases__ = 0
+__started_tracing__ = False
+
+
+def __start_tracing__() -> None:
+    global __tracing_phases__, __started_tracing__
+    with __tracing_lock__:
+        if __tracing_phases__ == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            __started_tracing__ = True
+        __tracing_phases__ += 1
+
+
+def __stop_tracing__() -> None:
+    global __tracing_phases__, __started_tracing__
+    with __tracing_lock__:
+        __tracing_phases__ -= 1
+        if __tracing_phases__ == 0 and __started_tracing__:
+            tracemalloc.stop()
+            __started_tracing__ = False
+
+
+# Per-phase timings and counters of the reduction / validation pipeline
+# Attached to a DFA with DFA.enable_stats(), shared with the DFAs derived
+# from it (get_reduced_dfa(), minimize()), so one object covers a pipeline
+# With trace_memory=True every phase also records the peak of memory traced
+# by tracemalloc above its level at the start of the phase
+# The peak is never reset, so phases don't disturb each other; the price is
+# that peaks are approximate when phases nest or overlap (other threads or
+# Streamlit sessions): allocations elsewhere are counted too, and a phase
+# peaking below an earlier peak of the process only reports its final level
+class PipelineStats:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory: bool = trace_memory
+        # phase -> {"calls": ..., "seconds": ..., "peak_bytes": ...}
+        self.phases: dict = {}
+        # counter -> value, e.g. "mark_iterations", "transitions_walked"
+        self.counters: dict = {}
+
+    def reset(self) -> None:
+        self.phases = {}
+        self.counters = {}
+
+    # Time the body of a `with` block as one call of `name`
+    @contextmanager
+    def phase(self, name: str):
+        if self.trace_memory:
+            __start_tracing__()
+            baseline, peak_before = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            record = self.phases.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "peak_bytes": None}
+            )
+            record["calls"] += 1
+            record["seconds"] += seconds
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                __stop_tracing__()
+                # An unchanged peak was reached before the phase started,
+                # the phase then peaked somewhere below it
+                if peak <= peak_before:
+                    peak = current
+                record["peak_bytes"] = max(
+                    record["peak_bytes"] or 0, max(peak - baseline, 0)
+                )
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Pass items through, counting each one that is actually consumed
+    def counted(self, iterable, name: str):
+        counters = self.counters
+        counters.setdefault(name, 0)
+        for item in iterable:
+            counters[name] += 1
+            yield item
+
+    # Return form: {"phases": {...}, "counters": {...}}
+    def as_dict(self) -> dict:
+        return {
+            "phases": {name: dict(record) for name, record in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+    def __repr__(self) -> str:
+        phases = ", ".join(
+            f"{name}={record['seconds']:.4f}s" for name, record in self.phases.items()
+        )
+        counters = ", ".join(f"{name}={value}" for name, value in self.counters.items())
+        return f"PipelineStats(phases: {phases or '-'}; counters: {counters or '-'})"
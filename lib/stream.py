@@ -0,0 +1,204 @@
+import codecs
+import mmap
+import os
+
+import numpy as np
+
+# Bytes examined at once, bounds the temporary arrays built per chunk
+WINDOW_SIZE = 1 << 20
+
+NEWLINE = ord("\n")
+
+# Code points str.strip() removes, U+3000 is the last of them
+WHITESPACE_MASK = np.zeros(0x3002, dtype=bool)
+WHITESPACE_MASK[[c for c in range(0x3001) if chr(c).isspace()]] = True
+
+
+# Whitespace mask of an array of bytes or code points
+def __whitespace__(units: np.ndarray) -> np.ndarray:
+    if units.dtype != np.uint8:
+        units = np.minimum(units, len(WHITESPACE_MASK) - 1)
+    return WHITESPACE_MASK[units]
+
+
+# Chunked validation with the same verdicts as DFA.validate()
+# Input is UTF-8 text: all-ASCII windows are walked byte by byte without
+# decoding, others are decoded to code points, partial characters at the
+# end of a chunk are carried over to the next one
+# Raise UnicodeDecodeError (a ValueError) for input that isn't UTF-8
+# Word mode: the whole stream is one input string, see result()
+# Line mode: every "\n"-terminated line is one input string, see feed()
+class StreamValidator:
+    def __init__(self, dfa, lines: bool = False):
+        self.compiled = dfa.compile()
+        self.lines: bool = lines
+        self.reset()
+
+    # Forget everything fed so far
+    def reset(self) -> None:
+        self.__decoder__ = codecs.getincrementaldecoder("utf-8")()
+        self.__reset_word__()
+
+    # Start the next input string
+    def __reset_word__(self) -> None:
+        # Leading whitespace is skipped until the first other byte shows up
+        self.__started__: bool = False
+        # State after the last non-whitespace byte, what strip() would keep
+        self.__committed__: int = self.compiled.initial
+        # State after every byte, in case the whitespace turns out to be inner
+        self.__tentative__: int = self.compiled.initial
+        # Whether the current line has received any byte at all
+        self.__pending__: bool = False
+
+    # Feed the next chunk: bytes, bytearray, memoryview or mmap
+    # Return form: verdicts of the lines completed in this chunk (line mode),
+    # always empty in word mode
+    def feed(self, chunk) -> np.ndarray:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        verdicts = []
+        for begin in range(0, len(data), WINDOW_SIZE):
+            window = self.__code_points__(data[begin : begin + WINDOW_SIZE])
+            if self.lines:
+                verdicts.append(self.__feed_lines__(window))
+            else:
+                self.__advance__(window)
+        if not verdicts:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate(verdicts)
+
+    # Word mode: verdict for everything fed so far
+    # Line mode: verdict for a trailing line without "\n", None if there is none
+    def result(self):
+        # Raises for a character left incomplete at the end
+        self.__decoder__.decode(b"", final=True)
+        if not self.lines:
+            return bool(self.compiled.accepting[self.__committed__])
+        if not self.__pending__:
+            return None
+        verdict = bool(self.compiled.accepting[self.__committed__])
+        self.reset()
+        return verdict
+
+    # The window itself if it is ASCII (the same in every encoding) and no
+    # character is left open, its UTF-8 decoded code points otherwise
+    def __code_points__(self, window: np.ndarray) -> np.ndarray:
+        decoder = self.__decoder__
+        if not decoder.getstate()[0] and (not len(window) or window.max() < 0x80):
+            return window
+        text = decoder.decode(window.tobytes())
+        return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+    # Column indices of bytes or code points
+    def __columns__(self, units: np.ndarray) -> np.ndarray:
+        lut = self.compiled.symbol_lut
+        if units.dtype != np.uint8:
+            units = np.minimum(units, len(lut) - 1)
+        return lut[units]
+
+    # Carry the current word's state over a piece of input
+    def __advance__(self, window: np.ndarray) -> None:
+        if not len(window):
+            return
+        self.__pending__ = True
+        compiled = self.compiled
+
+        non_whitespace = np.flatnonzero(~__whitespace__(window))
+        if not len(non_whitespace):
+            if self.__started__:
+                columns = self.__columns__(window).tolist()
+                self.__tentative__ = compiled.walk(self.__tentative__, columns)
+            return
+
+        first = 0 if self.__started__ else int(non_whitespace[0])
+        last = int(non_whitespace[-1])
+        columns = self.__columns__(window[first:]).tolist()
+        self.__started__ = True
+        self.__committed__ = compiled.walk(
+            self.__tentative__, columns[: last - first + 1]
+        )
+        self.__tentative__ = compiled.walk(
+            self.__committed__, columns[last - first + 1 :]
+        )
+
+    # Line mode over one window
+    def __feed_lines__(self, window: np.ndarray) -> np.ndarray:
+        compiled = self.compiled
+        newlines = np.flatnonzero(window == NEWLINE)
+        if not len(newlines):
+            self.__advance__(window)
+            return np.zeros(0, dtype=bool)
+
+        # The first line continues whatever the previous chunk left open
+        self.__advance__(window[: newlines[0]])
+        first_verdict = bool(compiled.accepting[self.__committed__])
+        self.__reset_word__()
+
+        # Lines fully inside the window are stripped and walked in lockstep
+        starts = newlines[:-1] + 1
+        ends = newlines[1:]
+        non_whitespace = np.flatnonzero(~__whitespace__(window))
+        if len(non_whitespace):
+            first = np.searchsorted(non_whitespace, starts, side="left")
+            last = np.searchsorted(non_whitespace, ends, side="left") - 1
+            is_empty = first > last
+            first_index = non_whitespace[np.minimum(first, len(non_whitespace) - 1)]
+            last_index = non_whitespace[np.maximum(last, 0)]
+            offsets = np.where(is_empty, 0, first_index)
+            lengths = np.where(is_empty, 0, last_index - first_index + 1)
+        else:
+            offsets = lengths = np.zeros(len(starts), dtype=np.int64)
+        columns = self.__columns__(window)
+        states = compiled.walk_many(columns, offsets, lengths)
+
+        # Whatever follows the last newline stays open for the next chunk
+        self.__advance__(window[newlines[-1] + 1 :])
+
+        verdicts = np.empty(len(newlines), dtype=bool)
+        verdicts[0] = first_verdict
+        verdicts[1:] = compiled.accepting[states]
+        return verdicts
+
+
+# Read a path, file object, or bytes-like object in fixed-size chunks
+# Paths are memory-mapped, file objects are read into one reused buffer
+def iter_chunks(source, chunk_size: int = WINDOW_SIZE):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Every view has to be released before the map can be closed
+                with memoryview(mapped) as view:
+                    for begin in range(0, len(view), chunk_size):
+                        with view[begin : begin + chunk_size] as chunk:
+                            yield chunk
+    elif hasattr(source, "readinto"):
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            size = source.readinto(buffer)
+            if not size:
+                break
+            yield view[:size]
+    else:
+        view = memoryview(source).cast("B")
+        for begin in range(0, len(view), chunk_size):
+            yield view[begin : begin + chunk_size]
+
+
+# Verdict for a whole file / buffer treated as one input string
+def validate_stream(dfa, source, chunk_size: int = WINDOW_SIZE) -> bool:
+    validator = StreamValidator(dfa)
+    for chunk in iter_chunks(source, chunk_size):
+        validator.feed(chunk)
+    return validator.result()
+
+
+# One verdict per line of a file / buffer, in order
+def iter_line_verdicts(dfa, source, chunk_size: int = WINDOW_SIZE):
+    validator = StreamValidator(dfa, lines=True)
+    for chunk in iter_chunks(source, chunk_size):
+        yield from validator.feed(chunk).tolist()
+    last_verdict = validator.result()
+    if last_verdict is not None:
+        yield last_verdict
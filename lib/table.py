@@ -0,0 +1,105 @@
+import numpy as np
+
+# Transition tables as pandas DataFrames, the form edited in the Streamlit UI
+# One row per state (the index), one column per symbol, cells hold the name
+# of the next state; None or "" is a missing transition
+# Conversions work on the whole NumPy array at once, never cell by cell
+# pandas is imported on use, like everywhere else in lib
+
+
+# Return form: DataFrame of `dfa`'s transitions
+def dfa_to_frame(dfa) -> "pd.DataFrame":
+    import pandas as pd
+    from lib.serialize import integer_table
+
+    alphabet = tuple(dfa.alphabet)
+    table, _ = integer_table(dfa.states, alphabet, dfa.final_states, dfa.rules)
+    # MISSING (-1) picks the trailing None
+    names = np.array(list(dfa.states) + [None], dtype=object)
+    return pd.DataFrame(names[table], index=list(dfa.states), columns=list(alphabet))
+
+
+# Mask of the cells holding a transition
+def present_mask(values: np.ndarray) -> np.ndarray:
+    import pandas as pd
+
+    return pd.notna(values) & (values != "")
+
+
+# Return form: copy of `df` with the given symbols and number of states
+# Columns are kept by position, so renaming a symbol keeps its column
+# New states are named q<i>; new cells, and cells leading to removed states,
+# lead to the first state
+def resize_frame(df, symbols: tuple, num_states: int) -> "pd.DataFrame":
+    import pandas as pd
+
+    states = list(df.index[:num_states])
+    taken = set(states)
+    i = 0
+    while len(states) < num_states:
+        if f"q{i}" not in taken:
+            states.append(f"q{i}")
+        i += 1
+
+    old_values = df.to_numpy(dtype=object)
+    values = np.full((num_states, len(symbols)), states[0], dtype=object)
+    kept_rows = min(len(old_values), num_states)
+    kept_cols = min(old_values.shape[1], len(symbols))
+    values[:kept_rows, :kept_cols] = old_values[:kept_rows, :kept_cols]
+    dangling = present_mask(values) & ~np.isin(values.astype(str), states)
+    values[dangling] = states[0]
+    return pd.DataFrame(values, index=states, columns=list(symbols))
+
+
+# Rules dict of a table, in state order, then symbol order
+def frame_to_rules(df) -> dict:
+    values = df.to_numpy(dtype=object)
+    rows, cols = np.nonzero(present_mask(values))
+    states = df.index.to_numpy(dtype=object)[rows].tolist()
+    symbols = df.columns.to_numpy(dtype=object)[cols].tolist()
+    return dict(zip(zip(states, symbols), values[rows, cols].tolist()))
+
+
+# Replace the rules of the given rows only, in place
+# For tables edited a few rows at a time: the rest is not converted again
+def update_rules(rules: dict, df, states: list) -> None:
+    for state in states:
+        for symbol in df.columns:
+            rules.pop((state, symbol), None)
+    rules.update(frame_to_rules(df.loc[states]))
+
+
+# Hashable form of a table's rules for cache keys, in sorted order: the
+# order of the dict depends on the rows update_rules() replaced last
+def rules_key(rules: dict) -> tuple:
+    return tuple(sorted(rules.items()))
+
+
+# Raise ValueError unless states are unique, symbols are single characters
+# and every cell names a state of the table
+def check_frame(df) -> None:
+    if df.index.has_duplicates:
+        state = df.index[df.index.duplicated()][0]
+        raise ValueError(f"Repeated state: {state}")
+    for symbol in df.columns:
+        if not isinstance(symbol, str) or len(symbol) != 1 or symbol.isspace():
+            raise ValueError(f"Symbols must be single characters: {symbol!r}")
+
+    values = df.to_numpy(dtype=object)
+    targets = values[present_mask(values)]
+    unknown = ~np.isin(targets.astype(str), df.index.to_numpy(dtype=str))
+    if unknown.any():
+        raise ValueError(f"Unknown state in the table: {targets[unknown][0]}")
+
+
+# Read a table from CSV: a header row with the symbols after the first
+# (state) column, then one row per state; empty cells are missing
+# Raise ValueError for tables check_frame() rejects
+def read_frame_csv(file) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = pd.read_csv(file, index_col=0, dtype=str, keep_default_na=False)
+    df.index = df.index.astype(str)
+    df = df.astype(object).where(df != "", None)
+    check_frame(df)
+    return df
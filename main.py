@@ -1,7 +1,35 @@
+import copy
+from types import MappingProxyType
+
 import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
+from graphviz import ExecutableNotFound
 from lib.dfa import DFA
+from lib.regex import compile_regex
+from lib.serialize import dfa_from_json
+from lib.table import (
+    check_frame,
+    dfa_to_frame,
+    frame_to_rules,
+    read_frame_csv,
+    resize_frame,
+    rules_key,
+    update_rules,
+)
+
+# Graphs with at least this many states are laid out on the server as SVG,
+# within a time budget, instead of in the browser
+LARGE_GRAPH = 50
+# Size limits of the transition table
+MAX_STATES = 10_000
+MAX_SYMBOLS = 64
+# States shown per page of the table editor
+PAGE_SIZE = 50
+# Final states are picked with pills up to this many states, then searched
+PILLS_LIMIT = 16
+# Cells offer a dropdown of the states up to this many states, then are typed
+SELECTBOX_LIMIT = 500
 
 st.title("Deterministic Finite Accepter Simulator")
 
@@ -15,185 +43,429 @@ if "is_str_valid" not in st.session_state:
     st.session_state.is_str_valid = None
 if "test_string" not in st.session_state:
     st.session_state.test_string = ""
-
-# Pre-initialize default values to avoid conflict with callback function
-for i in range(2):
-    if f"symbol_{i}" not in st.session_state:
-        st.session_state[f"symbol_{i}"] = str(i)
-
-# Alphabet Configuration
-st.markdown('<a id="alphabet_config"></a>', unsafe_allow_html=True)
-st.subheader("1. Alphabet (Σ)")
-symbol_cols = st.columns(2)
-
-
-# When input symbol collides with one in the other box, delete the other
-def symbol_collision_callback(i: int):
-    if st.session_state[f"symbol_{i}"] == st.session_state[f"symbol_{(i+1)%2}"]:
-        st.session_state[f"symbol_{(i+1)%2}"] = ""
-
-
-# Create text inputs for symbols
-for i, col in enumerate(symbol_cols):
-    # Create text input field on each of the cols
-    # Key param automatically adds this box to session state
-    col.write(f"Symbol {i+1}")
-    symbol = col.text_input(
-        f"Symbol {i+1}",
-        max_chars=1,
-        placeholder=f"Enter symbol {i+1}",
-        key=f"symbol_{i}",
-        on_change=symbol_collision_callback,
-        args=(i,),
-        label_visibility="collapsed",
-    )
-
-# Raise warning for missing symbols
-if any(not st.session_state[f"symbol_{i}"] for i in range(2)):
-    st.warning("Incomplete alphabet", icon="⚠️")
-
-# States Configuration
-st.markdown('<a id="state_config"></a>', unsafe_allow_html=True)
-st.subheader("2. States Configuration")
-
-state_col1, state_col2 = st.columns(2)
-state_col1.write(f"Number of States (|Q|)")
-num_states = state_col1.number_input(
-    "Number of States",
-    min_value=1,
-    max_value=16,
-    value="min",
-    step=1,
-    key="num_states_input",
-    label_visibility="collapsed",
+if "graph_traced" not in st.session_state:
+    st.session_state.graph_traced = False
+if "build_stats" not in st.session_state:
+    st.session_state.build_stats = None
+
+# Input mode: the transition table below, or a regular expression
+input_mode = st.radio(
+    "Input mode",
+    options=["Transition table", "Regular expression"],
+    horizontal=True,
+    key="input_mode",
 )
 
-state_col2.write(f"Initial State (q0)")
-initial_state = state_col2.selectbox(
-    "Initial State",
-    options=[f"q{x}" for x in range(num_states)],
-    key="initial_state_input",
-    label_visibility="collapsed",
-)
 
-st.write(f"Final States (F)")
-final_states = st.pills(
-    "Final States",
-    options=[f"q{x}" for x in range(num_states)],
-    selection_mode="multi",
-    default="q0",
-    key="accept_states_input",
-    label_visibility="collapsed",
-)
+# Compile the regular expression into a minimized DFA
+def regex_callback():
+    alphabet = st.session_state.regex_alphabet or None
+    try:
+        dfa_obj = compile_regex(st.session_state.regex_pattern, alphabet)
+    except ValueError as error:
+        st.session_state.regex_error = str(error)
+        return
+    st.session_state.regex_error = None
+    st.session_state.build_stats = None
+    st.session_state.is_str_valid = None
+    st.session_state.dfa_obj = dfa_obj
+    st.session_state.dfa_graph_obj = dfa_obj.create_dfa()
+    st.session_state.graph_traced = False
+
 
-if not final_states:
-    st.warning("Must have at least 1 final state", icon="⚠️")
-
-# Dynamic Transition Table
-st.subheader("3. Transition Function (δ)")
-st.write("Define where each state goes on each input symbol")
-
-# Create columns with dynamic names
-columns = {}
-for i in range(2):
-    symbol_name = st.session_state.get(f"symbol_{i}", f"Symbol_{i+1}")
-    columns[symbol_name] = [f"q0" for _ in range(num_states)]
-
-# Create a pandas DatatFrame for transitions
-transition_df = pd.DataFrame(columns, index=[f"q{i}" for i in range(num_states)])
-
-# Allow selection of output state for each transition
-edited_df = st.data_editor(
-    transition_df,
-    column_config={
-        symbol_name: st.column_config.SelectboxColumn(
-            options=[f"q{i}" for i in range(num_states)],
-            required=True,
+if input_mode == "Regular expression":
+    st.subheader("Regular Expression")
+    st.write(
+        "Supports `|`, `*`, `+`, `?`, `{m,n}`, `( )`, `.`, `[a-z]`, `[^a]` "
+        "and `\\` escapes"
+    )
+    regex_col, regex_alphabet_col = st.columns([0.7, 0.3])
+    regex_col.text_input(
+        "Pattern",
+        placeholder="e.g. (0|1)*01",
+        key="regex_pattern",
+    )
+    regex_alphabet_col.text_input(
+        "Alphabet (optional)",
+        placeholder="Symbols of the pattern",
+        key="regex_alphabet",
+    )
+    if st.session_state.get("regex_error"):
+        st.error(st.session_state.regex_error, icon="❌")
+    st.button(
+        "Generate Graph", type="primary", on_click=regex_callback, key="submit_regex"
+    )
+else:
+    # The whole transition table and its rules live in the session; edits,
+    # imports and resizes update both in place, and the editor below only
+    # shows one page of the table
+    if "table_df" not in st.session_state:
+        st.session_state.table_df = pd.DataFrame(
+            {"0": ["q0"], "1": ["q0"]}, index=["q0"], dtype=object
+        )
+        st.session_state.table_rules = frame_to_rules(st.session_state.table_df)
+        st.session_state.table_version = 0
+        st.session_state.table_error = None
+        st.session_state.alphabet_input = "01"
+        st.session_state.accept_states_input = ["q0"]
+
+    # One symbol per character, whitespace skipped, repeats only count once
+    def parse_alphabet(text: str) -> tuple:
+        return tuple(dict.fromkeys(symbol for symbol in text if not symbol.isspace()))
+
+    # After the table changed as a whole: convert all of it again, and drop
+    # selections of states that are gone
+    def sync_table():
+        df = st.session_state.table_df
+        states = list(df.index)
+        st.session_state.table_rules = frame_to_rules(df)
+        st.session_state.table_version += 1
+
+        if st.session_state.get("initial_state_input") not in states:
+            st.session_state.initial_state_input = states[0]
+        known_states = set(states)
+        st.session_state.accept_states_input = [
+            state
+            for state in st.session_state.get("accept_states_input", [])
+            if state in known_states
+        ]
+        num_pages = -(-len(states) // PAGE_SIZE)
+        if st.session_state.get("table_page", 1) > num_pages:
+            st.session_state.table_page = num_pages
+
+    # Fit the table to the alphabet and number of states
+    def resize_table():
+        st.session_state.table_df = resize_frame(
+            st.session_state.table_df,
+            parse_alphabet(st.session_state.alphabet_input)[:MAX_SYMBOLS],
+            st.session_state.num_states_input,
+        )
+        sync_table()
+
+    # Replace the table by an uploaded CSV table, or by a DFA in the JSON
+    # form offered by "Download DFA (JSON)"
+    # CSV tables have no final states: the selected ones are kept if they exist
+    def import_table():
+        upload = st.session_state.table_upload
+        if upload is None:
+            return
+        try:
+            if upload.name.lower().endswith(".json"):
+                dfa_obj = dfa_from_json(upload.getvalue())
+                df = dfa_to_frame(dfa_obj)
+                check_frame(df)
+                initial = dfa_obj.initial_state
+                finals = list(dfa_obj.final_states)
+            else:
+                df = read_frame_csv(upload)
+                initial = None
+                finals = st.session_state.get("accept_states_input", [])
+            if not len(df) or len(df) > MAX_STATES:
+                raise ValueError(f"Tables need 1 to {MAX_STATES} states")
+            if not len(df.columns) or len(df.columns) > MAX_SYMBOLS:
+                raise ValueError(f"Tables need 1 to {MAX_SYMBOLS} symbols")
+        except ValueError as error:
+            st.session_state.table_error = f"{upload.name}: {error}"
+            return
+
+        st.session_state.table_error = None
+        st.session_state.table_df = df
+        st.session_state.alphabet_input = "".join(df.columns)
+        st.session_state.num_states_input = len(df)
+        st.session_state.initial_state_input = initial
+        st.session_state.accept_states_input = finals
+        sync_table()
+
+    # Write the edits of the shown page into the table and convert only the
+    # edited rows again
+    # Cells naming unknown states keep their previous value
+    def commit_page(editor_key: str, page_states: list):
+        df = st.session_state.table_df
+        known_states = set(df.index)
+        edited = []
+        rejected = []
+        for position, changes in st.session_state[editor_key]["edited_rows"].items():
+            state = page_states[int(position)]
+            for symbol, next_state in changes.items():
+                if not next_state:
+                    df.at[state, symbol] = None
+                elif next_state in known_states:
+                    df.at[state, symbol] = next_state
+                else:
+                    rejected.append(next_state)
+            edited.append(state)
+
+        update_rules(st.session_state.table_rules, df, edited)
+        # A fresh editor on the next run, showing the committed page
+        st.session_state.table_version += 1
+        st.session_state.table_error = (
+            f"Unknown state: {rejected[0]}" if rejected else None
         )
-        for symbol_name in transition_df.columns
-    },
-    hide_index=False,
-    key="transition_table",
-)
 
+    # Alphabet Configuration
+    st.markdown('<a id="alphabet_config"></a>', unsafe_allow_html=True)
+    st.subheader("1. Alphabet (Σ)")
+    st.text_input(
+        "Symbols",
+        placeholder="One character per symbol, e.g. 01",
+        key="alphabet_input",
+        on_change=resize_table,
+        help=f"Up to {MAX_SYMBOLS} symbols; spaces are ignored",
+    )
+    alphabet_text = st.session_state.alphabet_input
+    alphabet = parse_alphabet(alphabet_text)
+
+    # Raise warning for missing or repeated symbols
+    if not alphabet:
+        st.warning("Incomplete alphabet", icon="⚠️")
+    elif len(alphabet) > MAX_SYMBOLS:
+        st.warning(f"Only {MAX_SYMBOLS} symbols are supported", icon="⚠️")
+    elif len(alphabet) < len(alphabet_text.replace(" ", "")):
+        st.warning("Repeated symbols are only used once", icon="⚠️")
+
+    # States Configuration
+    st.markdown('<a id="state_config"></a>', unsafe_allow_html=True)
+    st.subheader("2. States Configuration")
+
+    state_col1, state_col2 = st.columns(2)
+    state_col1.write(f"Number of States (|Q|)")
+    num_states = state_col1.number_input(
+        "Number of States",
+        min_value=1,
+        max_value=MAX_STATES,
+        value="min",
+        step=1,
+        key="num_states_input",
+        on_change=resize_table,
+        label_visibility="collapsed",
+    )
+    states = list(st.session_state.table_df.index)
 
-# Convert the transition rules DataFrame into a Python dict
-def df_to_transition_dict(df):
-    transition_dict = {}
-    # Iterate through all states (index) and symbols (columns)
-    for state in df.index:
-        for symbol in df.columns:
-            next_state = df.at[state, symbol]
-            # Skip empty cells if any
-            if pd.notna(next_state):
-                transition_dict[(state, symbol)] = next_state
-    return transition_dict
-
-
-# Function to be triggered when "Generate Graph" is clicked
-def graph_callback(reduction=False):
-    # Check if both symbols are provided
-    # JS script to jump to anchor point
-    # https://discuss.streamlit.io/t/programmatically-jump-to-anchor-on-same-page-after-clicking-button/81466/3
-    if not st.session_state["symbol_0"] or not st.session_state["symbol_1"]:
-        components.html(
-            f"""
-        <script>
-            var element = window.parent.document.getElementById("alphabet_config");
-            element.scrollIntoView({{behavior: 'smooth'}});
-        </script>
-        """.encode()
+    state_col2.write(f"Initial State (q0)")
+    initial_state = state_col2.selectbox(
+        "Initial State",
+        options=states,
+        key="initial_state_input",
+        label_visibility="collapsed",
+    )
+
+    st.write(f"Final States (F)")
+    # Pills get unwieldy with many states, a multiselect can be searched
+    if len(states) <= PILLS_LIMIT:
+        final_states = st.pills(
+            "Final States",
+            options=states,
+            selection_mode="multi",
+            key="accept_states_input",
+            label_visibility="collapsed",
         )
-        return
-    # Check if there is at least a final state
+    else:
+        final_states = st.multiselect(
+            "Final States",
+            options=states,
+            key="accept_states_input",
+            label_visibility="collapsed",
+        )
+
     if not final_states:
-        components.html(
-            f"""
-        <script>
-            var element = window.parent.document.getElementById("state_config");
-            element.scrollIntoView({{behavior: 'smooth'}});
-        </script>
-        """.encode()
+        st.warning("Must have at least 1 final state", icon="⚠️")
+
+    # Dynamic Transition Table
+    st.subheader("3. Transition Function (δ)")
+    st.write("Define where each state goes on each input symbol")
+
+    st.file_uploader(
+        "Import a transition table",
+        type=["csv", "json"],
+        key="table_upload",
+        on_change=import_table,
+        help=(
+            "CSV: symbols in the header row, one row per state with the state "
+            "first, empty cells for missing transitions. "
+            "JSON: a DFA as downloaded below."
+        ),
+    )
+    if st.session_state.table_error:
+        st.error(st.session_state.table_error, icon="❌")
+
+    # Only one page of the table is sent to the browser
+    num_pages = -(-len(states) // PAGE_SIZE)
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(
+            f"Page (of {num_pages}, {PAGE_SIZE} states each)",
+            min_value=1,
+            max_value=num_pages,
+            step=1,
+            key="table_page",
         )
-        return
+    page_df = st.session_state.table_df.iloc[(page - 1) * PAGE_SIZE : page * PAGE_SIZE]
 
-    # Delete string validation callout if there's any left
-    st.session_state.is_str_valid = None
-    # Convert transition table into dictionary
-    rules_dict = df_to_transition_dict(edited_df)
-    dfa_obj = DFA(
-        alphabet=(tuple(edited_df)),
-        states=tuple([f"q{x}" for x in range(num_states)]),
-        initial_state=initial_state,
-        final_states=tuple(final_states),
-        rules=rules_dict,
+    # Allow selection of output state for each transition
+    # Long option lists are slow to send, larger tables take typed names
+    if len(states) <= SELECTBOX_LIMIT:
+        cell_column = st.column_config.SelectboxColumn(options=states)
+    else:
+        cell_column = st.column_config.TextColumn()
+    editor_key = f"transition_table_{page}_{st.session_state.table_version}"
+    st.data_editor(
+        page_df,
+        column_config={symbol_name: cell_column for symbol_name in page_df.columns},
+        hide_index=False,
+        key=editor_key,
+        on_change=commit_page,
+        args=(editor_key, page_df.index.tolist()),
     )
 
-    # Reduce DFA states if user clicks on appropriate button
-    if reduction:
-        dfa_obj.remove_inaccessible_states()
-        # Confirm removal
-        dfa_obj = dfa_obj.get_reduced_dfa()
-        dfa_obj.mark()
-        dfa_obj.reduce()
-        st.session_state.dfa_obj = dfa_obj.get_reduced_dfa()
+    # Build a DFA from its configuration, reduced by trimming, marking and
+    # merging when `reduction` is set
+    def construct_dfa(
+        alphabet: tuple,
+        states: tuple,
+        initial_state: str,
+        final_states: tuple,
+        rules_items: tuple,
+        reduction: bool,
+        record_stats: bool = False,
+    ) -> DFA:
+        dfa_obj = DFA(
+            alphabet=alphabet,
+            states=states,
+            initial_state=initial_state,
+            final_states=final_states,
+            rules=MappingProxyType(dict(rules_items)),
+        )
+        # Stats follow the reduced objects, so they cover the whole build
+        if record_stats:
+            dfa_obj.enable_stats(trace_memory=True)
+
+        # Reduce DFA states if user clicks on appropriate button
+        if reduction:
+            # Drop inaccessible states and merge dead ones before marking
+            dfa_obj.trim()
+            # Confirm removal
+            dfa_obj = dfa_obj.get_reduced_dfa()
+            dfa_obj.mark()
+            dfa_obj.reduce()
+            dfa_obj = dfa_obj.get_reduced_dfa()
+        return dfa_obj
+
+    # Minimize the configured DFA with this session's minimizer, which only
+    # re-refines the states an edit of the table can affect
+    # The minimizer starts over when states are removed or symbols change
+    def minimize_edited(dfa_obj: DFA) -> DFA:
+        minimizer = st.session_state.get("minimizer")
+        if minimizer is not None:
+            try:
+                minimizer.update_to(dfa_obj)
+            except ValueError:
+                minimizer = None
+        if minimizer is None:
+            minimizer = dfa_obj.minimizer()
+            st.session_state.minimizer = minimizer
+        return minimizer.minimized()
+
+    # Build a DFA and warm up its graph cache once per configuration
+    # Shared across reruns and sessions, so the result must not be mutated:
+    # sessions work on a shallow copy, see graph_callback()
+    @st.cache_resource(max_entries=256, show_spinner=False)
+    def build_dfa(
+        alphabet: tuple,
+        states: tuple,
+        initial_state: str,
+        final_states: tuple,
+        rules_items: tuple,
+    ) -> DFA:
+        dfa_obj = construct_dfa(
+            alphabet, states, initial_state, final_states, rules_items, False
+        )
+        dfa_obj.create_dfa()
+        return dfa_obj
+
+    # Function to be triggered when "Generate Graph" is clicked
+    def graph_callback(reduction=False):
+        # Check if the table has symbols
+        # JS script to jump to anchor point
+        # https://discuss.streamlit.io/t/programmatically-jump-to-anchor-on-same-page-after-clicking-button/81466/3
+        if not st.session_state.table_df.columns.size:
+            components.html(
+                f"""
+            <script>
+                var element = window.parent.document.getElementById("alphabet_config");
+                element.scrollIntoView({{behavior: 'smooth'}});
+            </script>
+            """.encode()
+            )
+            return
+        # Check if there is at least a final state
+        if not final_states:
+            components.html(
+                f"""
+            <script>
+                var element = window.parent.document.getElementById("state_config");
+                element.scrollIntoView({{behavior: 'smooth'}});
+            </script>
+            """.encode()
+            )
+            return
+
+        # Delete string validation callout if there's any left
+        st.session_state.is_str_valid = None
+        # The rules are kept up to date with the table by its callbacks
+        table_df = st.session_state.table_df
+        rules_dict = st.session_state.table_rules
+
+        # Canonical form of the configuration: final states in state order
+        # and sorted rules, so neither the selection order nor the order the
+        # rows were edited in matters
+        states = tuple(table_df.index)
+        accepting = set(final_states)
+        configuration = dict(
+            alphabet=tuple(table_df.columns),
+            states=states,
+            initial_state=initial_state,
+            final_states=tuple(state for state in states if state in accepting),
+            rules_items=rules_key(rules_dict),
+        )
+        # Recorded builds bypass the cache: every phase of the full
+        # reduction is actually run and timed
+        if st.session_state.get("record_stats", False):
+            dfa_obj = construct_dfa(
+                **configuration, reduction=reduction, record_stats=True
+            )
+        elif reduction:
+            # Minimized by this session's minimizer, which follows its edits,
+            # so the result isn't shared with other sessions
+            dfa_obj = minimize_edited(construct_dfa(**configuration, reduction=False))
+        else:
+            dfa_obj = build_dfa(**configuration)
+
+        # Validation traces are per session
+        st.session_state.dfa_obj = copy.copy(dfa_obj)
+        # Stats of a recorded build, the session's copy counts on its own
+        st.session_state.build_stats = dfa_obj.get_stats()
+        if st.session_state.get("record_stats", False):
+            st.session_state.dfa_obj.enable_stats()
         st.session_state.dfa_graph_obj = st.session_state.dfa_obj.create_dfa()
-    else:
-        st.session_state.dfa_obj = dfa_obj
-        st.session_state.dfa_graph_obj = dfa_obj.create_dfa()
+        st.session_state.graph_traced = False
 
+    st.checkbox(
+        "Record pipeline statistics",
+        key="record_stats",
+        help="Time each phase of building, reducing and drawing the DFA",
+    )
 
-graph_gen_col, reduced_graph_gen_col = st.columns([0.20, 0.80])
-graph_gen_col.button(
-    "Generate Graph", type="primary", on_click=graph_callback, key="submit_config"
-)
-reduced_graph_gen_col.button(
-    "Generate Graph with reduced States",
-    type="primary",
-    on_click=graph_callback,
-    args=(True,),
-    key="submit_reduced_config",
-)
+    graph_gen_col, reduced_graph_gen_col = st.columns([0.20, 0.80])
+    graph_gen_col.button(
+        "Generate Graph", type="primary", on_click=graph_callback, key="submit_config"
+    )
+    reduced_graph_gen_col.button(
+        "Generate Graph with reduced States",
+        type="primary",
+        on_click=graph_callback,
+        args=(True,),
+        key="submit_reduced_config",
+    )
 
 st.header("II. DFA Visualization and Validation", divider="red")
 
@@ -204,10 +476,67 @@ def validate(test_input: str):
     st.session_state.dfa_graph_obj = st.session_state.dfa_obj.create_dfa(
         validation_trace=True
     )
+    st.session_state.graph_traced = True
 
 
 def del_tracing():
     st.session_state.dfa_graph_obj = st.session_state.dfa_obj.create_dfa()
+    st.session_state.graph_traced = False
+
+
+# Draw the current graph
+# Large graphs are rendered server-side with level-of-detail fallbacks
+def show_graph(graph_str: str):
+    dfa_obj = st.session_state.dfa_obj
+    if len(dfa_obj.states) >= LARGE_GRAPH:
+        try:
+            svg, level = dfa_obj.render_bounded(
+                validation_trace=st.session_state.graph_traced
+            )
+        except ExecutableNotFound:
+            # No local Graphviz install, let the browser do the layout
+            st.graphviz_chart(graph_str, use_container_width=True)
+            return
+        if svg is None:
+            st.warning("Graph is too large to lay out in time", icon="⚠️")
+            return
+        if level != "full graph":
+            st.caption(f"Showing {level}")
+        st.image(svg, use_container_width=True)
+        return
+    st.graphviz_chart(graph_str, use_container_width=True)
+
+
+# Offer the current DFA in the JSON interchange format
+def show_export():
+    st.download_button(
+        "Download DFA (JSON)",
+        data=st.session_state.dfa_obj.to_json(indent=2),
+        file_name="dfa.json",
+        mime="application/json",
+        key="download_json",
+    )
+
+
+# Phase timings and counters of the current DFA
+def show_stats():
+    with st.expander("Pipeline statistics"):
+        build_stats = st.session_state.build_stats
+        st.write("Building the DFA (first build of this configuration)")
+        st.dataframe(
+            pd.DataFrame.from_dict(build_stats.phases, orient="index"),
+            use_container_width=True,
+        )
+        st.dataframe(pd.Series(build_stats.counters, name="value", dtype=int))
+
+        session_stats = st.session_state.dfa_obj.get_stats()
+        if session_stats is not None:
+            st.write("This session")
+            st.dataframe(
+                pd.DataFrame.from_dict(session_stats.phases, orient="index"),
+                use_container_width=True,
+            )
+            st.dataframe(pd.Series(session_stats.counters, name="value", dtype=int))
 
 
 # Display the graph and validator with conditional layout
@@ -224,7 +553,8 @@ if "dfa_obj" in st.session_state and st.session_state.dfa_obj:
     if is_complex:
         # For complex graphs, stack validator below graph
         st.subheader("DFA Visualization")
-        st.graphviz_chart(graph_str, use_container_width=True)
+        show_graph(graph_str)
+        show_export()
 
         st.subheader("String Validation")
         test_string = st.text_input(
@@ -254,7 +584,8 @@ if "dfa_obj" in st.session_state and st.session_state.dfa_obj:
 
         with graph_col:
             st.subheader("DFA Visualization")
-            st.graphviz_chart(graph_str, use_container_width=True)
+            show_graph(graph_str)
+            show_export()
 
         with validator_col:
             st.subheader("String Validation")
@@ -293,3 +624,7 @@ if "is_str_valid" in st.session_state or st.session_state.is_str_valid is not No
     elif st.session_state.is_str_valid is False:
         st.error("String is rejected", icon="❌")
 # Otherwise, show nothing
+
+# Only show pipeline statistics when they were recorded
+if st.session_state.get("dfa_obj") and st.session_state.build_stats is not None:
+    show_stats()
@@ -0,0 +1,46 @@
+import pytest
+
+from lib.dfa import DFA
+
+
+def make_dfa(rules: dict) -> DFA:
+    return DFA(
+        alphabet=("a",),
+        states=("p", "q"),
+        initial_state="p",
+        final_states=("q",),
+        rules=rules,
+    )
+
+
+def test_rules_are_read_only():
+    dfa = make_dfa({("p", "a"): "q"})
+    with pytest.raises(TypeError):
+        dfa.rules[("p", "a")] = "p"
+    with pytest.raises(AttributeError):
+        dfa.rules = {}
+
+
+def test_callers_dict_does_not_reach_a_built_dfa():
+    rules = {("p", "a"): "q"}
+    dfa = make_dfa(rules)
+    assert dfa.accepts("a")
+    rules[("p", "a")] = "p"
+    assert dfa.accepts("a")
+    assert dfa.validate("a")
+
+
+def test_reduced_dfas_share_the_reduction_rules():
+    dfa = DFA(
+        alphabet=("a",),
+        states=("p", "q", "r"),
+        initial_state="p",
+        final_states=("q", "r"),
+        rules={("p", "a"): "q", ("q", "a"): "r", ("r", "a"): "r"},
+    )
+    dfa.mark()
+    dfa.reduce()
+    first = dfa.get_reduced_dfa()
+    second = dfa.get_reduced_dfa()
+    assert first.rules is second.rules
+    assert first.states == ("p", "q, r")
@@ -0,0 +1,36 @@
+import pytest
+
+from lib.dfa import DFA
+from lib.parallel import shard_ranges
+
+LINES = ["é", "éa", "a", " éaa　", "€", "", "éaaa"] * 50
+
+
+@pytest.fixture
+def dfa() -> DFA:
+    return DFA(
+        alphabet=("é", "a"),
+        states=("s", "t"),
+        initial_state="s",
+        final_states=("t",),
+        rules={("s", "é"): "t", ("t", "a"): "t"},
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_non_ascii_corpus_matches_validate(dfa, tmp_path, workers):
+    path = tmp_path / "corpus.txt"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    assert len(shard_ranges(path, workers * 4)) > 1 or workers == 1
+
+    result = dfa.validate_corpus(path, workers=workers, collect_rejected=True)
+    verdicts = [dfa.validate(line) for line in LINES]
+    assert result.accepted == sum(verdicts)
+    assert result.rejected == len(verdicts) - sum(verdicts)
+
+    data = path.read_bytes()
+    line_starts = [0] + [i + 1 for i, byte in enumerate(data[:-1]) if byte == 10]
+    expected_offsets = [
+        start for start, verdict in zip(line_starts, verdicts) if not verdict
+    ]
+    assert result.rejected_offsets.tolist() == expected_offsets
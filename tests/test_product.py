@@ -0,0 +1,90 @@
+import itertools
+
+import pytest
+
+from lib.dfa import DFA
+
+
+# Reduced DFA over {a}: state names merged by reduce(), e.g. "x, y"
+def reduced(states: tuple, finals: tuple, rules: dict) -> DFA:
+    dfa = DFA(
+        alphabet=("a",),
+        states=states,
+        initial_state=states[0],
+        final_states=finals,
+        rules=rules,
+    )
+    dfa.mark()
+    dfa.reduce()
+    return dfa.get_reduced_dfa()
+
+
+def words(alphabet: tuple, max_length: int):
+    for length in range(max_length + 1):
+        for word in itertools.product(alphabet, repeat=length):
+            yield "".join(word)
+
+
+@pytest.fixture
+def first() -> DFA:
+    # "x" and "y" merge into "x, y"; accepts words of even length
+    dfa = reduced(
+        ("x", "y", "w"),
+        ("x", "y"),
+        {("x", "a"): "w", ("y", "a"): "w", ("w", "a"): "y"},
+    )
+    assert "x, y" in dfa.states
+    return dfa
+
+
+@pytest.fixture
+def second() -> DFA:
+    # "y" and "z" merge into "y, z"; accepts words of length >= 1
+    dfa = reduced(
+        ("x", "y", "z"),
+        ("y", "z"),
+        {("x", "a"): "y", ("y", "a"): "z", ("z", "a"): "y"},
+    )
+    assert "y, z" in dfa.states
+    return dfa
+
+
+@pytest.mark.parametrize(
+    "operation", ["intersection", "union", "difference", "symmetric_difference"]
+)
+def test_product_of_reduced_dfas_has_unique_names(first, second, operation):
+    result = getattr(first, operation)(second)
+    assert len(set(result.states)) == len(result.states)
+
+    accepts = {
+        "intersection": lambda a, b: a and b,
+        "union": lambda a, b: a or b,
+        "difference": lambda a, b: a and not b,
+        "symmetric_difference": lambda a, b: a != b,
+    }[operation]
+    for word in words(("a",), 6):
+        expected = accepts(first.validate(word), second.validate(word))
+        assert result.validate(word) == expected
+    result.minimize()
+
+
+def test_colliding_component_names():
+    first = DFA(
+        alphabet=("a",),
+        states=("x, y", "x"),
+        initial_state="x, y",
+        final_states=("x, y",),
+        rules={("x, y", "a"): "x", ("x", "a"): "x"},
+    )
+    second = DFA(
+        alphabet=("a",),
+        states=("z", "y, z"),
+        initial_state="z",
+        final_states=("z",),
+        rules={("z", "a"): "y, z", ("y, z", "a"): "y, z"},
+    )
+    result = first.union(second)
+    assert len(set(result.states)) == len(result.states) == 2
+    assert result.validate("")
+    assert not result.validate("a")
+    assert len(result.minimize().states) == 2
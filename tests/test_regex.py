@@ -0,0 +1,31 @@
+import pytest
+
+from lib.regex import compile_regex
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "a{3000}",
+        "(a{1000}){1000}",
+        "a{1000}b{1000}c{1000}",
+        "(" * 2000 + "a" + ")" * 2000,
+    ],
+)
+def test_oversized_patterns_raise_value_error(pattern):
+    with pytest.raises(ValueError):
+        compile_regex(pattern)
+
+
+def test_derivative_states_are_capped():
+    with pytest.raises(ValueError):
+        compile_regex("(a|b)*a(a|b){12}", max_states=1000)
+
+
+def test_bounded_repetition():
+    dfa = compile_regex("a{2,4}b{3}")
+    assert dfa.validate("aabbb")
+    assert dfa.validate("aaaabbb")
+    assert not dfa.validate("abbb")
+    assert not dfa.validate("aaaaabbb")
+    assert len(compile_regex("a{1000}").states) == 1001
@@ -0,0 +1,55 @@
+import random
+import time
+
+import pytest
+
+from lib.regex import compile_regex
+
+
+# Leftmost start, then its longest end, scanning on after that end
+def brute_force(dfa, text: str) -> list:
+    spans = []
+    position = 0
+    while position < len(text):
+        for start in range(position, len(text)):
+            ends = [
+                end
+                for end in range(start + 1, len(text) + 1)
+                if dfa.accepts(text[start:end])
+            ]
+            if ends:
+                spans.append((start, max(ends)))
+                position = max(ends)
+                break
+        else:
+            break
+    return spans
+
+
+@pytest.mark.parametrize("pattern", ["a|a*b", "ab|b*c|a", "(ab)*a|ba*", "a*b*"])
+def test_leftmost_longest_matches_brute_force(pattern):
+    dfa = compile_regex(pattern, ("a", "b", "c"))
+    rng = random.Random(pattern)
+    for _ in range(200):
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 20)))
+        expected = brute_force(dfa, text)
+        starts, ends = dfa.scan(text)
+        assert list(zip(starts.tolist(), ends.tolist())) == expected
+
+        scanner = dfa.scanner()
+        found = [scanner.feed(symbol) for symbol in text] + [scanner.finish()]
+        spans = [span for starts, ends in found for span in zip(starts, ends)]
+        assert spans == expected
+
+
+# A match that may still grow must not make the scan walk the text again
+def test_open_match_is_scanned_once():
+    dfa = compile_regex("a|a*b", ("a", "b"))
+    began = time.perf_counter()
+    starts, ends = dfa.scan("a" * 100_000)
+    assert time.perf_counter() - began < 5
+    assert starts.tolist() == list(range(100_000))
+    assert ends.tolist() == list(range(1, 100_001))
+
+    starts, ends = dfa.scan("a" * 100_000 + "b")
+    assert (starts.tolist(), ends.tolist()) == ([0], [100_001])
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from lib.regex import compile_regex
+from lib.server import ValidationService
+
+
+# Send raw request bytes to a fresh service
+# Return form: (status, JSON body) of the response
+async def exchange(request: bytes) -> tuple:
+    service = ValidationService({"ab": compile_regex("(ab)*")})
+    server = await asyncio.start_server(service.serve_connection, "127.0.0.1", 0)
+    try:
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_validate():
+    body = b'{"inputs": ["abab", "aba"]}'
+    status, response = asyncio.run(
+        exchange(
+            b"POST /dfas/ab/validate HTTP/1.1\r\n"
+            b"Connection: close\r\n"
+            b"Content-Length: %d\r\n\r\n" % len(body) + body
+        )
+    )
+    assert status == 200
+    assert response == {"accepted": [True, False]}
+
+
+def test_negative_content_length():
+    status, response = asyncio.run(
+        exchange(b"POST /dfas/ab/validate HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+    )
+    assert status == 400
+    assert "Content-Length" in response["error"]
+
+
+@pytest.mark.parametrize(
+    "request_head, expected",
+    [
+        (b"GET /" + b"x" * 100_000 + b" HTTP/1.1\r\n\r\n", 400),
+        (b"GET /health HTTP/1.1\r\nX-Long: " + b"x" * 100_000 + b"\r\n\r\n", 431),
+    ],
+    ids=["request line", "header line"],
+)
+def test_overlong_lines(request_head, expected):
+    status, _ = asyncio.run(exchange(request_head))
+    assert status == expected
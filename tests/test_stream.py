@@ -0,0 +1,42 @@
+import pytest
+
+from lib.dfa import DFA
+from lib.stream import iter_line_verdicts, validate_stream
+
+LINES = ["é", "éa", "a", " éaa　", " é", "é€", "", "𝄞"]
+
+
+# Accepts "é" followed by any number of "a"
+@pytest.fixture
+def dfa() -> DFA:
+    return DFA(
+        alphabet=("é", "a"),
+        states=("s", "t"),
+        initial_state="s",
+        final_states=("t",),
+        rules={("s", "é"): "t", ("t", "a"): "t"},
+    )
+
+
+def test_utf8_chunk_feed(dfa):
+    validator = dfa.stream(lines=True)
+    assert validator.feed("é\n".encode()).tolist() == [True]
+
+
+# Chunks of 1 and 3 bytes split characters, the carried bytes finish them
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 20])
+def test_line_verdicts_match_validate(dfa, chunk_size):
+    data = "\n".join(LINES).encode()
+    verdicts = list(iter_line_verdicts(dfa, data, chunk_size=chunk_size))
+    assert verdicts == [dfa.validate(line) for line in LINES]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1 << 20])
+def test_word_verdict_matches_validate(dfa, chunk_size):
+    for text in LINES:
+        assert validate_stream(dfa, text.encode(), chunk_size) == dfa.validate(text)
+
+
+def test_truncated_utf8_raises(dfa):
+    with pytest.raises(UnicodeDecodeError):
+        validate_stream(dfa, "é".encode()[:1])
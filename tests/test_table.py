@@ -0,0 +1,31 @@
+import pandas as pd
+
+from lib.table import frame_to_rules, rules_key, update_rules
+
+
+# Apply the edits to a copy of `df`, one row at a time
+# Return form: (edited table, its rules kept up to date by update_rules())
+def edit(df, edits: list) -> tuple:
+    df = df.copy()
+    rules = frame_to_rules(df)
+    for state, symbol, next_state in edits:
+        df.at[state, symbol] = next_state
+        update_rules(rules, df, [state])
+    return df, rules
+
+
+def test_edit_order_does_not_change_the_key():
+    df = pd.DataFrame(
+        [["q1", None], ["q2", "q0"], [None, "q2"]],
+        index=["q0", "q1", "q2"],
+        columns=["a", "b"],
+        dtype=object,
+    )
+    edits = [("q0", "b", "q2"), ("q2", "a", "q0"), ("q1", "a", None)]
+    first_df, first = edit(df, edits)
+    second_df, second = edit(df, edits[::-1])
+
+    assert first_df.equals(second_df)
+    assert list(first.items()) != list(second.items())
+    assert rules_key(first) == rules_key(second)
+    assert rules_key(first) == rules_key(frame_to_rules(first_df))